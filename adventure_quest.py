@@ -4,20 +4,34 @@
 # Internship Project - Virtunexa
 
 import random
-import json
 import sqlite3
 import logging
+import queue
+import threading
+import time
+from collections import Counter
 from datetime import datetime
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 from enum import Enum
 
-# Configure logging
-logging.basicConfig(
-    filename='game_logs.txt',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+from commands import COMMANDS, AmbiguousCommand, CommandRegistry
+from config import GameConfig
+from game_io import ConsoleIO, GameIO, Prompt
+from game_logging import configure_logging
+from metrics import METRICS, enable_metrics, instrumented, timed
+from saves import DatabaseSaveStore, SaveStore, state_delta
+from world import Item, World, WorldState, load_world, slotted
+
+log = logging.getLogger(__name__)
+
+# Prompt shown while the game waits for a regular command
+COMMAND_PROMPT = Prompt("command", ">>> ")
+
+# Seeds for new sessions; independent of the global random state, even after fork
+_seed_source = random.SystemRandom()
 
 class GameState(Enum):
     PLAYING = "playing"
@@ -25,14 +39,7 @@ class GameState(Enum):
     VICTORY = "victory"
     PAUSED = "paused"
 
-@dataclass
-class Item:
-    name: str
-    description: str
-    value: int
-    usable: bool = False
-    consumable: bool = False
-
+@slotted
 @dataclass
 class Character:
     name: str
@@ -43,680 +50,1374 @@ class Character:
     experience: int = 0
     level: int = 1
 
+class Inventory:
+    """Counted multiset of item keys plus a numeric gold balance
+    
+    Adding, removing and counting an item are O(1) dict operations;
+    picked-up gold coins only raise the balance.
+    """
+    
+    __slots__ = ("items", "counts", "gold", "size", "gold_item")
+    
+    def __init__(self, items: Mapping[str, Item], gold_item: str = GameConfig.GOLD_ITEM):
+        self.items = items
+        self.counts: Dict[str, int] = {}
+        self.gold = 0
+        self.size = 0
+        self.gold_item = gold_item
+    
+    def add(self, key: str, count: int = 1):
+        """Add count copies of an item (or coins, for the gold item)"""
+        if key == self.gold_item:
+            self.gold += count
+        else:
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.size += count
+    
+    def remove(self, key: str, count: int = 1):
+        """Remove count copies of an item; ValueError if there are fewer"""
+        if self.count(key) < count:
+            raise ValueError(f"Not enough '{key}' in inventory")
+        if key == self.gold_item:
+            self.gold -= count
+        elif self.counts[key] == count:
+            del self.counts[key]
+        else:
+            self.counts[key] -= count
+        self.size -= count
+    
+    def spend(self, amount: int) -> bool:
+        """Pay amount gold if the balance covers it"""
+        if self.gold < amount:
+            return False
+        self.remove(self.gold_item, amount)
+        return True
+    
+    def count(self, key: str) -> int:
+        """Copies of an item held"""
+        return self.gold if key == self.gold_item else self.counts.get(key, 0)
+    
+    def usable(self) -> List[str]:
+        """Keys of usable items held, in the order they were first picked up"""
+        return [key for key in self.counts if self.items[key].usable]
+    
+    def keys(self) -> List[str]:
+        """Keys of held items in pickup order, then gold if any"""
+        return list(self.counts) + [self.gold_item] if self.gold else list(self.counts)
+    
+    def restore(self, counts: Mapping[str, int], gold: int):
+        """Replace the contents with saved counts and balance"""
+        self.counts = dict(counts)
+        self.gold = gold
+        self.size = sum(self.counts.values()) + gold
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def __iter__(self) -> Iterator[Tuple[str, Item, int]]:
+        """(key, item, count) for each distinct item, excluding gold"""
+        for key, count in self.counts.items():
+            yield key, self.items[key], count
+
+def connect_readonly(db_name: str) -> sqlite3.Connection:
+    """Read-only connection for analytics; in WAL mode it never blocks game writes"""
+    return sqlite3.connect(Path(db_name).resolve().as_uri() + "?mode=ro", uri=True)
+
+@instrumented
 class GameDatabase:
-    """Handles all database operations for game persistence"""
+    """Handles all database operations for game persistence
+
+    One long-lived connection in WAL mode is shared by every caller and
+    guarded by a lock. Decision inserts and their ``total_decisions``
+    counter updates are buffered and written in a single transaction when
+    the buffer reaches ``batch_size`` rows, when a timer fires
+    ``flush_interval`` seconds after the first row was buffered, or when the
+    session ends.
+    """
     
-    def __init__(self, db_name: str = "adventure_game.db"):
+    def __init__(self, db_name: str = GameConfig.DATABASE_NAME,
+                 batch_size: int = GameConfig.DB_BATCH_SIZE,
+                 flush_interval: float = GameConfig.DB_FLUSH_INTERVAL):
         self.db_name = db_name
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._pending: List[Tuple] = []
+        self._flush_timer: Optional[threading.Timer] = None
+        
+        self.conn = sqlite3.connect(db_name, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
         self.initialize_database()
     
     def initialize_database(self):
         """Create necessary tables if they don't exist"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS game_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                player_name TEXT NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT,
-                final_score INTEGER,
-                game_state TEXT,
-                total_decisions INTEGER,
-                items_collected INTEGER
-            )
-        ''')
-        
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS player_decisions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER,
-                decision_point TEXT,
-                choice_made TEXT,
-                timestamp TEXT,
-                FOREIGN KEY (session_id) REFERENCES game_sessions (id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        with self._lock, self.conn:
+            cursor = self.conn.cursor()
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS game_sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    player_name TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT,
+                    final_score INTEGER,
+                    game_state TEXT,
+                    total_decisions INTEGER,
+                    items_collected INTEGER
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS player_decisions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id INTEGER,
+                    decision_point TEXT,
+                    choice_made TEXT,
+                    timestamp TEXT,
+                    FOREIGN KEY (session_id) REFERENCES game_sessions (id)
+                )
+            ''')
+            
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_decisions_session ON player_decisions (session_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_player ON game_sessions (player_name)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_score ON game_sessions (final_score)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_state ON game_sessions (game_state)")
+            
+            # Statistics kept up to date by start_new_session and end_session
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS game_totals (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    sessions INTEGER NOT NULL,
+                    scored_sessions INTEGER NOT NULL,
+                    total_score INTEGER NOT NULL,
+                    victories INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS player_stats (
+                    player_name TEXT PRIMARY KEY,
+                    sessions INTEGER NOT NULL,
+                    scored_sessions INTEGER NOT NULL,
+                    victories INTEGER NOT NULL,
+                    best_score INTEGER
+                ) WITHOUT ROWID
+            ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_player_stats_best ON player_stats (best_score)")
+            
+            if cursor.execute("SELECT 1 FROM game_totals").fetchone() is None:
+                self._rebuild_statistics(cursor)
+            
+            # Moves reference interned location ids instead of repeating names
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS locations (
+                    id INTEGER PRIMARY KEY,
+                    key TEXT NOT NULL UNIQUE
+                )
+            ''')
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(player_decisions)")]
+            for column in ("from_location", "to_location"):
+                if column not in columns:
+                    cursor.execute(f"ALTER TABLE player_decisions ADD COLUMN {column} INTEGER")
+            
+            # Replay data: each session's RNG seed and every line of input
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(game_sessions)")]
+            if "seed" not in columns:
+                cursor.execute("ALTER TABLE game_sessions ADD COLUMN seed INTEGER")
+            
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS session_inputs (
+                    session_id INTEGER NOT NULL,
+                    seq INTEGER NOT NULL,
+                    prompt TEXT NOT NULL,
+                    line TEXT NOT NULL,
+                    PRIMARY KEY (session_id, seq),
+                    FOREIGN KEY (session_id) REFERENCES game_sessions (id)
+                ) WITHOUT ROWID
+            ''')
+            
+            # Save snapshots, newest per player and kind found through the index
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS saves (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    player_name TEXT NOT NULL,
+                    saved_at TEXT NOT NULL,
+                    snapshot BLOB NOT NULL,
+                    kind TEXT NOT NULL DEFAULT 'manual'
+                )
+            ''')
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(saves)")]
+            if "kind" not in columns:
+                cursor.execute("ALTER TABLE saves ADD COLUMN kind TEXT NOT NULL DEFAULT 'manual'")
+            cursor.execute("DROP INDEX IF EXISTS idx_saves_player_time")
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_saves_player_kind_time
+                ON saves (player_name, kind, saved_at)
+            ''')
+            
+            # Autosave deltas recorded on top of a snapshot
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS save_journal (
+                    id INTEGER PRIMARY KEY,
+                    save_id INTEGER NOT NULL,
+                    delta BLOB NOT NULL,
+                    FOREIGN KEY (save_id) REFERENCES saves (id)
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_save_journal_save
+                ON save_journal (save_id)
+            ''')
     
-    def start_new_session(self, player_name: str) -> int:
+    @timed("db_call_seconds", call="start_new_session")
+    def start_new_session(self, player_name: str, seed: Optional[int] = None) -> int:
         """Start a new game session and return session ID"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO game_sessions (player_name, start_time, game_state, total_decisions, items_collected)
-            VALUES (?, ?, ?, 0, 0)
-        ''', (player_name, datetime.now().isoformat(), GameState.PLAYING.value))
-        
-        session_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
-        logging.info(f"New game session started for player: {player_name}")
+        with self._lock, self.conn:
+            cursor = self.conn.execute('''
+                INSERT INTO game_sessions (player_name, start_time, game_state, total_decisions, items_collected, seed)
+                VALUES (?, ?, ?, 0, 0, ?)
+            ''', (player_name, datetime.now().isoformat(), GameState.PLAYING.value, seed))
+            session_id = cursor.lastrowid
+            
+            self.conn.execute("UPDATE game_totals SET sessions = sessions + 1")
+            self.conn.execute('''
+                INSERT INTO player_stats (player_name, sessions, scored_sessions, victories)
+                VALUES (?, 1, 0, 0)
+                ON CONFLICT (player_name) DO UPDATE SET sessions = sessions + 1
+            ''', (player_name,))
+        
+        log.info("New game session started for player: %s", player_name, extra={"event": "session_start"})
         return session_id
     
-    def log_decision(self, session_id: int, decision_point: str, choice: str):
-        """Log a player decision"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO player_decisions (session_id, decision_point, choice_made, timestamp)
-            VALUES (?, ?, ?, ?)
-        ''', (session_id, decision_point, choice, datetime.now().isoformat()))
-        
-        # Update decision counter
-        cursor.execute('''
-            UPDATE game_sessions 
-            SET total_decisions = total_decisions + 1 
-            WHERE id = ?
-        ''', (session_id,))
-        
-        conn.commit()
-        conn.close()
+    def location_keys(self) -> Dict[int, str]:
+        """Every interned location id and its key"""
+        with self._lock:
+            return dict(self.conn.execute("SELECT id, key FROM locations"))
+    
+    def log_decision(self, session_id: int, decision_point: str, choice: str,
+                     from_location: Optional[str] = None, to_location: Optional[str] = None):
+        """Log a player decision (buffered until the next flush)"""
+        with self._lock:
+            self._pending.append((session_id, decision_point, choice, datetime.now().isoformat(),
+                                  from_location, to_location))
+            
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+            elif self._flush_timer is None:
+                # Quiet sessions still get their decisions written within flush_interval
+                self._flush_timer = threading.Timer(self.flush_interval, self._flush_on_timer)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        except sqlite3.Error as e:
+            log.error("Timed decision flush failed: %s", e)
+    
+    def flush(self):
+        """Write all buffered decisions and counter updates in one transaction"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._pending:
+                return
+            
+            pending, self._pending = self._pending, []
+            self.write_decisions(pending)
+    
+    def submit(self, job: Callable[[], None]):
+        """Run a database write now; GameDatabase is its own synchronous writer"""
+        job()
+    
+    @timed("db_call_seconds", call="write_decisions")
+    def write_decisions(self, rows: List[Tuple]):
+        """Insert (session_id, decision_point, choice, timestamp, from_location, to_location)
+        rows in one transaction, interning the location keys as ids"""
+        decision_counts = Counter(row[0] for row in rows)
+        keys = {key for row in rows for key in row[4:] if key is not None}
+        
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO locations (key) VALUES (?)", [(key,) for key in keys])
+            self.conn.executemany('''
+                INSERT INTO player_decisions
+                    (session_id, decision_point, choice_made, timestamp, from_location, to_location)
+                VALUES (?, ?, ?, ?, (SELECT id FROM locations WHERE key = ?),
+                        (SELECT id FROM locations WHERE key = ?))
+            ''', rows)
+            
+            # Update decision counters, one statement per session
+            self.conn.executemany('''
+                UPDATE game_sessions 
+                SET total_decisions = total_decisions + ? 
+                WHERE id = ?
+            ''', [(count, session_id) for session_id, count in decision_counts.items()])
+    
+    @timed("db_call_seconds", call="write_inputs")
+    def write_inputs(self, session_id: int, rows: List[Tuple[int, str, str]]):
+        """Record (seq, prompt kind, line) input rows for a session in one transaction"""
+        with self._lock, self.conn:
+            self.conn.executemany('''
+                INSERT INTO session_inputs (session_id, seq, prompt, line)
+                VALUES (?, ?, ?, ?)
+            ''', [(session_id, seq, prompt, line) for seq, prompt, line in rows])
+    
+    def forget_seed(self, session_id: int):
+        """Mark a session as not replayable by dropping its seed"""
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE game_sessions SET seed = NULL WHERE id = ?", (session_id,))
+    
+    def session_inputs(self, session_id: int) -> List[Tuple[str, str]]:
+        """(prompt kind, line) for every recorded input of a session, in order"""
+        with self._lock:
+            return self.conn.execute('''
+                SELECT prompt, line FROM session_inputs WHERE session_id = ? ORDER BY seq
+            ''', (session_id,)).fetchall()
     
+    @timed("db_call_seconds", call="end_session")
     def end_session(self, session_id: int, final_score: int, game_state: GameState, items_count: int):
         """End a game session"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
+        with self._lock:
+            self.flush()
+            
+            with self.conn:
+                # Only the first end of a session counts toward the statistics
+                row = self.conn.execute(
+                    "SELECT player_name, end_time FROM game_sessions WHERE id = ?", (session_id,)
+                ).fetchone()
+                
+                self.conn.execute('''
+                    UPDATE game_sessions 
+                    SET end_time = ?, final_score = ?, game_state = ?, items_collected = ?
+                    WHERE id = ?
+                ''', (datetime.now().isoformat(), final_score, game_state.value, items_count, session_id))
+                
+                if row and row[1] is None:
+                    victory = int(game_state == GameState.VICTORY)
+                    self.conn.execute('''
+                        UPDATE game_totals
+                        SET scored_sessions = scored_sessions + 1, total_score = total_score + ?,
+                            victories = victories + ?
+                    ''', (final_score, victory))
+                    self.conn.execute('''
+                        UPDATE player_stats
+                        SET scored_sessions = scored_sessions + 1, victories = victories + ?,
+                            best_score = MAX(COALESCE(best_score, ?), ?)
+                        WHERE player_name = ?
+                    ''', (victory, final_score, final_score, row[0]))
+    
+    @timed("db_call_seconds", call="statistics")
+    def statistics(self, top: int = 5) -> Dict:
+        """Session totals, average score and the top players, from the summary tables"""
+        with self._lock:
+            sessions, scored, total_score, victories = self.conn.execute(
+                "SELECT sessions, scored_sessions, total_score, victories FROM game_totals"
+            ).fetchone()
+            leaders = self.conn.execute('''
+                SELECT player_name, best_score FROM player_stats
+                WHERE best_score IS NOT NULL
+                ORDER BY best_score DESC LIMIT ?
+            ''', (top,)).fetchall()
+        return {
+            "sessions": sessions,
+            "victories": victories,
+            "average_score": total_score / scored if scored else None,
+            "top_players": leaders,
+        }
+    
+    def player_statistics(self, player_name: str) -> Optional[Dict]:
+        """One player's session count, finished games, victories and best score"""
+        with self._lock:
+            row = self.conn.execute('''
+                SELECT sessions, scored_sessions, victories, best_score FROM player_stats
+                WHERE player_name = ?
+            ''', (player_name,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("sessions", "finished", "victories", "best_score"), row))
+    
+    def rebuild_statistics(self):
+        """Recompute the summary tables from game_sessions"""
+        with self._lock, self.conn:
+            self._rebuild_statistics(self.conn.cursor())
+    
+    def _rebuild_statistics(self, cursor: sqlite3.Cursor):
+        cursor.execute("DELETE FROM game_totals")
+        cursor.execute("DELETE FROM player_stats")
+        cursor.execute('''
+            INSERT INTO game_totals (id, sessions, scored_sessions, total_score, victories)
+            SELECT 1, COUNT(*), COUNT(final_score), COALESCE(SUM(final_score), 0),
+                   COUNT(CASE WHEN game_state = 'victory' THEN 1 END)
+            FROM game_sessions
+        ''')
         cursor.execute('''
-            UPDATE game_sessions 
-            SET end_time = ?, final_score = ?, game_state = ?, items_collected = ?
-            WHERE id = ?
-        ''', (datetime.now().isoformat(), final_score, game_state.value, items_count, session_id))
+            INSERT INTO player_stats (player_name, sessions, scored_sessions, victories, best_score)
+            SELECT player_name, COUNT(*), COUNT(final_score),
+                   COUNT(CASE WHEN game_state = 'victory' THEN 1 END), MAX(final_score)
+            FROM game_sessions GROUP BY player_name
+        ''')
+    
+    @timed("db_call_seconds", call="write_save")
+    def write_save(self, player_name: str, snapshot: bytes, keep: int = GameConfig.SAVE_RETENTION,
+                   kind: str = "manual") -> int:
+        """Store a save snapshot and drop all but the player's newest ``keep`` saves of that kind, atomically"""
+        with self._lock, self.conn:
+            save_id = self.conn.execute('''
+                INSERT INTO saves (player_name, saved_at, snapshot, kind)
+                VALUES (?, ?, ?, ?)
+            ''', (player_name, datetime.now().isoformat(), snapshot, kind)).lastrowid
+            
+            expired = '''
+                SELECT id FROM saves WHERE player_name = ? AND kind = ?
+                ORDER BY saved_at DESC, id DESC LIMIT -1 OFFSET ?
+            '''
+            self.conn.execute(f"DELETE FROM save_journal WHERE save_id IN ({expired})", (player_name, kind, keep))
+            self.conn.execute(f"DELETE FROM saves WHERE id IN ({expired})", (player_name, kind, keep))
+        return save_id
+    
+    @timed("db_call_seconds", call="append_save_delta")
+    def append_save_delta(self, save_id: int, delta: bytes):
+        """Journal one autosave delta on top of a save"""
+        with self._lock, self.conn:
+            self.conn.execute('''
+                INSERT INTO save_journal (save_id, delta) VALUES (?, ?)
+            ''', (save_id, delta))
+    
+    @timed("db_call_seconds", call="latest_save")
+    def latest_save(self, player_name: str, kind: str = "manual") -> Optional[Tuple[int, bytes, List[bytes]]]:
+        """(save id, snapshot, journal deltas in order) of the player's newest save of a kind"""
+        with self._lock:
+            row = self.conn.execute('''
+                SELECT id, snapshot FROM saves WHERE player_name = ? AND kind = ?
+                ORDER BY saved_at DESC, id DESC LIMIT 1
+            ''', (player_name, kind)).fetchone()
+            if row is None:
+                return None
+            
+            deltas = [delta for delta, in self.conn.execute('''
+                SELECT delta FROM save_journal WHERE save_id = ? ORDER BY id
+            ''', (row[0],))]
+        return row[0], row[1], deltas
+    
+    def close(self):
+        """Flush pending writes and close the connection"""
+        with self._lock:
+            self.flush()
+            self.conn.close()
+
+class DecisionLogger:
+    """Write-behind queue that keeps decision logging off the game loop
+
+    The game enqueues decision events and a daemon thread drains them into
+    the database in bulk. The queue is bounded: when it is full the
+    ``overflow`` policy either blocks the caller until the writer catches
+    up ("block") or drops the event and counts it ("drop"). One logger can
+    be shared by every game that uses the same database.
+    
+    Other writes (input records, saves) are submitted as jobs that run on
+    the same thread, in order, and are never dropped.
+    """
+    
+    _STOP = object()
+    
+    def __init__(self, db: GameDatabase,
+                 max_queue: int = GameConfig.DECISION_QUEUE_SIZE,
+                 overflow: str = GameConfig.DECISION_QUEUE_OVERFLOW):
+        if overflow not in ("block", "drop"):
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        
+        self.db = db
+        self.overflow = overflow
+        self.queue = queue.Queue(maxsize=max_queue)
+        
+        # Counters
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.failed_jobs = 0
+        self.flushes = 0
+        self.max_depth = 0
+        self.flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+        
+        self._thread = threading.Thread(target=self._run, name="decision-logger", daemon=True)
+        self._thread.start()
+    
+    def log_decision(self, session_id: int, decision_point: str, choice: str,
+                     from_location: Optional[str] = None, to_location: Optional[str] = None):
+        """Enqueue a player decision for the background writer"""
+        event = (session_id, decision_point, choice, datetime.now().isoformat(), from_location, to_location)
         
-        conn.commit()
-        conn.close()
+        if self.overflow == "block":
+            self.queue.put(event)
+        else:
+            try:
+                self.queue.put_nowait(event)
+            except queue.Full:
+                self.dropped += 1
+                return
+        
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+    
+    def submit(self, job: Callable[[], None]):
+        """Run a database write on the writer thread"""
+        if not self._thread.is_alive():
+            job()
+            return
+        self.queue.put(job)
+    
+    def saturated(self, headroom: int) -> bool:
+        """Whether fewer than headroom queue slots are free, so enqueueing may block"""
+        return self.queue.maxsize > 0 and self.queue.qsize() > self.queue.maxsize - headroom
+    
+    def flush(self):
+        """Block until every queued decision and job has been written"""
+        if self._thread.is_alive():
+            self.queue.join()
+    
+    def close(self):
+        """Flush remaining decisions and stop the writer thread"""
+        if self._thread.is_alive():
+            self.queue.put(self._STOP)
+            self._thread.join()
+    
+    def stats(self) -> Dict[str, float]:
+        """Return queue depth and flush latency counters"""
+        return {
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "failed_jobs": self.failed_jobs,
+            "flushes": self.flushes,
+            "avg_flush_ms": 1000 * self.flush_seconds / self.flushes if self.flushes else 0.0,
+            "max_flush_ms": 1000 * self.max_flush_seconds,
+        }
+    
+    def _run(self):
+        """Writer thread: drain the queue into the database in batches"""
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.db.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = any(event is self._STOP for event in batch)
+            rows = [event for event in batch if isinstance(event, tuple)]
+            
+            if rows:
+                start = time.perf_counter()
+                try:
+                    self.db.write_decisions(rows)
+                    self.written += len(rows)
+                except sqlite3.Error as e:
+                    self.failed += len(rows)
+                    log.error("Decision logger write failed: %s", e)
+                elapsed = time.perf_counter() - start
+                self.flushes += 1
+                self.flush_seconds += elapsed
+                self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+            
+            for job in (event for event in batch if callable(event)):
+                try:
+                    job()
+                except Exception as e:
+                    self.failed_jobs += 1
+                    log.error("Writer job failed: %s", e)
+            
+            for _ in batch:
+                self.queue.task_done()
+            
+            if stop:
+                break
 
+@instrumented
 class AdvancedAdventureGame:
     """Main game class with advanced features"""
     
-    def __init__(self):
-        self.db = GameDatabase()
+    # Events that happen on every visit; all others happen once per session
+    REPEATABLE_EVENTS = frozenset({"merchant_encounter", "final_victory"})
+    
+    def __init__(self, db: Optional[GameDatabase] = None, decisions: Optional[DecisionLogger] = None,
+                 io: Optional[GameIO] = None, rng: Optional[random.Random] = None,
+                 config: type = GameConfig, world: Optional[World] = None,
+                 saves: Optional[SaveStore] = None, seed: Optional[int] = None,
+                 commands: Optional[CommandRegistry] = None):
+        self.db = db or GameDatabase()
+        self.decisions = decisions or DecisionLogger(self.db)
+        self.saves = saves or DatabaseSaveStore(self.db, config.SAVE_COMPACT_EVERY, config.SAVE_RETENTION,
+                                                config.AUTOSAVE_RETENTION, writer=self.decisions)
+        self.saved_core: Optional[Dict] = None
+        self.io = io or ConsoleIO()
+        self.commands = commands or COMMANDS
+        
+        # A recorded seed plus the recorded inputs make a session replayable
+        if rng is None and seed is None:
+            seed = _seed_source.getrandbits(63)
+        self.seed = seed
+        self.rng = rng or random.Random(seed)
+        self.input_count = 0
+        self._unrecorded_inputs: List[Tuple[int, str, str]] = []
+        self.config = config
         self.session_id = None
+        self.session_ended = False
+        self.pending_prompt: Optional[Prompt] = None
+        self.combat: Optional[Dict] = None
         self.game_state = GameState.PLAYING
-        self.current_location = "forest_start"
         self.player = None
-        self.inventory = []
         self.game_score = 0
         self.decision_count = 0
         
-        # Game items database
-        self.items_db = {
-            "rusty_sword": Item("Rusty Sword", "An old but functional sword", 25, True),
-            "health_potion": Item("Health Potion", "Restores 30 health points", 30, True, True),
-            "magic_crystal": Item("Magic Crystal", "A mysterious glowing crystal", 100),
-            "ancient_key": Item("Ancient Key", "Opens mysterious doors", 50, True),
-            "leather_armor": Item("Leather Armor", "Provides basic protection", 40, True),
-            "gold_coin": Item("Gold Coin", "Currency of the realm", 10),
-            "enchanted_bow": Item("Enchanted Bow", "A bow with magical properties", 75, True)
-        }
+        # Shared, immutable world content
+        self.world = world or load_world(config.WORLD_FILE, config.WORLD_CACHE_DIR)
+        self.items_db = self.world.items
+        self.locations = self.world.locations
+        self.world_graph = self.world.graph
+        self.inventory = Inventory(self.items_db, config.GOLD_ITEM)
+        self.current_location = self.world.start
         
-        # Location database with dynamic descriptions
-        self.locations = {
-            "forest_start": {
-                "name": "Mysterious Forest Entrance",
-                "description": "Ancient trees tower above you, their branches creating a natural canopy. Sunlight filters through, creating dancing shadows on the forest floor.",
-                "exits": ["north_trail", "east_clearing", "west_river"],
-                "items": ["rusty_sword"],
-                "enemies": None,
-                "special_events": ["tutorial_guide"]
-            },
-            "north_trail": {
-                "name": "Winding Forest Trail",
-                "description": "The path winds deeper into the forest. You hear strange sounds echoing from the darkness ahead.",
-                "exits": ["goblin_camp", "forest_start", "hidden_cave"],
-                "items": ["health_potion"],
-                "enemies": ["forest_wolf"],
-                "special_events": None
-            },
-            "east_clearing": {
-                "name": "Sunlit Clearing",
-                "description": "A peaceful clearing bathed in golden sunlight. Wildflowers bloom around a crystal-clear spring.",
-                "exits": ["forest_start", "ancient_ruins"],
-                "items": ["magic_crystal", "gold_coin"],
-                "enemies": None,
-                "special_events": ["merchant_encounter"]
-            },
-            "west_river": {
-                "name": "Babbling Brook",
-                "description": "A gentle stream flows through smooth stones. The water is crystal clear and surprisingly deep.",
-                "exits": ["forest_start", "waterfall_cave"],
-                "items": ["ancient_key"],
-                "enemies": ["river_serpent"],
-                "special_events": ["bridge_puzzle"]
-            },
-            "goblin_camp": {
-                "name": "Abandoned Goblin Camp",
-                "description": "Crude tents and smoldering fire pits suggest recent goblin activity. The air smells of smoke and danger.",
-                "exits": ["north_trail", "treasure_chamber"],
-                "items": ["leather_armor", "gold_coin"],
-                "enemies": ["goblin_warrior"],
-                "special_events": None
-            },
-            "treasure_chamber": {
-                "name": "Hidden Treasure Chamber",
-                "description": "A magnificent chamber filled with gleaming treasures and ancient artifacts. This is clearly the end of your quest!",
-                "exits": ["goblin_camp"],
-                "items": ["enchanted_bow", "magic_crystal", "gold_coin"],
-                "enemies": ["treasure_guardian"],
-                "special_events": ["final_victory"]
-            }
-        }
+        # This session's changes to the world (taken items, defeated enemies, events)
+        self.world_state = WorldState(self.world)
     
     def display_welcome(self):
         """Display game welcome message"""
-        print("\n" + "="*70)
-        print("    🗡️  WELCOME TO THE REALM OF ENDLESS ADVENTURES  🗡️")
-        print("="*70)
-        print("A mystical world awaits your exploration...")
-        print("Your choices will determine your fate!")
-        print("="*70)
+        if not self.io.renders:
+            return
+        
+        self.io.write("\n" + "="*70)
+        self.io.write("    🗡️  WELCOME TO THE REALM OF ENDLESS ADVENTURES  🗡️")
+        self.io.write("="*70)
+        self.io.write("A mystical world awaits your exploration...")
+        self.io.write("Your choices will determine your fate!")
+        self.io.write("="*70)
+    
+    def prompt(self, kind: str, text: str, handler: Callable[[str], None], options: Iterable[str] = ()):
+        """Ask the player a question; ``handler`` receives the answer line"""
+        self.pending_prompt = Prompt(kind, text, tuple(options), handler)
+    
+    def next_prompt(self) -> Prompt:
+        """Return the prompt to show while waiting for the next line of input"""
+        if self.pending_prompt:
+            return self.pending_prompt
+        self.io.write(f"\n🎮 What would you like to do?")
+        return COMMAND_PROMPT
+    
+    def process_input(self, line: str):
+        """Feed one line of player input: a prompt answer or a command"""
+        self.record_input(self.pending_prompt.kind if self.pending_prompt else COMMAND_PROMPT.kind, line)
+        
+        if self.pending_prompt:
+            prompt, self.pending_prompt = self.pending_prompt, None
+            prompt.handler(line.strip())
+        elif line.strip():
+            self.process_command(line)
+        
+        if not self.pending_prompt and self.game_state == GameState.PLAYING:
+            if self.player and self.player.health <= 0:
+                self.io.write("\n💀 You have died! Game Over!")
+                self.game_state = GameState.GAME_OVER
+            # Check victory condition
+            elif self.current_location == "treasure_chamber":
+                self.handle_special_events("final_victory")
+    
+    def record_input(self, prompt_kind: str, line: str):
+        """Buffer an input line for replay, writing a batch once the session exists"""
+        self._unrecorded_inputs.append((self.input_count, prompt_kind, line.rstrip("\r\n")))
+        self.input_count += 1
+        if self.session_id and len(self._unrecorded_inputs) >= self.db.batch_size:
+            self.flush_inputs()
+    
+    def flush_inputs(self):
+        """Write buffered input lines to the session's record"""
+        if self.session_id and self._unrecorded_inputs:
+            rows, self._unrecorded_inputs = self._unrecorded_inputs, []
+            self.decisions.submit(partial(self.db.write_inputs, self.session_id, rows))
+    
+    def resolve_prompts(self):
+        """Answer pending prompts by reading from a blocking I/O backend"""
+        while self.pending_prompt:
+            self.process_input(self.io.read(self.pending_prompt))
     
     def initialize_player(self):
         """Initialize player character"""
-        print("\nBefore we begin your adventure...")
-        player_name = input("What is your name, brave adventurer? ").strip()
-        
+        self.io.write("\nBefore we begin your adventure...")
+        self.prompt("player_name", "What is your name, brave adventurer? ", self.create_player)
+    
+    def create_player(self, player_name: str):
+        """Create the player character and start a database session"""
+        player_name = player_name.strip()
         if not player_name:
             player_name = "Unknown Hero"
         
-        self.player = Character(
-            name=player_name,
-            health=100,
-            max_health=100,
-            attack_power=20,
-            defense=5
-        )
+        self.player = self.new_character(player_name)
+        
+        self.session_id = self.db.start_new_session(player_name, self.seed)
         
-        self.session_id = self.db.start_new_session(player_name)
+        self.io.write(f"\nWelcome, {self.player.name}!")
+        self.io.write(f"Health: {self.player.health}/{self.player.max_health}")
+        self.io.write(f"Attack Power: {self.player.attack_power}")
+        self.io.write(f"Defense: {self.player.defense}")
         
-        print(f"\nWelcome, {self.player.name}!")
-        print(f"Health: {self.player.health}/{self.player.max_health}")
-        print(f"Attack Power: {self.player.attack_power}")
-        print(f"Defense: {self.player.defense}")
+        log.info("Player initialized: %s", player_name, extra={"event": "player_init"})
         
-        logging.info(f"Player initialized: {player_name}")
+        self.io.write(f"\n{self.player.name}, your adventure begins...")
+        self.display_location()
+    
+    def new_character(self, name: str) -> Character:
+        """Create a level 1 character with the configured starting stats"""
+        return Character(
+            name=name,
+            health=self.config.STARTING_HEALTH,
+            max_health=self.config.STARTING_HEALTH,
+            attack_power=self.config.STARTING_ATTACK,
+            defense=self.config.STARTING_DEFENSE
+        )
     
+    @timed("render_call_seconds", call="display_status")
     def display_status(self):
         """Display current player status"""
-        print(f"\n📊 === STATUS ===")
-        print(f"Health: {self.player.health}/{self.player.max_health}")
-        print(f"Level: {self.player.level} (XP: {self.player.experience})")
-        print(f"Score: {self.game_score}")
-        print(f"Items: {len(self.inventory)}")
+        if not self.io.renders:
+            return
+        
+        self.io.write(f"\n📊 === STATUS ===")
+        self.io.write(f"Health: {self.player.health}/{self.player.max_health}")
+        self.io.write(f"Level: {self.player.level} (XP: {self.player.experience})")
+        self.io.write(f"Score: {self.game_score}")
+        self.io.write(f"Items: {len(self.inventory)}")
         
         if self.inventory:
-            print("Inventory:", ", ".join([item.name for item in self.inventory]))
+            self.io.write("Inventory: " + ", ".join(self.describe_stack(item, count)
+                                                     for _, item, count in self.inventory))
     
+    @timed("render_call_seconds", call="display_location")
     def display_location(self):
         """Display current location details"""
+        if not self.io.renders:
+            return
+        
         location = self.locations[self.current_location]
         
-        print(f"\n🏞️  {location['name']}")
-        print("─" * len(location['name']))
-        print(location['description'])
+        self.io.write(f"\n🏞️  {location.name}")
+        self.io.write("─" * len(location.name))
+        self.io.write(location.description)
         
         # Show available items
-        if location['items']:
-            available_items = [item for item in location['items'] if item in self.items_db]
-            if available_items:
-                print(f"\n✨ You notice: {', '.join(available_items)}")
+        available_items = self.items_at(self.current_location)
+        if available_items:
+            self.io.write(f"\n✨ You notice: {', '.join(available_items)}")
         
         # Show exits
-        exits_str = ", ".join(location['exits'])
-        print(f"\n🚪 Available paths: {exits_str}")
+        exits_str = ", ".join(location.exits)
+        self.io.write(f"\n🚪 Available paths: {exits_str}")
     
+    @timed("combat_call_seconds", call="handle_combat")
     def handle_combat(self, enemy_name: str) -> bool:
-        """Handle combat encounters"""
-        enemy_stats = {
-            "forest_wolf": {"health": 40, "attack": 15, "defense": 3},
-            "goblin_warrior": {"health": 60, "attack": 20, "defense": 5},
-            "river_serpent": {"health": 50, "attack": 25, "defense": 2},
-            "treasure_guardian": {"health": 100, "attack": 30, "defense": 10}
-        }
-        
-        if enemy_name not in enemy_stats:
-            return True
-        
-        enemy = enemy_stats[enemy_name]
-        print(f"\n⚔️  A wild {enemy_name.replace('_', ' ').title()} appears!")
-        print(f"Enemy Health: {enemy['health']}")
+        """Handle a whole combat encounter, reading actions from the I/O backend"""
+        result = []
+        self.start_combat(enemy_name, result.append)
+        self.resolve_prompts()
+        return result[0]
+    
+    @timed("combat_call_seconds", call="start_combat")
+    def start_combat(self, enemy_name: str, on_end: Callable[[bool], None]):
+        """Begin a combat encounter; ``on_end`` receives True if the enemy was defeated"""
+        if enemy_name not in self.world.enemies:
+            on_end(True)
+            return
         
-        while enemy['health'] > 0 and self.player.health > 0:
-            print(f"\nWhat do you want to do?")
-            print("1. Attack")
-            print("2. Use Item")
-            print("3. Try to Flee")
+        enemy = self.world.enemies[enemy_name]._asdict()
+        self.combat = {"name": enemy_name, "enemy": enemy, "on_end": on_end}
+        self.io.write(f"\n⚔️  A wild {enemy_name.replace('_', ' ').title()} appears!")
+        self.io.write(f"Enemy Health: {enemy['health']}")
+        self.prompt_combat_action()
+    
+    def prompt_combat_action(self):
+        """Show the combat menu and wait for the player's action"""
+        self.io.write(f"\nWhat do you want to do?")
+        self.io.write("1. Attack")
+        self.io.write("2. Use Item")
+        self.io.write("3. Try to Flee")
+        self.prompt("combat_action", "Choose your action (1-3): ", self.combat_action, ("1", "2", "3"))
+    
+    @timed("combat_call_seconds", call="combat_action")
+    def combat_action(self, choice: str):
+        """Resolve one round of combat for the chosen action"""
+        enemy_name = self.combat["name"]
+        enemy = self.combat["enemy"]
+        
+        if choice == "1":
+            # Player attacks
+            damage = max(1, self.player.attack_power - enemy['defense'])
+            enemy['health'] -= damage
+            self.io.write(f"You deal {damage} damage to the {enemy_name.replace('_', ' ')}!")
             
-            choice = input("Choose your action (1-3): ").strip()
+            if enemy['health'] <= 0:
+                self.io.write(f"You defeated the {enemy_name.replace('_', ' ')}!")
+                self.player.experience += self.config.COMBAT_XP_REWARD
+                self.game_score += self.config.COMBAT_VICTORY_BONUS
+                self.check_level_up()
+                self.end_combat(True)
+                return
             
-            if choice == "1":
-                # Player attacks
-                damage = max(1, self.player.attack_power - enemy['defense'])
-                enemy['health'] -= damage
-                print(f"You deal {damage} damage to the {enemy_name.replace('_', ' ')}!")
-                
-                if enemy['health'] <= 0:
-                    print(f"You defeated the {enemy_name.replace('_', ' ')}!")
-                    self.player.experience += 25
-                    self.game_score += 50
-                    self.check_level_up()
-                    return True
+            # Enemy attacks back
+            enemy_damage = max(1, enemy['attack'] - self.player.defense)
+            self.player.health -= enemy_damage
+            self.io.write(f"The {enemy_name.replace('_', ' ')} deals {enemy_damage} damage to you!")
+            
+        elif choice == "2":
+            self.use_item_in_combat(self.after_combat_item)
+            return
                 
-                # Enemy attacks back
+        elif choice == "3":
+            if self.rng.random() < self.config.FLEE_SUCCESS_RATE:
+                self.io.write("You successfully flee from combat!")
+                self.end_combat(False)
+                return
+            else:
+                self.io.write("You couldn't escape!")
+                # Enemy gets a free attack
                 enemy_damage = max(1, enemy['attack'] - self.player.defense)
                 self.player.health -= enemy_damage
-                print(f"The {enemy_name.replace('_', ' ')} deals {enemy_damage} damage to you!")
-                
-            elif choice == "2":
-                if self.use_item_in_combat():
-                    continue
-                else:
-                    print("No usable items!")
-                    
-            elif choice == "3":
-                if random.random() < 0.4:  # 40% chance to flee
-                    print("You successfully flee from combat!")
-                    return False
-                else:
-                    print("You couldn't escape!")
-                    # Enemy gets a free attack
-                    enemy_damage = max(1, enemy['attack'] - self.player.defense)
-                    self.player.health -= enemy_damage
-                    print(f"The {enemy_name.replace('_', ' ')} attacks you for {enemy_damage} damage!")
-            
-            if self.player.health <= 0:
-                self.game_state = GameState.GAME_OVER
-                return False
+                self.io.write(f"The {enemy_name.replace('_', ' ')} attacks you for {enemy_damage} damage!")
         
-        return True
+        self.next_combat_round()
     
-    def use_item_in_combat(self) -> bool:
-        """Use an item during combat"""
-        usable_items = [item for item in self.inventory if item.usable]
+    def after_combat_item(self, used: bool):
+        """Continue combat after the player tried to use an item"""
+        if used:
+            self.prompt_combat_action()
+        else:
+            self.io.write("No usable items!")
+            self.next_combat_round()
+    
+    def next_combat_round(self):
+        """End combat if the player has fallen, otherwise ask for the next action"""
+        if self.player.health <= 0:
+            self.game_state = GameState.GAME_OVER
+            self.end_combat(False)
+        else:
+            self.prompt_combat_action()
+    
+    def end_combat(self, won: bool):
+        """Leave combat and report the outcome"""
+        on_end = self.combat["on_end"]
+        self.combat = None
+        METRICS.count("game_combats_total", outcome="won" if won else "lost")
+        on_end(won)
+    
+    def use_item_in_combat(self, on_done: Callable[[bool], None]):
+        """Use an item during combat; ``on_done`` receives True if one was used"""
+        usable_items = self.inventory.usable()
         
         if not usable_items:
-            return False
+            on_done(False)
+            return
         
-        print("\nUsable items:")
-        for i, item in enumerate(usable_items, 1):
-            print(f"{i}. {item.name} - {item.description}")
+        self.io.write("\nUsable items:")
+        for i, key in enumerate(usable_items, 1):
+            item = self.items_db[key]
+            self.io.write(f"{i}. {self.describe_stack(item, self.inventory.count(key))} - {item.description}")
         
+        self.prompt("combat_item", "Choose item to use (0 to cancel): ",
+                    partial(self.choose_combat_item, usable_items, on_done),
+                    [str(i) for i in range(len(usable_items) + 1)])
+    
+    def choose_combat_item(self, usable_items: List[str], on_done: Callable[[bool], None], answer: str):
+        """Handle the answer to the combat item prompt"""
+        on_done(self.apply_combat_item(usable_items, answer))
+    
+    def apply_combat_item(self, usable_items: List[str], answer: str) -> bool:
+        """Apply the combat item picked from the numbered list"""
         try:
-            choice = int(input("Choose item to use (0 to cancel): "))
+            choice = int(answer)
             if choice == 0:
                 return False
             
-            item = usable_items[choice - 1]
+            key = usable_items[choice - 1]
+            item = self.items_db[key]
             
             if item.name == "Health Potion":
                 heal_amount = min(30, self.player.max_health - self.player.health)
                 self.player.health += heal_amount
-                print(f"You heal for {heal_amount} health!")
+                self.io.write(f"You heal for {heal_amount} health!")
                 
                 if item.consumable:
-                    self.inventory.remove(item)
-                    print(f"{item.name} was consumed!")
+                    self.inventory.remove(key)
+                    self.io.write(f"{item.name} was consumed!")
                 
                 return True
                 
         except (ValueError, IndexError):
-            print("Invalid choice!")
+            self.io.write("Invalid choice!")
             return False
         
         return False
     
     def check_level_up(self):
         """Check if player levels up"""
-        exp_needed = self.player.level * 100
+        exp_needed = self.player.level * self.config.BASE_XP_REQUIREMENT
         if self.player.experience >= exp_needed:
             self.player.level += 1
-            self.player.max_health += 20
+            self.player.max_health += self.config.HEALTH_PER_LEVEL
             self.player.health = self.player.max_health  # Full heal on level up
-            self.player.attack_power += 5
-            self.player.defense += 2
-            print(f"\n🎉 LEVEL UP! You are now level {self.player.level}!")
-            print(f"Health increased to {self.player.max_health}!")
-            print(f"Attack power increased to {self.player.attack_power}!")
-    
-    def handle_special_events(self, event_name: str):
-        """Handle special story events"""
+            self.player.attack_power += self.config.ATTACK_PER_LEVEL
+            self.player.defense += self.config.DEFENSE_PER_LEVEL
+            self.io.write(f"\n🎉 LEVEL UP! You are now level {self.player.level}!")
+            self.io.write(f"Health increased to {self.player.max_health}!")
+            self.io.write(f"Attack power increased to {self.player.attack_power}!")
+    
+    def run_special_events(self, events: List[str], on_done: Callable[[], None]):
+        """Handle a location's events in order, then call ``on_done``"""
+        if not events:
+            on_done()
+            return
+        self.handle_special_events(events[0], partial(self.run_special_events, events[1:], on_done))
+    
+    def handle_special_events(self, event_name: str, on_done: Optional[Callable[[], None]] = None):
+        """Handle special story events; ``on_done`` runs once the event is over"""
+        on_done = on_done or (lambda: None)
+        
         if event_name == "tutorial_guide":
-            print("\n🧙 An old wizard appears before you...")
-            print("'Welcome, young adventurer! Let me teach you the basics of survival.'")
-            print("'Type 'help' anytime to see available commands.'")
-            print("'Remember, your choices shape your destiny!'")
+            self.io.write("\n🧙 An old wizard appears before you...")
+            self.io.write("'Welcome, young adventurer! Let me teach you the basics of survival.'")
+            self.io.write("'Type 'help' anytime to see available commands.'")
+            self.io.write("'Remember, your choices shape your destiny!'")
+            on_done()
             
         elif event_name == "merchant_encounter":
-            print("\n🏪 A traveling merchant greets you cheerfully...")
-            print("'Fine day for an adventure! Care to trade?'")
-            self.merchant_trade()
+            self.io.write("\n🏪 A traveling merchant greets you cheerfully...")
+            self.io.write("'Fine day for an adventure! Care to trade?'")
+            self.merchant_trade(on_done)
             
         elif event_name == "bridge_puzzle":
-            print("\n🌉 You find an ancient stone bridge...")
-            self.bridge_puzzle()
+            self.io.write("\n🌉 You find an ancient stone bridge...")
+            self.bridge_puzzle(on_done)
             
         elif event_name == "final_victory":
-            print("\n🏆 You have reached the legendary treasure chamber!")
-            print("Congratulations! You've completed your epic adventure!")
+            self.io.write("\n🏆 You have reached the legendary treasure chamber!")
+            self.io.write("Congratulations! You've completed your epic adventure!")
             self.game_state = GameState.VICTORY
-            self.game_score += 500
+            self.game_score += self.config.FINAL_VICTORY_BONUS
+            on_done()
+        
+        else:
+            on_done()
     
-    def merchant_trade(self):
+    def merchant_trade(self, on_done: Optional[Callable[[], None]] = None):
         """Handle merchant trading"""
-        print("\nMerchant's wares:")
-        print("1. Health Potion (Cost: 2 Gold Coins)")
-        print("2. Leather Armor (Cost: 3 Gold Coins)")
-        print("3. Leave")
-        
-        gold_count = sum(1 for item in self.inventory if item.name == "Gold Coin")
-        print(f"Your gold: {gold_count} coins")
-        
-        choice = input("What would you like to do? (1-3): ").strip()
-        
-        if choice == "1" and gold_count >= 2:
-            # Remove gold coins
-            for _ in range(2):
-                for item in self.inventory:
-                    if item.name == "Gold Coin":
-                        self.inventory.remove(item)
-                        break
-            self.inventory.append(self.items_db["health_potion"])
-            print("You purchased a Health Potion!")
-            
-        elif choice == "2" and gold_count >= 3:
-            # Remove gold coins
-            for _ in range(3):
-                for item in self.inventory:
-                    if item.name == "Gold Coin":
-                        self.inventory.remove(item)
-                        break
-            self.inventory.append(self.items_db["leather_armor"])
-            print("You purchased Leather Armor!")
+        self.io.write("\nMerchant's wares:")
+        prices = self.config.MERCHANT_PRICES
+        self.io.write(f"1. Health Potion (Cost: {prices['health_potion']} Gold Coins)")
+        self.io.write(f"2. Leather Armor (Cost: {prices['leather_armor']} Gold Coins)")
+        self.io.write("3. Leave")
+        
+        self.io.write(f"Your gold: {self.inventory.gold} coins")
+        
+        self.prompt("merchant", "What would you like to do? (1-3): ",
+                    partial(self.merchant_choice, on_done=on_done), ("1", "2", "3"))
+    
+    def merchant_choice(self, choice: str, on_done: Optional[Callable[[], None]] = None):
+        """Handle the answer to the merchant's offer"""
+        prices = self.config.MERCHANT_PRICES
+        
+        if choice == "1" and self.inventory.spend(prices["health_potion"]):
+            self.inventory.add("health_potion")
+            self.io.write("You purchased a Health Potion!")
+            
+        elif choice == "2" and self.inventory.spend(prices["leather_armor"]):
+            self.inventory.add("leather_armor")
+            self.io.write("You purchased Leather Armor!")
             
         elif choice in ["1", "2"]:
-            print("You don't have enough gold!")
+            self.io.write("You don't have enough gold!")
         else:
-            print("You decide not to trade.")
+            self.io.write("You decide not to trade.")
+        
+        if on_done:
+            on_done()
     
-    def bridge_puzzle(self):
+    def bridge_puzzle(self, on_done: Optional[Callable[[], None]] = None):
         """Handle bridge puzzle"""
-        print("The bridge has an ancient riddle carved into it:")
-        print("'I have keys but no locks. I have space but no room.")
-        print("You can enter, but not go inside. What am I?'")
+        self.io.write("The bridge has an ancient riddle carved into it:")
+        self.io.write("'I have keys but no locks. I have space but no room.")
+        self.io.write("You can enter, but not go inside. What am I?'")
         
-        answer = input("Your answer: ").strip().lower()
+        self.prompt("riddle", "Your answer: ", partial(self.answer_riddle, on_done=on_done))
+    
+    def answer_riddle(self, answer: str, on_done: Optional[Callable[[], None]] = None):
+        """Handle the answer to the bridge riddle"""
+        answer = answer.strip().lower()
         
         if answer in ["keyboard", "a keyboard"]:
-            print("✅ Correct! The bridge glows and becomes safe to cross!")
-            print("You found a hidden treasure underneath!")
-            self.inventory.append(self.items_db["magic_crystal"])
-            self.game_score += 100
+            self.io.write("✅ Correct! The bridge glows and becomes safe to cross!")
+            self.io.write("You found a hidden treasure underneath!")
+            self.inventory.add("magic_crystal")
+            self.game_score += self.config.PUZZLE_SOLUTION_BONUS
         else:
-            print("❌ The bridge creaks ominously. You carefully cross anyway.")
-            print("You take 10 damage from falling stones!")
+            self.io.write("❌ The bridge creaks ominously. You carefully cross anyway.")
+            self.io.write("You take 10 damage from falling stones!")
             self.player.health = max(1, self.player.health - 10)
+        
+        if on_done:
+            on_done()
     
+    @timed("game_call_seconds", call="process_command")
     def process_command(self, command: str):
         """Process player commands"""
-        command = command.lower().strip()
-        
-        if command == "help":
-            self.show_help()
-        elif command == "status":
-            self.display_status()
-        elif command == "inventory":
-            self.show_inventory()
-        elif command.startswith("go "):
-            destination = command[3:]
-            self.move_to_location(destination)
-        elif command.startswith("take "):
-            item_name = command[5:]
-            self.take_item(item_name)
-        elif command.startswith("use "):
-            item_name = command[4:]
-            self.use_item(item_name)
-        elif command == "look":
-            self.display_location()
-        elif command == "save":
-            self.save_game()
-        elif command == "quit":
-            self.quit_game()
+        try:
+            action, argument = self.commands.parse(command)
+        except AmbiguousCommand as e:
+            self.io.write(f"Ambiguous command: {e}.")
+            return
+        
+        if action is None:
+            self.io.write("Unknown command. Type 'help' for available commands.")
+            return
+        
+        handler = getattr(self, action.handler) if isinstance(action.handler, str) else partial(action.handler, self)
+        if action.argument is None:
+            handler()
+        elif argument:
+            handler(argument)
         else:
-            print("Unknown command. Type 'help' for available commands.")
+            self.io.write(f"Usage: {action.usage}")
     
+    @timed("render_call_seconds", call="show_help")
     def show_help(self):
         """Display help information"""
-        print("\n📖 === HELP ===")
-        print("Available commands:")
-        print("  help        - Show this help")
-        print("  status      - Show character status")
-        print("  inventory   - Show your items")
-        print("  look        - Look around current location")
-        print("  go [place]  - Move to a location")
-        print("  take [item] - Pick up an item")
-        print("  use [item]  - Use an item from inventory")
-        print("  save        - Save your progress")
-        print("  quit        - Exit the game")
+        if not self.io.renders:
+            return
+        
+        self.io.write("\n📖 === HELP ===")
+        self.io.write("Available commands:")
+        for line in self.commands.help_lines():
+            self.io.write(line)
     
+    def show_stats(self):
+        """Admin command: print the recorded metrics"""
+        if not METRICS.enabled:
+            self.io.write("Metrics are disabled (set GameConfig.METRICS_ENABLED).")
+            return
+        self.io.write("\n📈 Metrics:")
+        for line in METRICS.report() or ["(nothing recorded yet)"]:
+            self.io.write(f"  {line}")
+    
+    @timed("render_call_seconds", call="show_inventory")
     def show_inventory(self):
         """Display player inventory"""
+        if not self.io.renders:
+            return
+        
         if not self.inventory:
-            print("\n🎒 Your inventory is empty.")
+            self.io.write("\n🎒 Your inventory is empty.")
         else:
-            print(f"\n🎒 Inventory ({len(self.inventory)} items):")
-            for item in self.inventory:
-                print(f"  • {item.name} - {item.description}")
+            self.io.write(f"\n🎒 Inventory ({len(self.inventory)} items):")
+            for _, item, count in self.inventory:
+                self.io.write(f"  • {self.describe_stack(item, count)} - {item.description}")
+            if self.inventory.gold:
+                self.io.write(f"  • Gold: {self.inventory.gold} coins")
+    
+    @staticmethod
+    def describe_stack(item: Item, count: int) -> str:
+        """Item name with its count when more than one is held"""
+        return f"{item.name} x{count}" if count > 1 else item.name
+    
+    def items_at(self, location_key: str) -> Sequence[str]:
+        """Item keys currently lying at a location"""
+        return self.world_state.items_at(location_key)
     
     def take_item(self, item_name: str):
         """Take an item from current location"""
-        location = self.locations[self.current_location]
-        
-        # Find matching item (partial name matching)
-        matching_items = [item for item in location['items'] 
-                         if item_name.lower() in item.lower()]
+        # Find matching item (prefix of any word in its name)
+        item_key = self.world_graph.resolve_item(self.items_at(self.current_location), item_name)
         
-        if not matching_items:
-            print(f"There's no '{item_name}' here.")
+        if not item_key:
+            self.io.write(f"There's no '{item_name}' here.")
             return
         
-        item_key = matching_items[0]
         if item_key in self.items_db:
             item = self.items_db[item_key]
-            self.inventory.append(item)
-            location['items'].remove(item_key)
-            print(f"You picked up: {item.name}")
+            self.inventory.add(item_key)
+            self.world_state.remove_item(self.current_location, item_key)
+            self.io.write(f"You picked up: {item.name}")
             self.game_score += item.value
-            logging.info(f"Player took item: {item.name}")
+            log.info("Player took item: %s", item.name, extra={"event": "take", "item": item.name})
         else:
-            print("You can't take that.")
+            self.io.write("You can't take that.")
     
     def use_item(self, item_name: str):
         """Use an item from inventory"""
-        matching_items = [item for item in self.inventory 
-                         if item_name.lower() in item.name.lower()]
+        # Find matching held item (prefix of any word in its name)
+        key = self.world_graph.resolve_item(self.inventory.keys(), item_name)
         
-        if not matching_items:
-            print(f"You don't have '{item_name}'.")
+        if not key:
+            self.io.write(f"You don't have '{item_name}'.")
             return
         
-        item = matching_items[0]
+        item = self.items_db[key]
         
         if not item.usable:
-            print(f"You can't use {item.name}.")
+            self.io.write(f"You can't use {item.name}.")
             return
         
         if item.name == "Health Potion":
             heal_amount = min(30, self.player.max_health - self.player.health)
             self.player.health += heal_amount
-            print(f"You heal for {heal_amount} health!")
+            self.io.write(f"You heal for {heal_amount} health!")
             
             if item.consumable:
-                self.inventory.remove(item)
-                print(f"{item.name} was consumed!")
+                self.inventory.remove(key)
+                self.io.write(f"{item.name} was consumed!")
         
         elif item.name == "Leather Armor":
             self.player.defense += 3
-            print("You equip the leather armor! Defense increased by 3!")
-            self.inventory.remove(item)
+            self.io.write("You equip the leather armor! Defense increased by 3!")
+            self.inventory.remove(key)
         
         elif item.name == "Rusty Sword":
             self.player.attack_power += 10
-            print("You equip the rusty sword! Attack power increased by 10!")
-            self.inventory.remove(item)
+            self.io.write("You equip the rusty sword! Attack power increased by 10!")
+            self.inventory.remove(key)
     
+    @timed("game_call_seconds", call="move_to_location")
     def move_to_location(self, destination: str):
         """Move to a new location"""
         current_loc = self.locations[self.current_location]
         
-        # Find matching exit (partial name matching)
-        matching_exits = [exit_name for exit_name in current_loc['exits'] 
-                         if destination.lower() in exit_name.lower()]
+        # Find matching exit (prefix of any word in its name)
+        new_location = self.world_graph.resolve_exit(self.current_location, destination)
         
-        if not matching_exits:
-            print(f"You can't go to '{destination}' from here.")
-            print(f"Available paths: {', '.join(current_loc['exits'])}")
+        if not new_location:
+            self.io.write(f"You can't go to '{destination}' from here.")
+            self.io.write(f"Available paths: {', '.join(current_loc.exits)}")
             return
         
-        new_location = matching_exits[0]
-        self.current_location = new_location
+        previous_location, self.current_location = self.current_location, new_location
         
-        # Log the decision
-        self.db.log_decision(self.session_id, f"move_from_{current_loc}", new_location)
+        # Log the decision; the writer interns both locations as ids
+        self.decisions.log_decision(self.session_id, "move", new_location, previous_location, new_location)
         self.decision_count += 1
+        # Record the inputs so far with the decision, so a crash loses no more input than decisions
+        self.flush_inputs()
         
-        print(f"\n🚶 You travel to {self.locations[new_location]['name']}...")
-        
-        # Handle location events
-        location = self.locations[new_location]
+        self.io.write(f"\n🚶 You travel to {self.locations[new_location].name}...")
         
         # Handle enemies
-        if location['enemies'] and random.random() < 0.6:
-            enemy = random.choice(location['enemies'])
-            if not self.handle_combat(enemy):
-                return  # Combat failed
+        enemies = self.world_state.enemies_at(new_location)
+        if enemies and self.rng.random() < self.config.ENEMY_ENCOUNTER_RATE:
+            enemy = self.rng.choice(enemies)
+            self.start_combat(enemy, partial(self.after_arrival_combat, new_location, enemy))
+        else:
+            self.arrive_at_location(new_location)
         
-        # Handle special events
-        if location['special_events']:
-            for event in location['special_events']:
-                self.handle_special_events(event)
+        self.autosave()
+    
+    def after_arrival_combat(self, location_key: str, enemy: str, won: bool):
+        """Continue arriving at a location once its combat is over"""
+        if won:
+            self.world_state.defeat_enemy(location_key, enemy)
+            self.arrive_at_location(location_key)
+    
+    def arrive_at_location(self, location_key: str):
+        """Run a location's special events, then describe it"""
+        location = self.locations[location_key]
+        events = []
+        for event in location.special_events:
+            if event in self.REPEATABLE_EVENTS or not self.world_state.has_triggered(location_key, event):
+                self.world_state.trigger_event(location_key, event)
+                events.append(event)
+        self.run_special_events(events, self.display_location)
+        
+        log.info("Player moved to: %s", location_key, extra={"event": "move", "location": location_key})
+    
+    def show_hint(self):
+        """Point the player one step toward the treasure chamber"""
+        path = self.world_graph.shortest_path(self.current_location, "treasure_chamber")
+        if not path:
+            self.io.write("🧭 No path leads to the treasure from here.")
+        elif len(path) == 1:
+            self.io.write("🧭 The treasure is right here!")
+        else:
+            self.io.write(f"🧭 The treasure lies {len(path) - 1} steps away. Try heading to {path[1]}.")
+    
+    def travel_to(self, destination: str):
+        """Walk the shortest route to a location, stopping at any encounter"""
+        target = self.world_graph.resolve_location(destination)
+        if not target:
+            self.io.write(f"You've never heard of '{destination}'.")
+            return
         
-        # Display new location
-        self.display_location()
+        path = self.world_graph.shortest_path(self.current_location, target)
+        if not path:
+            self.io.write(f"There's no way to reach {target} from here.")
+            return
         
-        logging.info(f"Player moved to: {new_location}")
+        for step in path[1:]:
+            self.move_to_location(step)
+            if self.pending_prompt or self.game_state != GameState.PLAYING or self.current_location != step:
+                break
+    
+    def core_state(self) -> Dict:
+        """Save sections for the player; the world overlay tracks its own changes"""
+        return {
+            "player": {name: getattr(self.player, name) for name in Character.__dataclass_fields__},
+            "location": self.current_location,
+            "score": self.game_score,
+            "decisions": self.decision_count,
+            "inventory": dict(self.inventory.counts),
+            "gold": self.inventory.gold,
+        }
     
+    def snapshot(self) -> Dict:
+        """Current game state as JSON-friendly save sections"""
+        state = self.core_state()
+        state.update(self.world_state.snapshot())
+        return state
+    
+    def restore(self, state: Dict):
+        """Replace the game state with a saved one"""
+        self.player = Character(**state["player"])
+        self.current_location = state["location"]
+        self.game_score = state["score"]
+        self.decision_count = state["decisions"]
+        self.inventory.restore(state["inventory"], state["gold"])
+        self.world_state.restore(state)
+        self.saved_core = self.core_state()
+    
+    @timed("game_call_seconds", call="save_game")
     def save_game(self):
         """Save current game state"""
-        save_data = {
-            "player": {
-                "name": self.player.name,
-                "health": self.player.health,
-                "max_health": self.player.max_health,
-                "attack_power": self.player.attack_power,
-                "defense": self.player.defense,
-                "experience": self.player.experience,
-                "level": self.player.level
-            },
-            "game_state": {
-                "current_location": self.current_location,
-                "inventory": [item.name for item in self.inventory],
-                "game_score": self.game_score,
-                "decision_count": self.decision_count
-            }
-        }
+        self.saves.save(self.player.name, self.snapshot())
         
-        with open(f"save_{self.player.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", 'w') as f:
-            json.dump(save_data, f, indent=2)
+        self.io.write("Game saved successfully!")
+        log.info("Game saved", extra={"event": "save"})
+    
+    @timed("game_call_seconds", call="autosave")
+    def autosave(self):
+        """Journal whatever changed since the last save"""
+        if not self.config.AUTOSAVE or self.player is None:
+            return
+        core = self.core_state()
+        delta = state_delta(self.saved_core, core)
+        delta.update(self.world_state.take_changes())
+        if delta:
+            self.saves.autosave(self.player.name, delta, self.snapshot)
+            self.saved_core = core
+    
+    def load_game(self, autosaved: bool = False):
+        """Restore the player's last save, or with autosaved where they left off"""
+        state = self.saves.resume(self.player.name) if autosaved else self.saves.load(self.player.name)
+        if state is None:
+            self.io.write(f"No saved game found for {self.player.name}.")
+            return
         
-        print("Game saved successfully!")
-        logging.info("Game saved")
+        self.restore(state)
+        # Autosaves continue from the loaded state
+        self.saves.checkpoint(self.player.name, state)
+        if autosaved:
+            # Replay starts from a fresh game, so a resumed session cannot be replayed
+            self.seed = None
+            self.decisions.submit(partial(self.db.forget_seed, self.session_id))
+        self.io.write("Game loaded successfully!")
+        log.info("Game loaded", extra={"event": "load"})
+        self.display_location()
     
     def quit_game(self):
         """Quit the game"""
-        print("\nThank you for playing! Your adventure ends here...")
-        
-        # End database session
-        if self.session_id:
+        self.io.write("\nThank you for playing! Your adventure ends here...")
+        self.game_state = GameState.GAME_OVER
+        self.close_session()
+    
+    def close_session(self):
+        """End the database session once every queued decision is written"""
+        self.flush_inputs()
+        self.decisions.flush()
+        if self.session_id and not self.session_ended:
             self.db.end_session(
                 self.session_id, 
                 self.game_score, 
                 self.game_state, 
                 len(self.inventory)
             )
-        
-        self.game_state = GameState.GAME_OVER
+            self.session_ended = True
     
     def run_game(self):
         """Main game loop"""
         self.display_welcome()
         self.initialize_player()
-        
-        print(f"\n{self.player.name}, your adventure begins...")
-        self.display_location()
+        self.resolve_prompts()
         
         while self.game_state == GameState.PLAYING:
             try:
-                if self.player.health <= 0:
-                    print("\n💀 You have died! Game Over!")
-                    self.game_state = GameState.GAME_OVER
-                    break
-                
-                print(f"\n🎮 What would you like to do?")
-                command = input(">>> ").strip()
+                self.process_input(self.io.read(self.next_prompt()))
                 
-                if not command:
-                    continue
-                
-                self.process_command(command)
-                
-                # Check victory condition
-                if self.current_location == "treasure_chamber" and self.game_state == GameState.PLAYING:
-                    self.handle_special_events("final_victory")
-                
-            except KeyboardInterrupt:
-                print("\n\nGame interrupted by user.")
+            except (KeyboardInterrupt, EOFError):
+                self.io.write("\n\nGame interrupted by user.")
                 self.quit_game()
                 break
             except Exception as e:
-                print(f"An error occurred: {e}")
-                logging.error(f"Game error: {e}")
+                self.io.write(f"An error occurred: {e}")
+                log.exception("Game error: %s", e)
         
         # Game end
+        self.close_session()
         self.display_final_score()
     
+    @timed("render_call_seconds", call="display_final_score")
     def display_final_score(self):
         """Display final game statistics"""
-        print("\n" + "="*50)
-        print("           🏁 ADVENTURE COMPLETE!")
-        print("="*50)
-        print(f"Player: {self.player.name}")
-        print(f"Final Score: {self.game_score}")
-        print(f"Level Reached: {self.player.level}")
-        print(f"Items Collected: {len(self.inventory)}")
-        print(f"Decisions Made: {self.decision_count}")
+        if not self.io.renders:
+            return
+        
+        self.io.write("\n" + "="*50)
+        self.io.write("           🏁 ADVENTURE COMPLETE!")
+        self.io.write("="*50)
+        self.io.write(f"Player: {self.player.name}")
+        self.io.write(f"Final Score: {self.game_score}")
+        self.io.write(f"Level Reached: {self.player.level}")
+        self.io.write(f"Items Collected: {len(self.inventory)}")
+        self.io.write(f"Decisions Made: {self.decision_count}")
         
         if self.game_state == GameState.VICTORY:
-            print("\n🎉 VICTORY! You successfully completed your quest!")
+            self.io.write("\n🎉 VICTORY! You successfully completed your quest!")
         else:
-            print("\n💀 Better luck next time, adventurer!")
+            self.io.write("\n💀 Better luck next time, adventurer!")
         
-        print("="*50)
+        self.io.write("="*50)
+
+# Built-in verbs, in help order; handlers name AdvancedAdventureGame methods
+COMMANDS.register("help", "show_help", "Show this help", aliases=("?",))
+COMMANDS.register("status", "display_status", "Show character status")
+COMMANDS.register("inventory", "show_inventory", "Show your items", aliases=("i", "inv"))
+COMMANDS.register("look", "display_location", "Look around current location", aliases=("l",))
+COMMANDS.register("go", "move_to_location", "Move to a location", "place", aliases=("move", "walk"))
+COMMANDS.register("take", "take_item", "Pick up an item", "item", aliases=("get", "grab"))
+COMMANDS.register("use", "use_item", "Use an item from inventory", "item")
+COMMANDS.register("travel", "travel_to", "Walk the shortest route to any known place", "place")
+COMMANDS.register("hint", "show_hint", "Which way to the treasure?")
+COMMANDS.register("save", "save_game", "Save your progress")
+COMMANDS.register("load", "load_game", "Restore your last save")
+COMMANDS.register("stats", "show_stats", "Show performance metrics")
+COMMANDS.register("quit", "quit_game", "Exit the game", aliases=("exit", "q"))
 
 def main():
     """Main function to start the game"""
+    configure_logging()
+    if GameConfig.METRICS_ENABLED:
+        enable_metrics()
     try:
         game = AdvancedAdventureGame()
         game.run_game()
     except Exception as e:
         print(f"Critical error: {e}")
-        logging.critical(f"Critical game error: {e}")
+        log.critical("Critical game error: %s", e, exc_info=True)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
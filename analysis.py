@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Route and funnel analysis over the decision log
+One streaming pass over the move decisions, in session order, builds:
+
+- sparse location-to-location transition counts
+- the most common paths from the start to the treasure chamber
+- drop-off points: where sessions that never reached the treasure stopped
+- the distribution of time between consecutive moves
+
+Only one session's path is held in memory at a time, and transitions are
+counted only for pairs that actually occur, so memory follows the number of
+distinct moves rather than the square of the number of locations. Each
+chunk is reduced with NumPy when it is installed, and with plain counters
+otherwise.
+"""
+
+import argparse
+import sqlite3
+from array import array
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from adventure_quest import connect_readonly
+from config import GameConfig
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+GOAL = "treasure_chamber"
+
+
+class RouteAnalysis:
+    """Accumulates route statistics from (session, from, to, timestamp) move rows"""
+
+    def __init__(self, location_keys: Dict[int, str], goal: str = GOAL):
+        self.keys = location_keys
+        self.goal_id = next((i for i, key in location_keys.items() if key == goal), None)
+        self.transitions: Counter = Counter()  # (from id, to id) -> moves
+        self.gaps = array("d")
+        self.paths = Counter()
+        self.drop_offs = Counter()
+        self.sessions = 0
+        self.moves = 0
+
+        self._session = None
+        self._path: List[int] = []
+        self._reached = False
+        self._last_time: Optional[float] = None
+
+    def add_chunk(self, rows: List[Tuple[int, int, int, str]]):
+        """Fold a chunk of move rows, ordered by session then time, into the totals"""
+        froms, tos = [], []
+        for session_id, from_id, to_id, timestamp in rows:
+            moment = datetime.fromisoformat(timestamp).timestamp()
+            if session_id != self._session:
+                self._end_session()
+                self._session = session_id
+                self._path = [from_id]
+            elif self._last_time is not None:
+                self.gaps.append(moment - self._last_time)
+            self._last_time = moment
+
+            froms.append(from_id)
+            tos.append(to_id)
+            if not self._reached:
+                self._path.append(to_id)
+                if to_id == self.goal_id:
+                    self.paths[tuple(self._path)] += 1
+                    self._reached = True
+
+        self.moves += len(rows)
+        if np is not None:
+            # Pack each pair into one int64 and count the distinct pairs of the chunk
+            cells, counts = np.unique((np.asarray(froms, dtype=np.int64) << 32) | np.asarray(tos, dtype=np.int64),
+                                      return_counts=True)
+            for cell, count in zip(cells.tolist(), counts.tolist()):
+                self.transitions[cell >> 32, cell & 0xFFFFFFFF] += count
+        else:
+            self.transitions.update(zip(froms, tos))
+
+    def finish(self):
+        """Close the last session; call once after the final chunk"""
+        self._end_session()
+        self._session = None
+
+    def _end_session(self):
+        if self._session is None:
+            return
+        self.sessions += 1
+        if not self._reached:
+            self.drop_offs[self._path[-1]] += 1
+        self._path = []
+        self._reached = False
+        self._last_time = None
+
+    def transition_counts(self) -> Dict[Tuple[str, str], int]:
+        """(from key, to key) -> moves, for every observed transition"""
+        return {(self.keys[a], self.keys[b]): n for (a, b), n in self.transitions.items()}
+
+    def top_paths(self, n: int = 5) -> List[Tuple[List[str], int]]:
+        """Most common routes that reached the goal"""
+        return [([self.keys[i] for i in path], count) for path, count in self.paths.most_common(n)]
+
+    def top_drop_offs(self, n: int = 5) -> List[Tuple[str, int]]:
+        """Locations where most sessions stopped without reaching the goal"""
+        return [(self.keys[i], count) for i, count in self.drop_offs.most_common(n)]
+
+    def gap_percentiles(self, percents=(50, 90, 99)) -> Dict[int, float]:
+        """Seconds between consecutive moves at the given percentiles"""
+        if not self.gaps:
+            return {}
+        if np is not None:
+            values = np.percentile(np.frombuffer(self.gaps, dtype=np.float64), percents)
+            return {pct: float(value) for pct, value in zip(percents, values)}
+        ordered = sorted(self.gaps)
+        return {pct: ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))] for pct in percents}
+
+
+def analyze(conn: sqlite3.Connection, chunk_rows: int = GameConfig.EXPORT_CHUNK_ROWS) -> RouteAnalysis:
+    """Stream every recorded move through a RouteAnalysis"""
+    keys = dict(conn.execute("SELECT id, key FROM locations"))
+    analysis = RouteAnalysis(keys)
+    cursor = conn.execute('''
+        SELECT session_id, from_location, to_location, timestamp FROM player_decisions
+        WHERE from_location IS NOT NULL
+        ORDER BY session_id, id
+    ''')
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        analysis.add_chunk(rows)
+    analysis.finish()
+    return analysis
+
+
+def main():
+    """Print a route and funnel report"""
+    parser = argparse.ArgumentParser(description="Route and funnel analysis of recorded moves")
+    parser.add_argument("--db", default=GameConfig.DATABASE_NAME, help="SQLite database file")
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = connect_readonly(args.db)
+    analysis = analyze(conn)
+    conn.close()
+
+    print(f"🧭 {analysis.moves:,} moves in {analysis.sessions:,} sessions")
+    print("\nBusiest transitions:")
+    transitions = sorted(analysis.transition_counts().items(), key=lambda kv: -kv[1])[:args.top]
+    for (source, target), count in transitions:
+        print(f"  {source} → {target}: {count:,}")
+    print(f"\nCommon paths to {GOAL}:")
+    for path, count in analysis.top_paths(args.top):
+        print(f"  {count:,}× {' → '.join(path)}")
+    print("\nDrop-off points:")
+    for key, count in analysis.top_drop_offs(args.top):
+        print(f"  {key}: {count:,} sessions")
+    print("\nTime between moves:")
+    for pct, seconds in analysis.gap_percentiles().items():
+        print(f"  p{pct}: {seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
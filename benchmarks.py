@@ -0,0 +1,926 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the adventure game
+Run this file to measure the throughput of core game operations, or run
+it with --suite to check the hot paths against a stored baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional
+
+from contextlib import redirect_stdout
+
+from adventure_quest import (AdvancedAdventureGame, Character, DecisionLogger, GameDatabase, GameState, Inventory,
+                             connect_readonly)
+from commands import COMMANDS
+from config import GameConfig
+from game_io import BufferIO, ConsoleIO, NullIO
+from game_server import GameServer, percentile
+from saves import DatabaseSaveStore, FileSaveStore, NullSaveStore, encode_snapshot, state_delta
+import vector_combat
+from world import compile_world, load_world
+import worldgen
+
+
+@dataclass
+class LegacyItem:
+    """Item template as a plain dataclass, as before slotted templates"""
+    name: str
+    description: str
+    value: int
+    usable: bool = False
+    consumable: bool = False
+
+
+@dataclass
+class LegacyCharacter:
+    """Character as a plain dataclass with a per-instance __dict__"""
+    name: str
+    health: int
+    max_health: int
+    attack_power: int
+    defense: int
+    experience: int = 0
+    level: int = 1
+
+
+def legacy_log_decision(db_name: str, session_id: int, decision_point: str, choice: str):
+    """Connect-per-call decision logging, as GameDatabase did before batching"""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+
+    cursor.execute('''
+        INSERT INTO player_decisions (session_id, decision_point, choice_made, timestamp)
+        VALUES (?, ?, ?, ?)
+    ''', (session_id, decision_point, choice, datetime.now().isoformat()))
+
+    cursor.execute('''
+        UPDATE game_sessions
+        SET total_decisions = total_decisions + 1
+        WHERE id = ?
+    ''', (session_id,))
+
+    conn.commit()
+    conn.close()
+
+
+def bench_db_moves(moves: int = 2000) -> dict:
+    """Compare logged moves per second: connect-per-move vs batched writes"""
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = os.path.join(tmp, "legacy.db")
+        db = GameDatabase(legacy_db)
+        session_id = db.start_new_session("Bench")
+        db.close()
+
+        # The original code never enabled WAL, so measure it with a rollback journal
+        conn = sqlite3.connect(legacy_db)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+
+        start = time.perf_counter()
+        for i in range(moves):
+            legacy_log_decision(legacy_db, session_id, "move_from_bench", f"loc_{i % 6}")
+        results["connect_per_move"] = moves / (time.perf_counter() - start)
+
+        db = GameDatabase(os.path.join(tmp, "batched.db"))
+        session_id = db.start_new_session("Bench")
+
+        start = time.perf_counter()
+        for i in range(moves):
+            db.log_decision(session_id, "move_from_bench", f"loc_{i % 6}")
+        db.end_session(session_id, 0, GameState.GAME_OVER, 0)
+        results["batched"] = moves / (time.perf_counter() - start)
+        db.close()
+
+    return results
+
+
+def bench_rendering(commands: int = 20000) -> dict:
+    """Commands per second through the console, an in-memory buffer and the null sink"""
+    script = ["look", "status", "inventory", "help"]
+    results = {}
+    db = GameDatabase(":memory:")
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for name, io in (("console", ConsoleIO()), ("buffer", BufferIO()), ("null", NullIO())):
+            game = AdvancedAdventureGame(db=db, io=io)
+            game.create_player("Bench")
+
+            start = time.perf_counter()
+            for i in range(commands):
+                game.process_input(script[i % len(script)])
+                if isinstance(io, BufferIO):
+                    io.output.clear()
+            results[name] = commands / (time.perf_counter() - start)
+            game.decisions.close()
+
+    db.close()
+    return results
+
+
+def bench_worldgen(size: int = 100000) -> dict:
+    """Generation rate and file size of a generated world"""
+    with tempfile.TemporaryDirectory() as directory:
+        stats = worldgen.generate_world(worldgen.WorldSpec(size), os.path.join(directory, "world.json"))
+    return {"locations_per_sec": size / stats["seconds"], "file_mib": stats["bytes"] / 2**20}
+
+
+def bench_world_graph(size: int = 100000, lookups: int = 100000) -> dict:
+    """Build time and lookup rates on the standard generated world of a size"""
+    with open(worldgen.fixture(size), "rb") as f:
+        data = json.load(f)
+    start = time.perf_counter()
+    graph = compile_world(data).graph
+    results = {"build_sec": time.perf_counter() - start}
+    del data
+    keys, target = graph.keys, "treasure_chamber"
+
+    start = time.perf_counter()
+    for i in range(lookups):
+        key = keys[i % size]
+        graph.resolve_exit(key, key[:3])
+    results["exit_lookups_per_sec"] = lookups / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    path = graph.shortest_path(keys[graph.start], target)
+    results["first_route_sec"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for i in range(lookups):
+        graph.next_step(keys[i % size], target)
+    results["cached_hints_per_sec"] = lookups / (time.perf_counter() - start)
+    results["route_length"] = len(path)
+    return results
+
+
+def bench_world_store(sizes=(10000, 100000), moves: int = 20000) -> dict:
+    """Open time, memory and walking rate of region stores vs whole in-memory worlds, by world size"""
+    import random
+    import tracemalloc
+    import world_store
+
+    results = {}
+    for size in sizes:
+        source = Path(worldgen.fixture(size))
+        store_path = source.with_suffix(world_store.STORE_SUFFIX)
+        if not store_path.exists():
+            world_store.build_store(str(source), str(store_path))
+
+        # Timed first, then again under tracemalloc for memory
+        for traced in (False, True):
+            if traced:
+                tracemalloc.start()
+            start = time.perf_counter()
+            world = world_store.open_store(str(store_path))
+            opened = time.perf_counter()
+            rng, location = random.Random(size), world.start
+            for _ in range(moves):
+                location = rng.choice(world.locations[location].exits)
+            if traced:
+                results[f"{size}_store_resident_mib"] = tracemalloc.get_traced_memory()[0] / 2**20
+                tracemalloc.stop()
+            else:
+                results[f"{size}_store_open_ms"] = 1000 * (opened - start)
+                results[f"{size}_store_moves_per_sec"] = moves / (time.perf_counter() - opened)
+            world.store.close()
+
+        start = time.perf_counter()
+        compile_world(json.loads(source.read_bytes()))
+        results[f"{size}_in_memory_load_ms"] = 1000 * (time.perf_counter() - start)
+        tracemalloc.start()
+        in_memory = compile_world(json.loads(source.read_bytes()))
+        results[f"{size}_in_memory_mib"] = tracemalloc.get_traced_memory()[0] / 2**20
+        tracemalloc.stop()
+        del in_memory
+    return results
+
+
+def _pack_bench_worker(path: str, moves: int) -> dict:
+    """One worker process: load the world, walk it, report start-up time and resident memory"""
+    import random
+
+    start = time.perf_counter()
+    world = load_world(path)
+    load_ms = 1000 * (time.perf_counter() - start)
+    rng, location = random.Random(os.getpid()), world.start
+    for _ in range(moves):
+        location = rng.choice(world.locations[location].exits)
+    with open("/proc/self/status") as f:
+        status = dict(line.split(":", 1) for line in f)
+    return {"load_ms": load_ms, "private_mib": int(status["RssAnon"].split()[0]) / 1024,
+            "shared_mib": int(status["RssFile"].split()[0]) / 1024}
+
+
+def bench_world_pack(size: int = 100000, workers: int = 4, moves: int = 20000) -> dict:
+    """Per-worker start-up and aggregate memory of worker processes: pickled world snapshot vs mapped pack"""
+    import multiprocessing
+    import world_pack
+
+    source = Path(worldgen.fixture(size))
+    pack = source.with_suffix(world_pack.PACK_SUFFIX)
+    if not pack.exists():
+        world_pack.build_pack(str(source), str(pack))
+    load_world(str(source))   # write the snapshot cache before the workers start
+
+    results = {}
+    context = multiprocessing.get_context("spawn")  # no memory inherited from this process
+    for name, path in (("snapshot", source), ("pack", pack)):
+        with context.Pool(workers) as pool:
+            reports = pool.starmap(_pack_bench_worker, [(str(path), moves)] * workers)
+        results[f"{name}_load_ms"] = sum(report["load_ms"] for report in reports) / workers
+        results[f"{name}_private_mib_total"] = sum(report["private_mib"] for report in reports)
+        results[f"{name}_shared_mib_each"] = max(report["shared_mib"] for report in reports)
+    return results
+
+
+def bench_world_load(sessions: int = 10000) -> dict:
+    """World load time (parse vs cached snapshot) and session creation rate"""
+    import world
+
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for name in ("parse_ms", "snapshot_ms"):
+            world._loaded_worlds.clear()
+            start = time.perf_counter()
+            world.load_world(cache_dir=cache_dir)
+            results[name] = 1000 * (time.perf_counter() - start)
+
+    db = GameDatabase(":memory:")
+    decisions = DecisionLogger(db)
+    start = time.perf_counter()
+    for _ in range(sessions):
+        AdvancedAdventureGame(db=db, decisions=decisions, io=NullIO())
+    results["sessions_per_sec"] = sessions / (time.perf_counter() - start)
+    decisions.close()
+    db.close()
+    return results
+
+
+def bench_session_memory(sessions: int = 10000) -> dict:
+    """KiB per 10k sessions: a private mutable world copy vs the shared world plus overlay"""
+    import tracemalloc
+
+    world = load_world()
+    db = GameDatabase(":memory:")
+    decisions = DecisionLogger(db)
+
+    def private_copy():
+        # The world as mutable per-session dicts, as the game kept it before the overlay
+        return {key: {field: list(value) if isinstance(value, tuple) else value
+                      for field, value in location._asdict().items()}
+                for key, location in world.locations.items()}
+
+    def overlay():
+        return AdvancedAdventureGame(db=db, decisions=decisions, io=NullIO()).world_state
+
+    results = {}
+    for name, make in (("private_copy_kib", private_copy), ("overlay_kib", overlay)):
+        tracemalloc.start()
+        kept = [make() for _ in range(sessions)]
+        results[name] = tracemalloc.get_traced_memory()[0] / 1024 * 10000 / sessions
+        tracemalloc.stop()
+        del kept
+
+    decisions.close()
+    db.close()
+    return results
+
+
+def bench_character_memory(characters: int = 100000) -> dict:
+    """MiB for live characters and inventories: item lists vs counted multisets"""
+    import tracemalloc
+
+    items = load_world().items
+    legacy_items = {key: LegacyItem(item.name, item.description, item.value, item.usable, item.consumable)
+                    for key, item in items.items()}
+    profiles = {
+        "small": ["gold_coin"] * 5 + ["health_potion"] * 2 + ["rusty_sword", "magic_crystal"],
+        "hoard": ["gold_coin"] * 60 + ["health_potion"] * 10 + ["rusty_sword", "magic_crystal"],
+    }
+
+    def legacy(i, held):
+        return (LegacyCharacter(f"Hero {i}", 100, 100, 20, 5),
+                [legacy_items[key] for key in held])
+
+    def compact(i, held):
+        inventory = Inventory(items)
+        for key in held:
+            inventory.add(key)
+        return Character(f"Hero {i}", 100, 100, 20, 5), inventory
+
+    results = {}
+    for profile, held in profiles.items():
+        for name, make in (("item_lists", legacy), ("multisets", compact)):
+            tracemalloc.start()
+            kept = [make(i, held) for i in range(characters)]
+            results[f"{profile}_{name}_mib"] = tracemalloc.get_traced_memory()[0] / 2**20
+            tracemalloc.stop()
+            del kept
+    return results
+
+
+def bench_saves(saves: int = 2000) -> dict:
+    """Save/load latency (ms) and file sizes (bytes): pretty JSON files vs snapshot + journal"""
+    db = GameDatabase(":memory:")
+    game = AdvancedAdventureGame(db=db, io=NullIO(), saves=NullSaveStore())
+    game.create_player("Bench Hero")
+    game.inventory.add("health_potion", 3)
+    game.inventory.add("gold_coin", 12)
+    for location in game.locations:
+        for event in game.locations[location].special_events:
+            game.world_state.trigger_event(location, event)
+    state = game.snapshot()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        for i in range(saves):
+            with open(os.path.join(directory, f"save_{i}.json"), "w") as f:
+                json.dump(state, f, indent=2)
+        results["pretty_json_save_ms"] = 1000 * (time.perf_counter() - start) / saves
+        results["pretty_json_bytes"] = os.path.getsize(os.path.join(directory, "save_0.json"))
+
+        # Finding a player's newest save meant scanning the directory
+        start = time.perf_counter()
+        for _ in range(100):
+            max(Path(directory).glob("save_*.json"), key=lambda path: path.stat().st_mtime)
+        results[f"glob_latest_of_{saves}_ms"] = 1000 * (time.perf_counter() - start) / 100
+
+        store = FileSaveStore(directory, compact_every=saves + 1)
+        start = time.perf_counter()
+        for _ in range(saves):
+            store.save("hero", state)
+        results["snapshot_save_ms"] = 1000 * (time.perf_counter() - start) / saves
+        results["snapshot_bytes"] = store.paths("hero")[0].stat().st_size
+
+        # A move changes the location and the decision count
+        moved = dict(state, location="east_clearing", decisions=state["decisions"] + 1)
+        delta = state_delta(state, moved)
+        store.checkpoint("hero", state)
+        start = time.perf_counter()
+        for _ in range(saves):
+            store.autosave("hero", delta, lambda: moved)
+        results["journal_autosave_ms"] = 1000 * (time.perf_counter() - start) / saves
+        results["journal_record_bytes"] = store.paths("hero")[2].stat().st_size // saves
+
+        start = time.perf_counter()
+        for _ in range(100):
+            store.resume("hero")
+        results[f"load_{saves}_records_ms"] = 1000 * (time.perf_counter() - start) / 100
+
+        compact_every = GameConfig.SAVE_COMPACT_EVERY
+        store = FileSaveStore(directory, compact_every)
+        store.checkpoint("hero", state)
+        for _ in range(compact_every - 1):
+            store.autosave("hero", delta, lambda: moved)
+        start = time.perf_counter()
+        for _ in range(100):
+            store.resume("hero")
+        results[f"load_{compact_every - 1}_records_ms"] = 1000 * (time.perf_counter() - start) / 100
+
+    with tempfile.TemporaryDirectory() as directory:
+        save_db = GameDatabase(os.path.join(directory, "saves.db"))
+        for player in range(saves):
+            save_db.write_save(f"player_{player}", encode_snapshot(state))
+
+        store = DatabaseSaveStore(save_db, compact_every=saves + 1)
+        start = time.perf_counter()
+        for _ in range(saves):
+            store.save("hero", state)
+        results["db_snapshot_save_ms"] = 1000 * (time.perf_counter() - start) / saves
+
+        store.checkpoint("hero", state)
+        start = time.perf_counter()
+        for _ in range(saves):
+            store.autosave("hero", delta, lambda: moved)
+        results["db_autosave_ms"] = 1000 * (time.perf_counter() - start) / saves
+
+        store.save("hero", state)
+        start = time.perf_counter()
+        for _ in range(1000):
+            store.load("hero")
+        results[f"db_latest_of_{saves}_players_ms"] = 1000 * (time.perf_counter() - start) / 1000
+        save_db.close()
+
+    game.decisions.close()
+    db.close()
+    return results
+
+
+def legacy_statistics(conn: sqlite3.Connection):
+    """The launcher's statistics queries before summary tables: full scans per view"""
+    conn.execute("SELECT COUNT(*) FROM game_sessions").fetchone()
+    conn.execute("SELECT COUNT(*) FROM game_sessions WHERE game_state = 'victory'").fetchone()
+    conn.execute("SELECT AVG(final_score) FROM game_sessions WHERE final_score IS NOT NULL").fetchone()
+    conn.execute("""
+        SELECT player_name, MAX(final_score) as best_score
+        FROM game_sessions
+        WHERE final_score IS NOT NULL
+        GROUP BY player_name
+        ORDER BY best_score DESC
+        LIMIT 5
+    """).fetchall()
+
+
+def bench_statistics(sessions: int = 200000, players: int = 20000) -> dict:
+    """Statistics view latency (ms) on synthetic sessions: full scans vs summary tables"""
+    import random
+
+    rng = random.Random(0)
+    states = ["victory", "game_over", "game_over", "playing"]
+    rows = [(f"player_{rng.randrange(players)}", "2024-01-01T00:00:00", "2024-01-01T00:10:00",
+             rng.randrange(0, 1000), rng.choice(states), rng.randrange(50), rng.randrange(10))
+            for _ in range(sessions)]
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        db = GameDatabase(os.path.join(directory, "stats.db"))
+        with db.conn:
+            db.conn.executemany("""
+                INSERT INTO game_sessions (player_name, start_time, end_time, final_score,
+                                           game_state, total_decisions, items_collected)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+        start = time.perf_counter()
+        db.rebuild_statistics()
+        results["rebuild_ms"] = 1000 * (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for _ in range(5):
+            legacy_statistics(db.conn)
+        results["full_scan_ms"] = 1000 * (time.perf_counter() - start) / 5
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            db.statistics(top=5)
+        results["summary_tables_ms"] = 1000 * (time.perf_counter() - start) / 1000
+
+        session_ids = [db.start_new_session(f"player_{i}") for i in range(1000)]
+        start = time.perf_counter()
+        for session_id in session_ids:
+            db.end_session(session_id, 100, GameState.VICTORY, 0)
+        results["end_session_ms"] = 1000 * (time.perf_counter() - start) / len(session_ids)
+        db.close()
+    return results
+
+
+def bench_combat(scalar_fights: int = 20000, vector_fights: int = 1000000) -> dict:
+    """Fights per second: game engine one at a time vs the NumPy resolver"""
+    matchups = vector_combat.random_matchups(scalar_fights)
+    start = time.perf_counter()
+    vector_combat.resolve_fights_scalar(matchups["players"], matchups["enemies"],
+                                        matchups["flee_below"], matchups["draws"])
+    results = {"scalar": scalar_fights / (time.perf_counter() - start)}
+
+    if vector_combat.np is not None:
+        np = vector_combat.np
+        rng = np.random.default_rng(0)
+        enemy = rng.integers(0, 4, vector_fights)
+        start = time.perf_counter()
+        vector_combat.resolve_fights(
+            player_attack=np.full(vector_fights, 20), player_defense=np.full(vector_fights, 5),
+            player_health=np.full(vector_fights, 100),
+            enemy_health=np.array([40, 60, 50, 100])[enemy],
+            enemy_attack=np.array([15, 20, 25, 30])[enemy],
+            enemy_defense=np.array([3, 5, 2, 10])[enemy],
+            flee_below=0.25, rng=rng)
+        results["vectorized"] = vector_fights / (time.perf_counter() - start)
+
+    return results
+
+
+async def _server_bench_client(port: int, player: str, commands: int, latencies: list):
+    """One scripted player: send a name, then cycle through prompt-free commands"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    await reader.readuntil(b"adventurer? ")
+    writer.write(f"{player}\n".encode())
+    await reader.readuntil(b">>> ")
+
+    script = ["look", "status", "inventory", "help"]
+    for i in range(commands):
+        start = time.perf_counter()
+        writer.write(f"{script[i % len(script)]}\n".encode())
+        await reader.readuntil(b">>> ")
+        latencies.append(time.perf_counter() - start)
+
+    writer.close()
+
+
+async def _bench_server(clients: int, commands: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        server = GameServer(os.path.join(tmp, "server.db"), port=0)
+        port = await server.start()
+
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*(_server_bench_client(port, f"Bench{i}", commands, latencies)
+                               for i in range(clients)))
+        elapsed = time.perf_counter() - start
+
+        stats = server.stats()
+        await server.stop()
+
+    return {
+        "commands_per_sec": clients * commands / elapsed,
+        "server_p50_ms": stats["p50_ms"],
+        "server_p99_ms": stats["p99_ms"],
+        "client_p50_ms": 1000 * percentile(latencies, 50),
+        "client_p99_ms": 1000 * percentile(latencies, 99),
+    }
+
+
+def bench_server(clients: int = 500, commands: int = 20) -> dict:
+    """Drive many concurrent sessions through one GameServer process"""
+    return asyncio.run(_bench_server(clients, commands))
+
+
+def legacy_parse(command: str):
+    """The if/elif startswith chain process_command used before the command registry"""
+    command = command.lower().strip()
+    if command == "help":
+        return "help", ""
+    elif command == "status":
+        return "status", ""
+    elif command == "inventory":
+        return "inventory", ""
+    elif command.startswith("go "):
+        return "go", command[3:]
+    elif command.startswith("take "):
+        return "take", command[5:]
+    elif command.startswith("use "):
+        return "use", command[4:]
+    elif command.startswith("travel "):
+        return "travel", command[7:]
+    elif command == "hint":
+        return "hint", ""
+    elif command == "look":
+        return "look", ""
+    elif command == "save":
+        return "save", ""
+    elif command == "load":
+        return "load", ""
+    elif command == "quit":
+        return "quit", ""
+    elif command == "stats":
+        return "stats", ""
+    return None, ""
+
+
+# Command stream used when no recorded sessions are available
+SAMPLE_COMMANDS = ["look", "go north", "take health potion", "status", "go forest", "go east",
+                   "take gold coin", "inventory", "use health potion", "hint", "go forest", "help"]
+
+
+def recorded_commands(db_name: str, limit: int = 100000) -> List[str]:
+    """Command lines players typed, from the recorded session inputs"""
+    conn = connect_readonly(db_name)
+    try:
+        return [line for line, in conn.execute('''
+            SELECT line FROM session_inputs WHERE prompt = 'command' AND line != ''
+            ORDER BY session_id, seq LIMIT ?
+        ''', (limit,))]
+    finally:
+        conn.close()
+
+
+def bench_command_dispatch(lines: Optional[List[str]] = None, commands: int = 200000) -> dict:
+    """Commands per second: old startswith chain vs registry parse, and full process_command dispatch"""
+    lines = lines or SAMPLE_COMMANDS
+    stream = [lines[i % len(lines)] for i in range(commands)]
+    results = {}
+
+    start = time.perf_counter()
+    for line in stream:
+        legacy_parse(line)
+    results["legacy_parse"] = commands / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for line in stream:
+        try:
+            COMMANDS.parse(line)
+        except LookupError:
+            pass
+    results["registry_parse"] = commands / (time.perf_counter() - start)
+
+    peaceful = type("Peaceful", (GameConfig,), {"ENEMY_ENCOUNTER_RATE": 0, "AUTOSAVE": False})
+    db = GameDatabase(":memory:")
+    game = AdvancedAdventureGame(db=db, decisions=db, io=NullIO(), config=peaceful, saves=NullSaveStore())
+    game.create_player("Bench")
+    dispatched = min(commands, 50000)
+    start = time.perf_counter()
+    for line in stream[:dispatched]:
+        game.process_command(line)
+        game.pending_prompt = None
+        game.game_state = GameState.PLAYING
+    results["process_command"] = dispatched / (time.perf_counter() - start)
+    db.close()
+    return results
+
+
+# Regression suite: one number per hot path, compared against a stored baseline.
+# "higher" metrics are rates, "lower" metrics are costs.
+SUITE_METRICS = {
+    "dispatch_commands_per_sec": "higher",
+    "move_latency_us": "lower",
+    "combat_fights_per_sec": "higher",
+    "save_ms": "lower",
+    "load_ms": "lower",
+    "db_inserts_per_sec": "higher",
+    "session_memory_kib": "lower",
+}
+
+
+def suite_dispatch(commands: int) -> float:
+    """process_command throughput on prompt-free commands"""
+    game = AdvancedAdventureGame(db=GameDatabase(":memory:"), io=NullIO(), saves=NullSaveStore())
+    game.create_player("Bench")
+    script = ["look", "status", "inventory", "help", "hint"]
+    start = time.perf_counter()
+    for i in range(commands):
+        game.process_command(script[i % len(script)])
+    rate = commands / (time.perf_counter() - start)
+    game.decisions.close()
+    game.db.close()
+    return rate
+
+
+def suite_move_latency(moves: int, directory: str) -> float:
+    """Median µs per move, with decision logging and autosave on a file database"""
+    peaceful = type("Peaceful", (GameConfig,), {"ENEMY_ENCOUNTER_RATE": 0})
+    db = GameDatabase(os.path.join(directory, "moves.db"))
+    game = AdvancedAdventureGame(db=db, io=NullIO(), config=peaceful)
+    game.create_player("Bench")
+    timings = []
+    for i in range(moves):
+        start = time.perf_counter()
+        game.move_to_location("north" if i % 2 == 0 else "forest")
+        timings.append(time.perf_counter() - start)
+    game.close_session()
+    game.decisions.close()
+    db.close()
+    return 1e6 * percentile(timings, 50)
+
+
+def suite_combat(fights: int) -> float:
+    """Whole fights per second through the game engine"""
+    import random
+    import simulator
+
+    rng = random.Random(0)
+    enemies = sorted(load_world().enemies)
+    start = time.perf_counter()
+    for i in range(fights):
+        simulator.simulate_fight(enemies[i % len(enemies)], 3, "attack", rng)
+    return fights / (time.perf_counter() - start)
+
+
+def suite_saves(saves: int, directory: str) -> dict:
+    """Milliseconds per save_game and load_game against a file database
+
+    Saves are written by the decision writer thread, so both timings wait
+    for it to finish writing.
+    """
+    db = GameDatabase(os.path.join(directory, "saves.db"))
+    game = AdvancedAdventureGame(db=db, io=NullIO())
+    game.create_player("Bench")
+    game.inventory.add("health_potion", 3)
+    game.inventory.add("gold_coin", 12)
+    game.decisions.flush()
+
+    start = time.perf_counter()
+    for _ in range(saves):
+        game.save_game()
+    game.decisions.flush()
+    save_ms = 1000 * (time.perf_counter() - start) / saves
+    start = time.perf_counter()
+    for _ in range(saves):
+        game.load_game()
+    game.decisions.flush()
+    load_ms = 1000 * (time.perf_counter() - start) / saves
+
+    game.decisions.close()
+    db.close()
+    return {"save_ms": save_ms, "load_ms": load_ms}
+
+
+def suite_db_inserts(rows: int, directory: str) -> float:
+    """Decisions per second through GameDatabase batching into a file database"""
+    db = GameDatabase(os.path.join(directory, "inserts.db"))
+    session_id = db.start_new_session("Bench")
+    start = time.perf_counter()
+    for _ in range(rows):
+        db.log_decision(session_id, "move", "north_trail", "forest_start", "north_trail")
+    db.flush()
+    rate = rows / (time.perf_counter() - start)
+    db.close()
+    return rate
+
+
+def suite_session_memory(sessions: int) -> float:
+    """KiB allocated per live session with a player"""
+    import tracemalloc
+
+    db = GameDatabase(":memory:")
+    decisions = DecisionLogger(db)
+    tracemalloc.start()
+    kept = []
+    for i in range(sessions):
+        game = AdvancedAdventureGame(db=db, decisions=decisions, io=NullIO(), saves=NullSaveStore())
+        game.player = game.new_character(f"Hero {i}")
+        kept.append(game)
+    kib = tracemalloc.get_traced_memory()[0] / 1024 / sessions
+    tracemalloc.stop()
+    del kept
+    decisions.close()
+    db.close()
+    return kib
+
+
+def run_suite(scale: float = 1.0, repeat: int = 5) -> dict:
+    """Every suite metric, best of repeat runs; scale shrinks or grows the workloads"""
+    def n(count):
+        return max(10, int(count * scale))
+
+    def best(metric, values):
+        return max(values) if SUITE_METRICS[metric] == "higher" else min(values)
+
+    runs = {metric: [] for metric in SUITE_METRICS}
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.INFO)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for _ in range(repeat):
+                runs["dispatch_commands_per_sec"].append(suite_dispatch(n(20000)))
+                runs["move_latency_us"].append(suite_move_latency(n(2000), directory))
+                runs["combat_fights_per_sec"].append(suite_combat(n(5000)))
+                for metric, value in suite_saves(n(500), directory).items():
+                    runs[metric].append(value)
+                runs["db_inserts_per_sec"].append(suite_db_inserts(n(50000), directory))
+                runs["session_memory_kib"].append(suite_session_memory(n(2000)))
+                for name in os.listdir(directory):
+                    os.unlink(os.path.join(directory, name))
+    finally:
+        logging.disable(previous_disable)
+    return {metric: best(metric, values) for metric, values in runs.items()}
+
+
+def load_baseline(path: str) -> Optional[dict]:
+    """The stored baseline, or None if there is none yet"""
+    try:
+        return json.loads(Path(path).read_text())
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path: str, results: dict):
+    """Store results as the new baseline"""
+    baseline = {
+        "recorded": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "metrics": results,
+    }
+    Path(path).write_text(json.dumps(baseline, indent=2) + "\n")
+
+
+def compare(results: dict, baseline: dict, tolerance: float = GameConfig.BENCH_TOLERANCE) -> List[dict]:
+    """One row per metric with its change; ``regressed`` when worse than tolerance allows
+
+    A baseline may set per-metric tolerances under "tolerances".
+    """
+    rows = []
+    for metric, value in results.items():
+        base = baseline["metrics"].get(metric)
+        if not base:
+            rows.append({"metric": metric, "value": value, "baseline": None, "change": None, "regressed": False})
+            continue
+        allowed = baseline.get("tolerances", {}).get(metric, tolerance)
+        change = value / base - 1
+        worse = -change if SUITE_METRICS[metric] == "higher" else change
+        rows.append({"metric": metric, "value": value, "baseline": base, "change": change,
+                     "regressed": worse > allowed})
+    return rows
+
+
+def run_gate(baseline_path: str, tolerance: float, update: bool, scale: float, repeat: int) -> int:
+    """Run the suite against the baseline; returns the process exit code"""
+    print(f"🚦 Benchmark suite (baseline {baseline_path}, tolerance {tolerance:.0%}):")
+    results = run_suite(scale, repeat)
+    baseline = load_baseline(baseline_path)
+
+    if baseline is None or update:
+        save_baseline(baseline_path, results)
+        for metric, value in results.items():
+            print(f"  {metric:<28} {value:>14,.3f}")
+        print(f"📝 Baseline {'updated' if baseline else 'recorded'}.")
+        return 0
+
+    rows = compare(results, baseline, tolerance)
+    for row in rows:
+        change = "      new" if row["change"] is None else f"{row['change']:>+9.1%}"
+        marker = "❌" if row["regressed"] else "✅"
+        print(f"  {marker} {row['metric']:<28} {row['value']:>14,.3f} {change}")
+    regressions = [row["metric"] for row in rows if row["regressed"]]
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions.")
+    return 0
+
+
+def main():
+    """Run benchmarks and print a summary"""
+    parser = argparse.ArgumentParser(description="Adventure game benchmarks")
+    parser.add_argument("--moves", type=int, default=2000, help="decisions logged per run")
+    parser.add_argument("--clients", type=int, default=500, help="concurrent server sessions")
+    parser.add_argument("--sessions", type=int, default=200000, help="synthetic sessions for statistics")
+    parser.add_argument("--commands-from", metavar="DB",
+                        help="benchmark command dispatch on commands recorded in this database")
+    parser.add_argument("--suite", action="store_true",
+                        help="run the regression suite against the baseline instead; exits 1 on regression")
+    parser.add_argument("--baseline", default=GameConfig.BENCH_BASELINE_FILE, help="baseline results file")
+    parser.add_argument("--tolerance", type=float, default=GameConfig.BENCH_TOLERANCE,
+                        help="allowed fractional slowdown per metric")
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--scale", type=float, default=1.0, help="suite workload size multiplier")
+    parser.add_argument("--repeat", type=int, default=5, help="suite runs; the best of them is kept")
+    args = parser.parse_args()
+
+    if args.suite or args.update_baseline:
+        sys.exit(run_gate(args.baseline, args.tolerance, args.update_baseline, args.scale, args.repeat))
+
+    print("📈 Database move logging (moves/sec):")
+    results = bench_db_moves(args.moves)
+    for name, rate in results.items():
+        print(f"  {name:<18} {rate:>12,.0f}")
+    print(f"  speedup            {results['batched'] / results['connect_per_move']:>12.1f}x")
+
+    print("\n🖥️  Command dispatch by frontend (commands/sec):")
+    for name, rate in bench_rendering().items():
+        print(f"  {name:<18} {rate:>12,.0f}")
+
+    lines = recorded_commands(args.commands_from) if args.commands_from else None
+    print(f"\n⌨️  Command parse + dispatch ({'recorded' if lines else 'sample'} commands/sec):")
+    for name, rate in bench_command_dispatch(lines).items():
+        print(f"  {name:<18} {rate:>12,.0f}")
+
+    print("\n📦 World loading:")
+    for name, value in bench_world_load().items():
+        print(f"  {name:<22} {value:>12,.3f}")
+
+    print("\n🗄️  Region store vs in-memory world:")
+    for name, value in bench_world_store().items():
+        print(f"  {name:<30} {value:>12,.1f}")
+
+    print("\n📦 Packed world shared by 4 worker processes (100k locations):")
+    for name, value in bench_world_pack().items():
+        print(f"  {name:<30} {value:>12,.1f}")
+
+    print("\n🧠 Per-session world memory (per 10k sessions):")
+    for name, value in bench_session_memory().items():
+        print(f"  {name:<22} {value:>12,.0f}")
+
+    print("\n🧍 100k characters with inventories:")
+    for name, value in bench_character_memory().items():
+        print(f"  {name:<22} {value:>12,.1f}")
+
+    print("\n💾 Saves:")
+    for name, value in bench_saves().items():
+        print(f"  {name:<22} {value:>12,.3f}")
+
+    print(f"\n📊 Statistics view ({args.sessions:,} synthetic sessions):")
+    for name, value in bench_statistics(args.sessions).items():
+        print(f"  {name:<22} {value:>12,.3f}")
+
+    print("\n🌍 World generation (100k locations):")
+    for name, value in bench_worldgen().items():
+        print(f"  {name:<22} {value:>12,.1f}")
+
+    print("\n🗺️  World graph (100k generated locations):")
+    for name, value in bench_world_graph().items():
+        print(f"  {name:<22} {value:>12,.3f}")
+
+    print("\n⚔️  Combat resolution (fights/sec):")
+    for name, rate in bench_combat().items():
+        print(f"  {name:<18} {rate:>12,.0f}")
+
+    print(f"\n🌐 Game server with {args.clients} concurrent sessions:")
+    for name, value in bench_server(args.clients).items():
+        print(f"  {name:<18} {value:>12,.3f}")
+
+
+if __name__ == "__main__":
+    main()
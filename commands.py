@@ -0,0 +1,168 @@
+# commands.py
+"""
+Command registry for the adventure game
+Verbs and their aliases are registered once with a CommandRegistry and
+resolved through a character trie: a word resolves in time proportional to
+its length, to the command it names exactly or, failing that, to the only
+command it is a prefix of ("inv" -> inventory, "tr" -> travel).
+
+The game's built-in verbs live in COMMANDS; plugins add verbs by
+registering handlers on it:
+
+    from commands import COMMANDS
+
+    @COMMANDS.command("dance", help="Dance a little jig")
+    def dance(game):
+        game.io.write("You dance!")
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+
+class CommandError(ValueError):
+    """Raised when a command cannot be registered"""
+
+
+@dataclass(frozen=True)
+class Command:
+    """A verb, the handler it runs and how it is described in help
+
+    The handler is a function called with the game (and the argument text,
+    if the command takes one), or the name of a game method to call.
+    """
+    name: str
+    handler: Union[Callable, str]
+    help: str = ""
+    argument: Optional[str] = None  # e.g. "place"; the handler then receives the rest of the line
+    aliases: Tuple[str, ...] = ()
+
+    @property
+    def usage(self) -> str:
+        return f"{self.name} [{self.argument}]" if self.argument else self.name
+
+
+class AmbiguousCommand(LookupError):
+    """A prefix names more than one command"""
+
+    def __init__(self, word: str, candidates: Sequence[str]):
+        super().__init__(f"'{word}' could mean: {', '.join(candidates)}")
+        self.word = word
+        self.candidates = list(candidates)
+
+
+# Marks a trie node below which more than one command is reachable
+_SEVERAL = object()
+
+
+class _Node:
+    __slots__ = ("children", "command", "below")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.command: Optional[Command] = None   # command named by exactly this word
+        self.below = None                        # the only command under this node, or _SEVERAL
+
+
+class CommandTrie:
+    """Character trie over command words (names and aliases)"""
+
+    def __init__(self):
+        self.root = _Node()
+
+    def insert(self, word: str, command: Command):
+        node = self.root
+        for char in word:
+            node = node.children.setdefault(char, _Node())
+            if node.below is None:
+                node.below = command
+            elif node.below is not command:
+                node.below = _SEVERAL
+        node.command = command
+
+    def resolve(self, word: str) -> Optional[Command]:
+        """Command named by word or by an unambiguous prefix; None if unknown
+
+        Raises AmbiguousCommand when word prefixes several commands.
+        """
+        node = self.root
+        for char in word:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        if node.command is not None:
+            return node.command
+        if node.below is _SEVERAL:
+            raise AmbiguousCommand(word, sorted({command.name for command in self._commands_under(node)}))
+        return node.below
+
+    def _commands_under(self, node: _Node) -> Iterator[Command]:
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.command is not None:
+                yield node.command
+            stack.extend(node.children.values())
+
+
+class CommandRegistry:
+    """Registered commands, resolved by exact word first and then by trie prefix"""
+
+    def __init__(self):
+        self.commands: Dict[str, Command] = {}
+        self._words: Dict[str, Command] = {}
+        self._trie = CommandTrie()
+
+    def register(self, name: str, handler: Union[Callable, str], help: str = "", argument: Optional[str] = None,
+                 aliases: Sequence[str] = ()) -> Command:
+        """Add a command; the handler is called as handler(game) or handler(game, argument)"""
+        command = Command(name, handler, help, argument, tuple(aliases))
+        for word in (name, *command.aliases):
+            if word != word.lower() or not word or " " in word:
+                raise CommandError(f"Command words must be single lower-case words: '{word}'")
+            if word in self._words:
+                raise CommandError(f"'{word}' is already registered for '{self._words[word].name}'")
+        self.commands[name] = command
+        for word in (name, *command.aliases):
+            self._words[word] = command
+            self._trie.insert(word, command)
+        return command
+
+    def command(self, name: str, help: str = "", argument: Optional[str] = None, aliases: Sequence[str] = ()):
+        """Decorator form of register"""
+        def decorate(handler):
+            self.register(name, handler, help, argument, aliases)
+            return handler
+        return decorate
+
+    def copy(self) -> "CommandRegistry":
+        """A registry with the same commands, to extend without affecting this one"""
+        registry = CommandRegistry()
+        for command in self.commands.values():
+            registry.register(command.name, command.handler, command.help, command.argument, command.aliases)
+        return registry
+
+    def without(self, *names: str) -> "CommandRegistry":
+        """A copy of this registry lacking the named commands"""
+        registry = CommandRegistry()
+        for command in self.commands.values():
+            if command.name not in names:
+                registry.register(command.name, command.handler, command.help, command.argument, command.aliases)
+        return registry
+
+    def resolve(self, word: str) -> Optional[Command]:
+        """Command named by word, an alias or an unambiguous prefix; None if unknown"""
+        return self._words.get(word) or self._trie.resolve(word)
+
+    def parse(self, line: str) -> Tuple[Optional[Command], str]:
+        """(command, argument text) for a line of input; command is None if unknown"""
+        word, _, rest = line.lower().strip().partition(" ")
+        return self.resolve(word), rest.strip()
+
+    def help_lines(self) -> List[str]:
+        """One line per command, in registration order"""
+        width = max((len(command.usage) for command in self.commands.values()), default=0)
+        return [f"  {command.usage:<{width}} - {command.help}" for command in self.commands.values()]
+
+
+COMMANDS = CommandRegistry()
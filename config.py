@@ -7,7 +7,58 @@ Modify these values to customize the game experience
 class GameConfig:
     # Database settings
     DATABASE_NAME = "adventure_game.db"
-    LOG_FILE_NAME = "game_logs.txt"
+    LOG_FILE_NAME = "game_logs.txt"     # JSON lines, one event per line
+    LOG_LEVEL = "INFO"
+    LOG_MAX_BYTES = 10 * 1024 * 1024    # rotate the log at this size...
+    LOG_ROTATE_WHEN = None              # ...or on a schedule instead, e.g. "midnight"
+    LOG_BACKUP_COUNT = 5                # rotated log files kept
+    LOG_SAMPLE_RATES = {"move": 10}     # log one in N of these high-frequency events
+    DB_BATCH_SIZE = 50          # buffered decisions per write transaction
+    DB_FLUSH_INTERVAL = 1.0     # seconds before buffered decisions are written
+    DECISION_QUEUE_SIZE = 10000         # max decisions waiting for the writer thread
+    DECISION_QUEUE_OVERFLOW = "block"   # "block" the game loop or "drop" when full
+    
+    # World content
+    WORLD_FILE = "worlds/default.json"
+    WORLD_CACHE_DIR = ".world_cache"    # compiled world snapshots
+    WORLD_FIXTURE_DIR = "worlds/generated"     # worlds written by worldgen.fixture()
+    WORLD_REGION_SIZE = 256     # locations per region in a compiled world store
+    WORLD_REGION_CACHE = 64     # regions kept resident per process
+    WORLD_SEARCH_LIMIT = 200000         # locations a travel search may visit in a store
+    WORLD_ROUTE_CACHE = 64      # next-hop tables (one per travel target) kept per world
+    
+    # Saves
+    SAVE_DIR = "saves"          # only used by FileSaveStore; saves normally live in the database
+    AUTOSAVE = True             # journal a state delta after every move
+    SAVE_COMPACT_EVERY = 50     # journal records before folding into a snapshot
+    SAVE_RETENTION = 5          # manual saves kept per player in the database
+    AUTOSAVE_RETENTION = 1      # autosave snapshots kept per player in the database
+    
+    # Analytics export
+    EXPORT_DIR = "exports"
+    EXPORT_CHUNK_ROWS = 5000            # rows fetched per read transaction
+    EXPORT_CHECKPOINT_ROWS = 100000     # rows between committed partitions and resume points
+    EXPORT_SESSION_SETTLE = 3600        # seconds an unfinished session may still end
+    
+    # Metrics
+    METRICS_ENABLED = False     # time game and database calls (see metrics.py)
+    METRICS_FILE = "metrics.json"       # written at exit when metrics are enabled
+    METRICS_PORT = 9765                 # Prometheus endpoint in server mode
+    PROFILE_DIR = "profiles"            # reports written by profiling.py
+    BENCH_BASELINE_FILE = "benchmark_baseline.json"
+    BENCH_TOLERANCE = 0.25              # fraction a suite metric may worsen before failing
+    
+    # Server mode settings
+    SERVER_HOST = "127.0.0.1"
+    SERVER_PORT = 8765
+    SERVER_BACKLOG = 4096               # pending connections queued by the OS
+    SERVER_LATENCY_SAMPLES = 100000     # recent command timings kept for p50/p99
+    SUPERVISOR_WORKERS = 4              # worker processes, each hosting many sessions
+    SUPERVISOR_RESTART_DELAY = 1.0      # seconds before a dead worker's slot is restarted
+    SUPERVISOR_POLL_INTERVAL = 5.0      # seconds between metrics polls of the workers
+    SUPERVISOR_NAME_TIMEOUT = 60        # seconds a new connection has to send the player name
+    SUPERVISOR_CONTROL_TIMEOUT = 5.0    # seconds to wait on a worker's control socket
+    SUPERVISOR_ORPHAN_TTL = 3600        # seconds a dead worker's player may still resume on reconnect
     
     # Game balance settings
     STARTING_HEALTH = 100
@@ -21,6 +72,7 @@ class GameConfig:
     DEFENSE_PER_LEVEL = 2
     
     # Combat settings
+    COMBAT_XP_REWARD = 25
     FLEE_SUCCESS_RATE = 0.4
     ENEMY_ENCOUNTER_RATE = 0.6
     
@@ -46,3 +98,4 @@ class GameConfig:
         "health_potion": 2,  # gold coins
         "leather_armor": 3,  # gold coins
     }
+    GOLD_ITEM = "gold_coin"  # picked up into the gold balance, not the item bag
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Analytics export
+Streams game_sessions, player_decisions and the interned locations they
+refer to out of the live database into gzip-compressed CSV partitions, one
+directory per table and date (locations have no date):
+
+    exports/player_decisions/date=2024-06-01/part-000000123456.csv.gz
+    exports/locations/part-000000000001.csv.gz
+
+Rows are read in id order with short keyset queries on a read-only WAL
+connection, so the export holds no long transaction and never blocks the
+game's writers. Partitions are committed (renamed into place) every
+GameConfig.EXPORT_CHECKPOINT_ROWS rows together with the last exported id
+in export_state.json; the next run resumes after that id. The state also
+records the database's first session, so exporting a database that was
+deleted and recreated (or a different one) starts again from the first row.
+
+Sessions are only exported once they have ended, or once they are older
+than GameConfig.EXPORT_SESSION_SETTLE seconds, so their outcome is final.
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from adventure_quest import connect_readonly
+from config import GameConfig
+
+# Table -> column holding the timestamp used for date partitions, None for undated tables
+TABLES = {
+    "game_sessions": "start_time",
+    "player_decisions": "timestamp",
+    "locations": None,
+}
+
+STATE_FILE = "export_state.json"
+
+
+def load_state(out_dir: Path) -> Dict:
+    """Last exported id per table, and the identity of the database they belong to"""
+    try:
+        return json.loads((out_dir / STATE_FILE).read_text())
+    except FileNotFoundError:
+        return {}
+
+
+def save_state(out_dir: Path, state: Dict):
+    """Atomically record the last exported id per table"""
+    tmp = out_dir / (STATE_FILE + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2))
+    os.replace(tmp, out_dir / STATE_FILE)
+
+
+class PartitionWriter:
+    """Open CSV.gz partitions for one table, committed together"""
+
+    def __init__(self, table_dir: Path, columns: List[str]):
+        self.table_dir = table_dir
+        self.columns = columns
+        self.open: Dict[str, tuple] = {}
+
+    def write(self, day: Optional[str], row_id: int, row: tuple):
+        entry = self.open.get(day)
+        if entry is None:
+            directory = self.table_dir / f"date={day}" if day else self.table_dir
+            directory.mkdir(parents=True, exist_ok=True)
+            final = directory / f"part-{row_id:012d}.csv.gz"
+            tmp = final.with_name(final.name + ".tmp")
+            handle = gzip.open(tmp, "wt", newline="", encoding="utf-8")
+            writer = csv.writer(handle)
+            writer.writerow(self.columns)
+            entry = self.open[day] = (tmp, final, handle, writer)
+        entry[3].writerow(row)
+
+    def commit(self) -> int:
+        """Close and publish every open partition; return how many"""
+        for tmp, final, handle, _ in self.open.values():
+            handle.close()
+            os.replace(tmp, final)
+        count = len(self.open)
+        self.open.clear()
+        return count
+
+    def abort(self):
+        """Discard uncommitted partitions"""
+        for tmp, _, handle, _ in self.open.values():
+            handle.close()
+            tmp.unlink(missing_ok=True)
+        self.open.clear()
+
+
+def database_identity(conn: sqlite3.Connection) -> Optional[List]:
+    """Id and start time of the first session; a recreated database has a different one"""
+    row = conn.execute("SELECT id, start_time FROM game_sessions ORDER BY id LIMIT 1").fetchone()
+    return list(row) if row else None
+
+
+def session_upper_bound(conn: sqlite3.Connection, after_id: int, settle_seconds: float) -> Optional[int]:
+    """First session id after after_id that is still running and might still end"""
+    cutoff = (datetime.now() - timedelta(seconds=settle_seconds)).isoformat()
+    return conn.execute('''
+        SELECT MIN(id) FROM game_sessions
+        WHERE id > ? AND end_time IS NULL AND start_time >= ?
+    ''', (after_id, cutoff)).fetchone()[0]
+
+
+def export_table(conn: sqlite3.Connection, table: str, out_dir: Path, state: Dict,
+                 chunk_rows: int = GameConfig.EXPORT_CHUNK_ROWS,
+                 checkpoint_rows: int = GameConfig.EXPORT_CHECKPOINT_ROWS,
+                 settle_seconds: float = GameConfig.EXPORT_SESSION_SETTLE) -> Dict[str, int]:
+    """Export rows of table after the last exported id; returns row and partition counts"""
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")]
+    last_id = state.get(table, 0)
+    if not columns:
+        return {"rows": 0, "partitions": 0, "last_id": last_id}  # from before the table existed
+    date_index = columns.index(TABLES[table]) if TABLES[table] else None
+
+    upper_id = None
+    if table == "game_sessions":
+        upper_id = session_upper_bound(conn, last_id, settle_seconds)
+    bound = "AND id < ?" if upper_id is not None else ""
+    query = f"SELECT {', '.join(columns)} FROM {table} WHERE id > ? {bound} ORDER BY id LIMIT ?"
+
+    writer = PartitionWriter(out_dir / table, columns)
+    exported = partitions = since_checkpoint = 0
+    try:
+        while True:
+            params = (last_id, upper_id, chunk_rows) if upper_id is not None else (last_id, chunk_rows)
+            cursor = conn.execute(query, params)
+            fetched = 0
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                for row in rows:
+                    day = (row[date_index] or "unknown")[:10] if date_index is not None else None
+                    writer.write(day, row[0], row)
+                last_id = rows[-1][0]
+                fetched += len(rows)
+
+            exported += fetched
+            since_checkpoint += fetched
+            if fetched < chunk_rows or since_checkpoint >= checkpoint_rows:
+                partitions += writer.commit()
+                state[table] = last_id
+                save_state(out_dir, state)
+                since_checkpoint = 0
+            if fetched < chunk_rows:
+                break
+    except BaseException:
+        writer.abort()
+        raise
+
+    return {"rows": exported, "partitions": partitions, "last_id": last_id}
+
+
+def export_all(db_name: str = GameConfig.DATABASE_NAME, out_dir: str = GameConfig.EXPORT_DIR,
+               tables: Optional[List[str]] = None, **options) -> Dict[str, Dict[str, int]]:
+    """Export every table incrementally; returns per-table counts"""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    state = load_state(out)
+    conn = connect_readonly(db_name)
+    try:
+        identity = database_identity(conn)
+        if "database" in state and state["database"] != identity:
+            state = {}  # resume points of another database
+        state["database"] = identity
+        return {table: export_table(conn, table, out, state, **options) for table in tables or TABLES}
+    finally:
+        conn.close()
+
+
+def main(argv: Optional[List[str]] = None):
+    """Run the export from the command line"""
+    parser = argparse.ArgumentParser(description="Export game analytics to CSV.gz partitions")
+    parser.add_argument("--db", default=GameConfig.DATABASE_NAME, help="SQLite database file")
+    parser.add_argument("--out", default=GameConfig.EXPORT_DIR, help="output directory")
+    parser.add_argument("--table", action="append", choices=sorted(TABLES), help="table to export (repeatable)")
+    parser.add_argument("--chunk", type=int, default=GameConfig.EXPORT_CHUNK_ROWS, help="rows per read")
+    args = parser.parse_args(argv)
+
+    if not Path(args.db).exists():
+        print(f"❌ Database '{args.db}' not found.")
+        return
+
+    results = export_all(args.db, args.out, args.table, chunk_rows=args.chunk)
+    print(f"📤 Exported to {args.out}/")
+    for table, counts in results.items():
+        print(f"  {table:<18} {counts['rows']:>10,} rows  {counts['partitions']:>4} partitions  "
+              f"(last id {counts['last_id']})")
+
+
+if __name__ == "__main__":
+    main()
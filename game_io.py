@@ -0,0 +1,82 @@
+# game_io.py
+"""
+Frontends for the adventure game
+The game never calls print() or input() directly. Every line of output goes
+through a frontend's write(), and every question the game asks is a Prompt
+event answered by the frontend's read(), so the same engine can run in a
+terminal, inside a server, or in a simulation with no rendering at all.
+"""
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class Prompt:
+    """A question the game is waiting on, answered with one line of input"""
+    kind: str
+    text: str
+    options: Tuple[str, ...] = ()
+    handler: Optional[Callable[[str], None]] = field(default=None, repr=False, compare=False)
+
+
+class GameIO:
+    """Frontend interface used by AdvancedAdventureGame
+
+    ``renders`` tells the game whether display-only output (room
+    descriptions, status screens, help) is worth building at all.
+    """
+
+    renders = True
+
+    def write(self, text: str = ""):
+        raise NotImplementedError
+
+    def read(self, prompt: Prompt) -> str:
+        raise NotImplementedError
+
+
+class ConsoleIO(GameIO):
+    """Blocking terminal frontend using the print/input builtins"""
+
+    def write(self, text: str = ""):
+        print(text)
+
+    def read(self, prompt: Prompt) -> str:
+        return input(prompt.text)
+
+
+class BufferIO(GameIO):
+    """In-memory frontend: output is collected and answers come from queued lines"""
+
+    def __init__(self, lines: Iterable[str] = ()):
+        self.lines = deque(lines)
+        self.output: List[str] = []
+
+    def write(self, text: str = ""):
+        self.output.append(text)
+
+    def read(self, prompt: Prompt) -> str:
+        if not self.lines:
+            raise EOFError("No more input queued")
+        return self.lines.popleft()
+
+    def feed(self, line: str):
+        """Queue a line of input"""
+        self.lines.append(line)
+
+    def drain(self) -> str:
+        """Return collected output as text and clear the buffer"""
+        text = "\n".join(self.output)
+        self.output.clear()
+        return text
+
+
+class NullIO(BufferIO):
+    """Frontend that discards all output; for simulations and tests"""
+
+    renders = False
+
+    def write(self, text: str = ""):
+        pass
@@ -0,0 +1,158 @@
+# game_logging.py
+"""
+Structured, non-blocking logging for the adventure game
+Modules only create loggers; nothing is configured on import. Entry points
+call configure_logging(), which puts a QueueHandler on the root logger and
+starts a QueueListener thread that writes JSON lines to a rotating file, so
+game threads never wait on the disk. Forked children start unconfigured and
+call configure_logging() with their own file.
+
+Log calls use %-style arguments so a message is only formatted when it is
+actually emitted. Records may carry an ``event`` name (via ``extra``); high
+frequency events are sampled according to GameConfig.LOG_SAMPLE_RATES.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+from config import GameConfig
+
+# Attributes every LogRecord has; anything else came from ``extra``
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+# Log arguments that are safe to format later on the listener thread
+_IMMUTABLE = (str, int, float, bool, type(None))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including any ``extra`` fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep one in every N records of each sampled event
+
+    Records without an ``event`` or with an unlisted event always pass, as do
+    warnings and errors. Counting rather than random sampling keeps the
+    game's random state untouched.
+    """
+
+    def __init__(self, rates: Dict[str, int]):
+        super().__init__()
+        self.rates = {event: rate for event, rate in rates.items() if rate > 1}
+        self._seen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(getattr(record, "event", None))
+        if rate is None or record.levelno >= logging.WARNING:
+            return True
+        with self._lock:
+            seen = self._seen.get(record.event, 0)
+            self._seen[record.event] = seen + 1
+        if seen % rate:
+            return False
+        record.sample_rate = rate
+        return True
+
+
+class _LazyQueueHandler(logging.handlers.QueueHandler):
+    """Queue records as they are; the listener thread does all formatting"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Arguments that could change before the listener runs are rendered now
+        args = record.args if isinstance(record.args, tuple) else (record.args,)
+        if record.args and not all(isinstance(arg, _IMMUTABLE) for arg in args):
+            record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+def file_handler(log_file: str = GameConfig.LOG_FILE_NAME,
+                 max_bytes: int = GameConfig.LOG_MAX_BYTES,
+                 backup_count: int = GameConfig.LOG_BACKUP_COUNT,
+                 when: Optional[str] = GameConfig.LOG_ROTATE_WHEN) -> logging.Handler:
+    """Rotating JSON-lines file handler: by time when ``when`` is set, else by size"""
+    if when:
+        handler = logging.handlers.TimedRotatingFileHandler(log_file, when=when, backupCount=backup_count,
+                                                            encoding="utf-8", delay=True)
+    else:
+        handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count,
+                                                       encoding="utf-8", delay=True)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def configure_logging(level: str = GameConfig.LOG_LEVEL,
+                      sample_rates: Optional[Dict[str, int]] = None,
+                      handler: Optional[logging.Handler] = None) -> logging.handlers.QueueListener:
+    """Route all logging through a queue to handler (default: file_handler()); idempotent"""
+    global _listener, _queue_handler
+    if _listener is not None:
+        return _listener
+
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    _queue_handler = _LazyQueueHandler(records)
+    _queue_handler.addFilter(SamplingFilter(GameConfig.LOG_SAMPLE_RATES if sample_rates is None
+                                            else sample_rates))
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(records, handler or file_handler(), respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records, stop the listener and close its handlers"""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = _queue_handler = None
+
+
+def _forget_listener():
+    """Drop logging set up by the parent: a forked child has its queue but not the thread draining it"""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+    _listener = _queue_handler = None
+
+
+# Windows has no fork
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_listener)
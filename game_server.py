@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Headless multi-session game server
+Hosts many AdvancedAdventureGame sessions in one asyncio process. Each TCP
+connection is one player: every line the client sends is one line of game
+input, and the server answers with the game's output followed by the prompt
+it is waiting on. Sessions never block on I/O, so idle players cost only
+their game state.
+"""
+
+import argparse
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Dict, Iterable, Optional
+
+from adventure_quest import AdvancedAdventureGame, DecisionLogger, GameDatabase, GameState
+from commands import COMMANDS, AmbiguousCommand
+from config import GameConfig
+from game_io import BufferIO
+from game_logging import configure_logging
+from metrics import METRICS, enable_metrics, serve_metrics
+
+log = logging.getLogger(__name__)
+
+# Operator commands that remote players must not run; metrics are served on the metrics port instead
+ADMIN_COMMANDS = ("stats",)
+
+# Input that waits on SQLite: naming the player starts a session, "load" reads a save
+# and "quit" drains the writer before ending the session
+BLOCKING_PROMPTS = ("player_name",)
+BLOCKING_COMMANDS = ("load", "quit")
+
+# Writer queue slots one command may fill (decision, autosave, input batch); with fewer
+# free, the command's writes could wait on the queue, so it runs off the loop
+WRITER_HEADROOM = 8
+
+
+def percentile(samples: Iterable[float], pct: float) -> float:
+    """Return the pct-th percentile of samples (nearest rank)"""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class GameServer:
+    """Runs many game sessions over a line-based TCP protocol"""
+
+    def __init__(self, db_name: str = GameConfig.DATABASE_NAME,
+                 host: str = GameConfig.SERVER_HOST, port: int = GameConfig.SERVER_PORT,
+                 metrics_port: Optional[int] = None, config: type = GameConfig):
+        self.host = host
+        self.port = port
+        self.metrics_port = metrics_port
+        self.metrics_http = None
+        self.config = config
+        self.db = GameDatabase(db_name)
+        self.decisions = DecisionLogger(self.db)
+        self.sessions: Dict[int, AdvancedAdventureGame] = {}
+        self.latencies = deque(maxlen=GameConfig.SERVER_LATENCY_SAMPLES)
+        self.commands = 0
+        self.player_commands = COMMANDS.without(*ADMIN_COMMANDS)
+        self.server = None
+        self._connection_ids = itertools.count(1)
+
+    def new_game(self) -> AdvancedAdventureGame:
+        """Create a headless game that shares the server's database writer"""
+        return AdvancedAdventureGame(db=self.db, decisions=self.decisions, io=BufferIO(), config=self.config,
+                                     commands=self.player_commands)
+
+    async def start(self) -> int:
+        """Start listening and return the bound port"""
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port,
+                                                 backlog=GameConfig.SERVER_BACKLOG)
+        self.port = self.server.sockets[0].getsockname()[1]
+        log.info("Game server listening on %s:%d", self.host, self.port)
+        if self.metrics_port is not None:
+            self.metrics_http = serve_metrics(self.host, self.metrics_port)
+            self.metrics_port = self.metrics_http.server_address[1]
+            log.info("Metrics served on http://%s:%d/metrics", self.host, self.metrics_port)
+        return self.port
+
+    async def stop(self):
+        """Stop accepting players and flush pending writes"""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.metrics_http:
+            self.metrics_http.shutdown()
+            self.metrics_http.server_close()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.decisions.close)
+        self.db.close()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Host one player's session for the lifetime of the connection"""
+        await self.host_session(reader, writer)
+
+    async def host_session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                           player_name: Optional[str] = None, resume: bool = False):
+        """Run one session over a connection
+
+        player_name answers the name prompt when the client already sent it;
+        with resume the player continues from their last autosave.
+        """
+        connection_id = next(self._connection_ids)
+        game = self.new_game()
+        self.sessions[connection_id] = game
+
+        loop = asyncio.get_running_loop()
+        try:
+            game.display_welcome()
+            game.initialize_player()
+            if player_name is not None:
+                await loop.run_in_executor(None, self.start_session, game, player_name, resume)
+            await self.send(game, writer)
+
+            while game.game_state == GameState.PLAYING:
+                line = await reader.readline()
+                if not line:
+                    break
+
+                start = time.perf_counter()
+                text = line.decode("utf-8", errors="replace")
+                try:
+                    if self.blocks(game, text):
+                        await loop.run_in_executor(None, game.process_input, text)
+                    else:
+                        game.process_input(text)
+                except Exception as e:
+                    game.io.write(f"An error occurred: {e}")
+                    log.exception("Game error: %s", e)
+                self.record_latency(time.perf_counter() - start)
+
+                await self.send(game, writer)
+
+            if game.game_state != GameState.PLAYING:
+                game.display_final_score()
+                await self.send(game, writer)
+        except ConnectionError:
+            pass
+        finally:
+            del self.sessions[connection_id]
+            # Ending the session waits on the decision writer, so keep it off the loop
+            await loop.run_in_executor(None, game.close_session)
+            writer.close()
+
+    @staticmethod
+    def start_session(game: AdvancedAdventureGame, player_name: str, resume: bool):
+        """Name the player, optionally resuming their autosave (blocks on the database)"""
+        game.process_input(player_name)
+        if resume:
+            game.load_game(autosaved=True)
+
+    def blocks(self, game: AdvancedAdventureGame, line: str) -> bool:
+        """Whether handling line waits on the database, so it must run off the event loop"""
+        if self.decisions.saturated(WRITER_HEADROOM):
+            return True
+        if game.pending_prompt:
+            return game.pending_prompt.kind in BLOCKING_PROMPTS
+        try:
+            command, _ = game.commands.parse(line)
+        except AmbiguousCommand:
+            return False
+        return command is not None and command.name in BLOCKING_COMMANDS
+
+    async def send(self, game: AdvancedAdventureGame, writer: asyncio.StreamWriter):
+        """Send buffered output plus the prompt the session is waiting on"""
+        prompt = game.next_prompt().text if game.game_state == GameState.PLAYING else ""
+        writer.write((game.io.drain() + "\n" + prompt).encode("utf-8"))
+        await writer.drain()
+
+    def record_latency(self, seconds: float):
+        """Record how long one command took to process"""
+        self.commands += 1
+        self.latencies.append(seconds)
+        METRICS.observe("server_command_seconds", seconds)
+
+    def stats(self) -> Dict[str, float]:
+        """Return session count and command latency percentiles"""
+        samples = list(self.latencies)
+        return {
+            "sessions": len(self.sessions),
+            "commands": self.commands,
+            "p50_ms": 1000 * percentile(samples, 50),
+            "p99_ms": 1000 * percentile(samples, 99),
+        }
+
+    def report(self):
+        """Print a one-line latency report"""
+        stats = self.stats()
+        print(f"📊 sessions={stats['sessions']} commands={stats['commands']} "
+              f"p50={stats['p50_ms']:.3f}ms p99={stats['p99_ms']:.3f}ms")
+
+    async def serve_forever(self, report_interval: float = 0):
+        """Serve players until cancelled, printing a report every report_interval seconds"""
+        await self.start()
+        print(f"🌐 Adventure server listening on {self.host}:{self.port}")
+        try:
+            while True:
+                await asyncio.sleep(report_interval or 3600)
+                if report_interval:
+                    self.report()
+        finally:
+            self.report()
+            await self.stop()
+
+
+def main():
+    """Run the game server from the command line"""
+    parser = argparse.ArgumentParser(description="Headless multi-session adventure server")
+    parser.add_argument("--host", default=GameConfig.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=GameConfig.SERVER_PORT)
+    parser.add_argument("--db", default=GameConfig.DATABASE_NAME, help="SQLite database file")
+    parser.add_argument("--report-interval", type=float, default=60,
+                        help="seconds between latency reports (0 to disable)")
+    parser.add_argument("--metrics-port", type=int,
+                        default=GameConfig.METRICS_PORT if GameConfig.METRICS_ENABLED else None,
+                        help="record metrics and serve them for Prometheus on this port")
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.metrics_port is not None:
+        enable_metrics()
+    server = GameServer(args.db, args.host, args.port, args.metrics_port)
+    try:
+        asyncio.run(server.serve_forever(args.report_interval))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped.")
+
+
+if __name__ == "__main__":
+    main()
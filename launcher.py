@@ -9,6 +9,8 @@ import sys
 import subprocess
 from pathlib import Path
 
+from config import GameConfig
+
 def check_requirements():
     """Check if all required components are available"""
     required_modules = ['sqlite3', 'json', 'logging', 'datetime', 'dataclasses', 'typing', 'enum', 'random']
@@ -22,7 +24,7 @@ def check_requirements():
     
     if missing_modules:
         print(f"❌ Missing required modules: {', '.join(missing_modules)}")
-        print("Please install Python 3.7+ with standard library")
+        print("Please install Python 3.9+ with standard library")
         return False
     
     return True
@@ -35,7 +37,7 @@ def display_banner():
     ╠══════════════════════════════════════════════════╣
     ║  Advanced Text-Based Adventure Game              ║
     ║  Developed for Virtunexa Internship              ║
-    ║  Python 3.7+ Required                           ║
+    ║  Python 3.9+ Required                           ║
     ╚══════════════════════════════════════════════════╝
     """
     print(banner)
@@ -48,7 +50,9 @@ def show_menu():
     print("3. Check System Requirements")
     print("4. View Game Statistics")
     print("5. Clean Game Data")
-    print("6. Exit")
+    print("6. Export Analytics Data")
+    print("7. Profile a Session")
+    print("8. Exit")
     print("\n" + "─" * 50)
 
 def start_game():
@@ -104,10 +108,10 @@ def check_system():
     python_version = sys.version_info
     print(f"Python Version: {python_version.major}.{python_version.minor}.{python_version.micro}")
     
-    if python_version >= (3, 7):
+    if python_version >= (3, 9):
         print("✅ Python version is compatible")
     else:
-        print("❌ Python 3.7+ required")
+        print("❌ Python 3.9+ required")
     
     # Required modules
     print("\nChecking required modules...")
@@ -129,55 +133,31 @@ def check_system():
 def view_statistics():
     """View game statistics from database"""
     try:
-        import sqlite3
-        from pathlib import Path
+        from adventure_quest import GameDatabase
         
-        db_file = Path("adventure_game.db")
+        db_file = Path(GameConfig.DATABASE_NAME)
         if not db_file.exists():
             print("📊 No game statistics available yet.")
             print("Play the game first to generate statistics!")
             return
         
-        conn = sqlite3.connect("adventure_game.db")
-        cursor = conn.cursor()
+        # Summary tables are kept current as sessions start and end
+        db = GameDatabase(GameConfig.DATABASE_NAME)
+        stats = db.statistics(top=5)
+        db.close()
         
         print("📊 Game Statistics:")
         print("─" * 25)
+        print(f"Total Game Sessions: {stats['sessions']}")
+        print(f"Victories: {stats['victories']}")
+        if stats["average_score"]:
+            print(f"Average Score: {stats['average_score']:.1f}")
         
-        # Total sessions
-        cursor.execute("SELECT COUNT(*) FROM game_sessions")
-        total_sessions = cursor.fetchone()[0]
-        print(f"Total Game Sessions: {total_sessions}")
-        
-        # Completed games
-        cursor.execute("SELECT COUNT(*) FROM game_sessions WHERE game_state = 'victory'")
-        victories = cursor.fetchone()[0]
-        print(f"Victories: {victories}")
-        
-        # Average score
-        cursor.execute("SELECT AVG(final_score) FROM game_sessions WHERE final_score IS NOT NULL")
-        avg_score = cursor.fetchone()[0]
-        if avg_score:
-            print(f"Average Score: {avg_score:.1f}")
-        
-        # Top players
-        cursor.execute("""
-            SELECT player_name, MAX(final_score) as best_score 
-            FROM game_sessions 
-            WHERE final_score IS NOT NULL 
-            GROUP BY player_name 
-            ORDER BY best_score DESC 
-            LIMIT 5
-        """)
-        
-        top_players = cursor.fetchall()
-        if top_players:
+        if stats["top_players"]:
             print("\n🏆 Top Players:")
-            for i, (name, score) in enumerate(top_players, 1):
+            for i, (name, score) in enumerate(stats["top_players"], 1):
                 print(f"  {i}. {name}: {score} points")
         
-        conn.close()
-        
     except Exception as e:
         print(f"❌ Error reading statistics: {e}")
 
@@ -186,23 +166,23 @@ def clean_data():
     print("🧹 Game Data Cleanup:")
     print("─" * 25)
     
+    # Saves are stored in the game database
     files_to_clean = [
-        ("adventure_game.db", "Game database"),
-        ("game_logs.txt", "Game logs"),
+        (GameConfig.DATABASE_NAME, "Game database and saves"),
+        (GameConfig.DATABASE_NAME + "-wal", "Database write-ahead log"),
+        (GameConfig.DATABASE_NAME + "-shm", "Database shared memory"),
+        (GameConfig.LOG_FILE_NAME, "Game logs"),
     ]
-    
-    # Find save files
-    save_files = list(Path(".").glob("save_*.json"))
+    # Rotated logs: game_logs.txt.1, ... or game_logs.txt.2024-06-01 ...
+    log_file = Path(GameConfig.LOG_FILE_NAME)
+    files_to_clean += [(str(path), "Rotated game logs") for path in sorted(log_file.parent.glob(log_file.name + ".*"))]
     
     print("Files that will be removed:")
     for file_path, description in files_to_clean:
         if Path(file_path).exists():
             print(f"  • {description} ({file_path})")
     
-    for save_file in save_files:
-        print(f"  • Save file ({save_file.name})")
-    
-    if not any(Path(f[0]).exists() for f in files_to_clean) and not save_files:
+    if not any(Path(f[0]).exists() for f in files_to_clean):
         print("🎉 No data files to clean!")
         return
     
@@ -220,20 +200,43 @@ def clean_data():
                 except Exception as e:
                     print(f"❌ Error removing {description}: {e}")
         
-        for save_file in save_files:
-            try:
-                save_file.unlink()
-                print(f"✅ Removed {save_file.name}")
-                cleaned_count += 1
-            except Exception as e:
-                print(f"❌ Error removing {save_file.name}: {e}")
-        
         print(f"\n🎉 Cleanup complete! Removed {cleaned_count} files.")
     else:
         print("❌ Cleanup cancelled.")
 
+def export_data():
+    """Export sessions and decisions for analysis without touching the live tables"""
+    print("📤 Analytics Export:")
+    print("─" * 25)
+    try:
+        import export
+        export.main([])
+    except Exception as e:
+        print(f"❌ Error exporting data: {e}")
+
+def profile_game(argv=None):
+    """Profile a scripted or recorded session and write hotspot reports"""
+    print("⏱️  Session Profiler:")
+    print("─" * 25)
+    try:
+        import profiling
+        if argv is None:
+            profiler = input("Profiler - (c)Profile or (s)ampling [c]: ").strip().lower()
+            session = input("Recorded session id (blank for the scripted session): ").strip()
+            argv = ["--profiler", "sample" if profiler.startswith("s") else "cprofile"]
+            if session:
+                argv += ["--session", session]
+        profiling.main(argv)
+    except Exception as e:
+        print(f"❌ Error profiling: {e}")
+
 def main():
     """Main launcher function"""
+    # `launcher.py --profile [profiling options]` profiles without the menu
+    if len(sys.argv) > 1 and sys.argv[1] == "--profile":
+        profile_game(sys.argv[2:])
+        return
+    
     if not check_requirements():
         input("\nPress Enter to exit...")
         return
@@ -243,7 +246,7 @@ def main():
             display_banner()
             show_menu()
             
-            choice = input("Select an option (1-6): ").strip()
+            choice = input("Select an option (1-8): ").strip()
             
             if choice == "1":
                 start_game()
@@ -256,10 +259,14 @@ def main():
             elif choice == "5":
                 clean_data()
             elif choice == "6":
+                export_data()
+            elif choice == "7":
+                profile_game()
+            elif choice == "8":
                 print("\n👋 Thanks for using the Adventure Game Launcher!")
                 break
             else:
-                print("❌ Invalid option. Please choose 1-6.")
+                print("❌ Invalid option. Please choose 1-8.")
             
             if choice != "1":  # Don't pause after starting game
                 input("\nPress Enter to continue...")
@@ -0,0 +1,305 @@
+# metrics.py
+"""
+In-process metrics for the adventure game
+Counters and latency histograms keyed by name and labels, kept in one
+registry (METRICS). Game and database methods are marked with @timed and
+are only wrapped with timers while METRICS.enabled is set, so disabled
+metrics add no per-call cost.
+
+The registry can be printed (the ``stats`` command), rendered in the
+Prometheus text format (served over HTTP by serve_metrics in server mode)
+and dumped to a JSON file at exit.
+"""
+
+import atexit
+import functools
+import json
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from config import GameConfig
+
+# Histogram bucket upper bounds in seconds: 1µs doubling up to ~17s
+BUCKETS = tuple(1e-6 * 2 ** i for i in range(25))
+
+DESCRIPTIONS = {
+    "game_call_seconds": "Time spent in game methods",
+    "db_call_seconds": "Time spent in GameDatabase calls",
+    "combat_call_seconds": "Time spent resolving combat",
+    "render_call_seconds": "Time spent rendering game output",
+    "world_call_seconds": "Time spent in world lookups",
+    "server_command_seconds": "Time to process one line of client input",
+    "game_combats_total": "Combat encounters by outcome",
+    "supervisor_connections_total": "Connections routed to each worker",
+    "supervisor_worker_restarts_total": "Worker processes restarted after dying",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _key(name: str, labels: Labels) -> str:
+    """Prometheus-style series name, e.g. db_call_seconds{call="end_session"}"""
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    """Bucketed distribution of observed values"""
+
+    __slots__ = ("counts", "count", "sum", "_lock")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        index = bisect_left(BUCKETS, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def merge(self, counts: List[int], total: float):
+        """Add another histogram's bucket counts and sum"""
+        with self._lock:
+            for index, count in enumerate(counts):
+                self.counts[index] += count
+            self.count += sum(counts)
+            self.sum += total
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound of the bucket holding the pct-th percentile"""
+        if not self.count:
+            return 0.0
+        rank, seen = pct / 100 * self.count, 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+        }
+
+
+class Metrics:
+    """Registry of counters and histograms"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        """The histogram for name and labels, created on first use"""
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram())
+        return histogram
+
+    def observe(self, name: str, value: float, **labels: str):
+        if self.enabled:
+            self.histogram(name, **labels).observe(value)
+
+    def count(self, name: str, amount: float = 1, **labels: str):
+        if self.enabled:
+            key = (name, tuple(sorted(labels.items())))
+            with self._lock:
+                self.counters[key] = self.counters.get(key, 0) + amount
+
+    def reset(self):
+        """Forget every recorded value"""
+        with self._lock:
+            self.counters.clear()
+            for histogram in self.histograms.values():
+                histogram.clear()
+
+    def series(self):
+        """Sorted (key, value) lists of counters and of histograms that have data"""
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((item for item in self.histograms.items() if item[1].count), key=lambda kv: kv[0])
+        return counters, histograms
+
+    def export(self) -> Dict[str, List]:
+        """Raw counters and histogram buckets as JSON-friendly lists, for merge()"""
+        counters, histograms = self.series()
+        return {
+            "counters": [[name, labels, value] for (name, labels), value in counters],
+            "histograms": [[name, labels, histogram.counts, histogram.sum] for (name, labels), histogram in histograms],
+        }
+
+    def merge(self, exported: Dict[str, List]):
+        """Add another registry's export() into this one, whether or not this one is enabled"""
+        for name, labels, value in exported["counters"]:
+            key = (name, tuple(map(tuple, labels)))
+            with self._lock:
+                self.counters[key] = self.counters.get(key, 0) + value
+        for name, labels, counts, total in exported["histograms"]:
+            self.histogram(name, **dict(labels)).merge(counts, total)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """JSON-friendly counters and histogram summaries"""
+        counters, histograms = self.series()
+        return {
+            "counters": {_key(name, labels): value for (name, labels), value in counters},
+            "histograms": {_key(name, labels): histogram.summary() for (name, labels), histogram in histograms},
+        }
+
+    def report(self) -> List[str]:
+        """Human-readable lines: counters, then latency summaries in milliseconds"""
+        snapshot = self.snapshot()
+        lines = [f"{key:<48} {value:>10,g}" for key, value in snapshot["counters"].items()]
+        for key, summary in snapshot["histograms"].items():
+            mean = summary["sum"] / summary["count"]
+            lines.append(f"{key:<48} n={summary['count']:<8,} mean={1000 * mean:.3f}ms "
+                         f"p50≤{1000 * summary['p50']:.3f}ms p99≤{1000 * summary['p99']:.3f}ms")
+        return lines
+
+    def render_prometheus(self) -> str:
+        """Every series in the Prometheus text exposition format"""
+        lines = []
+        described = set()
+
+        def header(name: str, kind: str):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        counters, histograms = self.series()
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{_key(name, labels)} {value:g}")
+        for (name, labels), histogram in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float("inf"),), histogram.counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:.6g}"
+                lines.append(f"{_key(name + '_bucket', labels + (('le', le),))} {cumulative}")
+            lines.append(f"{_key(name + '_sum', labels)} {histogram.sum:.9g}")
+            lines.append(f"{_key(name + '_count', labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str):
+        """Write the snapshot as JSON"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+def timed(name: str, **labels: str):
+    """Mark a method of an @instrumented class to be timed into histogram name{labels}"""
+    def decorate(func):
+        func.metric = (name, labels)
+        return func
+    return decorate
+
+
+def _timing_wrapper(func):
+    name, labels = func.metric
+    histogram = METRICS.histogram(name, **labels)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            histogram.observe(perf_counter() - start)
+    return wrapper
+
+
+# Classes whose @timed methods are wrapped while metrics are enabled
+_instrumented: List[type] = []
+
+
+def _apply_instrumentation(cls: type, enabled: bool):
+    for attr, member in list(vars(cls).items()):
+        if not hasattr(member, "metric"):
+            continue
+        original = getattr(member, "__wrapped__", member)
+        setattr(cls, attr, _timing_wrapper(original) if enabled else original)
+
+
+def instrumented(cls: type) -> type:
+    """Class decorator: time the class's @timed methods whenever metrics are enabled
+
+    Methods are only wrapped while metrics are on, so disabled metrics cost
+    nothing per call.
+    """
+    _instrumented.append(cls)
+    if METRICS.enabled:
+        _apply_instrumentation(cls, True)
+    return cls
+
+
+class _Registry(Metrics):
+    """The process-wide registry; switching it on or off (un)wraps timed methods"""
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, value: bool):
+        self._enabled = bool(value)
+        for cls in _instrumented:
+            _apply_instrumentation(cls, self._enabled)
+
+
+METRICS = _Registry(GameConfig.METRICS_ENABLED)
+
+
+def enable_metrics(dump_file: Optional[str] = GameConfig.METRICS_FILE):
+    """Start recording, and write the metrics to dump_file at exit if given"""
+    METRICS.enabled = True
+    if dump_file:
+        atexit.register(METRICS.dump, dump_file)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.server.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes should not flood the game log
+
+
+def serve_metrics(host: str = GameConfig.SERVER_HOST, port: int = GameConfig.METRICS_PORT,
+                  registry: Metrics = METRICS) -> ThreadingHTTPServer:
+    """Serve registry at /metrics from a daemon thread; call shutdown() on the result to stop
+
+    The registry can be swapped later by assigning the result's ``registry``.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.registry = registry
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
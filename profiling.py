@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Session profiler
+Runs a scripted or recorded session headlessly, with a fresh scratch
+database, and reports where the time goes:
+
+- a hotspot report, from cProfile (exact call counts) or from a sampling
+  profiler (low overhead, no instrumentation)
+- a collapsed-stack file (``frame;frame;frame count`` per line) for
+  flamegraph.pl, speedscope or inferno, when sampling
+- per-subsystem timing for world lookup, combat, database and rendering,
+  taken from the metrics timers in a separate unprofiled pass
+
+Recorded sessions are replayed from their seed and inputs like replay.py
+does, but with output rendered so rendering cost is included.
+"""
+
+import argparse
+import cProfile
+import io
+import os
+import pstats
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from adventure_quest import AdvancedAdventureGame, GameDatabase, GameState, connect_readonly
+from config import GameConfig
+from game_io import BufferIO
+from metrics import METRICS
+from replay import load_session
+from simulator import POLICIES
+
+# Commands for the scripted session; prompts in between are answered by the attack policy
+SCRIPT = [
+    "look", "status", "inventory", "help", "take rusty sword", "hint",
+    "go east", "take magic crystal", "take gold coin", "go ancient", "take gold coin", "go east", "go forest",
+    "go west", "take ancient key", "go waterfall", "go west", "go forest",
+    "go north", "take health potion", "go hidden", "go north", "status",
+    "travel treasure chamber", "look", "take enchanted bow", "inventory", "stats",
+]
+
+# Metric families that make up each subsystem
+SUBSYSTEMS = {
+    "world lookup": "world_call_seconds",
+    "combat": "combat_call_seconds",
+    "database": "db_call_seconds",
+    "rendering": "render_call_seconds",
+}
+
+Workload = Callable[[AdvancedAdventureGame], None]
+
+
+def scripted_workload(script: Sequence[str] = SCRIPT, policy: str = "attack") -> Workload:
+    """Play the script, answering any prompt with policy"""
+    choose = POLICIES[policy]
+
+    def play(game: AdvancedAdventureGame):
+        game.process_input("Profiler")
+        for command in script:
+            while game.pending_prompt and game.game_state == GameState.PLAYING:
+                game.process_input(choose(game, game.pending_prompt, game.rng))
+            if game.game_state != GameState.PLAYING:
+                break
+            game.process_input(command)
+            game.io.drain()
+    return play
+
+
+def recorded_workload(inputs: Sequence[Tuple[str, str]]) -> Workload:
+    """Feed a recorded session's input lines"""
+    def play(game: AdvancedAdventureGame):
+        for _, line in inputs:
+            if game.game_state != GameState.PLAYING:
+                break
+            game.process_input(line)
+            game.io.drain()
+    return play
+
+
+def run_workload(workload: Workload, seeds: Sequence[int], db_name: str) -> float:
+    """Play the workload once per seed on fresh games; return wall seconds"""
+    db = GameDatabase(db_name)
+    try:
+        start = time.perf_counter()
+        for seed in seeds:
+            game = AdvancedAdventureGame(db=db, decisions=db, io=BufferIO(), seed=seed)
+            game.display_welcome()
+            game.initialize_player()
+            workload(game)
+            game.close_session()
+            game.io.drain()
+        return time.perf_counter() - start
+    finally:
+        db.close()
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack every interval seconds from a background thread"""
+
+    def __init__(self, interval: float = 0.001, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def write_collapsed(self, path: Path):
+        """One ``root;...;leaf count`` line per distinct stack"""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def report(self, top: int = 25) -> str:
+        """Hotspots by self samples, with inclusive samples alongside"""
+        total = sum(self.stacks.values()) or 1
+        own, inclusive = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            own[frames[-1]] += count
+            for frame in set(frames):
+                inclusive[frame] += count
+        lines = [f"{total:,} samples every {1000 * self.interval:g}ms", f"{'self':>7} {'total':>7}  frame"]
+        for frame, count in own.most_common(top):
+            lines.append(f"{count / total:>7.1%} {inclusive[frame] / total:>7.1%}  {frame}")
+        return "\n".join(lines)
+
+
+def subsystem_timing(workload: Workload, seeds: Sequence[int], db_name: str) -> Dict[str, Dict[str, float]]:
+    """Inclusive time per subsystem from the metrics timers, plus the session total"""
+    previous = METRICS.enabled
+    METRICS.reset()
+    METRICS.enabled = True
+    try:
+        wall = run_workload(workload, seeds, db_name)
+        histograms = METRICS.snapshot()["histograms"]
+    finally:
+        METRICS.enabled = previous
+        METRICS.reset()
+
+    timing = {}
+    for subsystem, family in SUBSYSTEMS.items():
+        series = [summary for key, summary in histograms.items() if key.split("{")[0] == family]
+        seconds = sum(summary["sum"] for summary in series)
+        timing[subsystem] = {"calls": sum(summary["count"] for summary in series),
+                             "seconds": seconds, "share": seconds / wall if wall else 0.0}
+    timing["session total"] = {"calls": len(seeds), "seconds": wall, "share": 1.0}
+    return timing
+
+
+def format_timing(timing: Dict[str, Dict[str, float]]) -> str:
+    lines = [f"{'subsystem':<16} {'calls':>9} {'ms':>10} {'share':>7}"]
+    for subsystem, row in timing.items():
+        lines.append(f"{subsystem:<16} {row['calls']:>9,} {1000 * row['seconds']:>10.2f} {row['share']:>7.1%}")
+    return "\n".join(lines)
+
+
+def profile_session(workload: Workload, seeds: Sequence[int], profiler: str = "cprofile",
+                    out_dir: str = GameConfig.PROFILE_DIR, top: int = 25, interval: float = 0.001) -> Dict[str, Path]:
+    """Profile the workload and write the reports; returns the files written"""
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    stem = out / f"profile-{datetime.now():%Y%m%d-%H%M%S}-{profiler}"
+    files = {"report": stem.with_suffix(".txt")}
+
+    with tempfile.TemporaryDirectory() as scratch:
+        timing = subsystem_timing(workload, seeds, os.path.join(scratch, "timing.db"))
+
+        profile_db = os.path.join(scratch, "profile.db")
+        if profiler == "cprofile":
+            profile = cProfile.Profile()
+            profile.runcall(run_workload, workload, seeds, profile_db)
+            files["pstats"] = stem.with_suffix(".pstats")
+            profile.dump_stats(files["pstats"])
+            text = io.StringIO()
+            stats = pstats.Stats(profile, stream=text).strip_dirs()
+            stats.sort_stats("tottime").print_stats(top)
+            stats.sort_stats("cumulative").print_stats(top)
+            hotspots = text.getvalue()
+        else:
+            with SamplingProfiler(interval) as sampler:
+                run_workload(workload, seeds, profile_db)
+            files["collapsed"] = stem.with_suffix(".collapsed")
+            sampler.write_collapsed(files["collapsed"])
+            hotspots = sampler.report(top)
+
+    files["report"].write_text(f"Per-subsystem timing ({len(seeds)} sessions, inclusive)\n"
+                               f"{format_timing(timing)}\n\nHotspots ({profiler})\n{hotspots}\n",
+                               encoding="utf-8")
+    return files
+
+
+def main(argv: Optional[List[str]] = None):
+    """Profile a session from the command line"""
+    parser = argparse.ArgumentParser(description="Profile a scripted or recorded game session")
+    parser.add_argument("--profiler", choices=["cprofile", "sample"], default="cprofile")
+    parser.add_argument("--session", type=int, help="profile this recorded session instead of the script")
+    parser.add_argument("--script", help="file with one command per line to use as the script")
+    parser.add_argument("--db", default=GameConfig.DATABASE_NAME, help="database holding recorded sessions")
+    parser.add_argument("--repeat", type=int, default=20, help="times to play the session")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first scripted session")
+    parser.add_argument("--interval", type=float, default=0.001, help="sampling interval in seconds")
+    parser.add_argument("--top", type=int, default=25, help="hotspots to report")
+    parser.add_argument("--out", default=GameConfig.PROFILE_DIR, help="output directory")
+    args = parser.parse_args(argv)
+
+    seeds = range(args.seed, args.seed + args.repeat)
+    if args.session is not None:
+        conn = connect_readonly(args.db)
+        session = load_session(conn, args.session)
+        conn.close()
+        if session is None:
+            print(f"❌ Session {args.session} has no recorded seed and inputs.")
+            return
+        # A recording only reproduces under its own seed
+        workload, seeds = recorded_workload(session["inputs"]), [session["seed"]] * args.repeat
+    elif args.script:
+        workload = scripted_workload(Path(args.script).read_text(encoding="utf-8").splitlines())
+    else:
+        workload = scripted_workload()
+
+    files = profile_session(workload, seeds, args.profiler, args.out, args.top, args.interval)
+    print(files["report"].read_text(encoding="utf-8"))
+    for kind, path in files.items():
+        print(f"📝 {kind}: {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Deterministic session replay
+Every recorded session stores its RNG seed and every line of input, each
+tagged with the prompt it answered. Replaying feeds those lines to a fresh
+headless game seeded with the same seed, which reproduces the session
+exactly as long as the rules and world are unchanged. Replaying a whole day
+with GameConfig overrides shows which sessions a rule change would alter.
+
+Replays run against a scratch in-memory database, so saves made during the
+session are reproduced but saves from earlier sessions are not available.
+Sessions resumed from an autosave are recorded without a seed and skipped.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import random
+import sqlite3
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from adventure_quest import COMMAND_PROMPT, AdvancedAdventureGame, GameDatabase, GameState, connect_readonly
+from config import GameConfig
+from game_io import NullIO
+from simulator import make_config, parse_override
+
+
+def load_session(conn: sqlite3.Connection, session_id: int) -> Optional[Dict]:
+    """A session's seed, recorded outcome and inputs, or None if it can't be replayed"""
+    row = conn.execute('''
+        SELECT seed, final_score, game_state FROM game_sessions WHERE id = ?
+    ''', (session_id,)).fetchone()
+    if row is None or row[0] is None:
+        return None
+
+    inputs = conn.execute('''
+        SELECT prompt, line FROM session_inputs WHERE session_id = ? ORDER BY seq
+    ''', (session_id,)).fetchall()
+    return {"id": session_id, "seed": row[0], "final_score": row[1], "game_state": row[2],
+            "inputs": inputs}
+
+
+def sessions_on(conn: sqlite3.Connection, day: date) -> List[int]:
+    """Ids of replayable sessions started on day"""
+    start, end = day.isoformat(), (day + timedelta(days=1)).isoformat()
+    return [session_id for session_id, in conn.execute('''
+        SELECT id FROM game_sessions
+        WHERE start_time >= ? AND start_time < ? AND seed IS NOT NULL
+        ORDER BY id
+    ''', (start, end))]
+
+
+def replay_inputs(seed: int, inputs: Sequence[Tuple[str, str]], config: type = GameConfig) -> Dict:
+    """Re-run recorded inputs headlessly and report where the game ended up
+
+    ``diverged_at`` is the index of the first input whose recorded prompt
+    differs from the prompt the replay is waiting on, or None.
+    """
+    db = GameDatabase(":memory:")
+    game = AdvancedAdventureGame(db=db, decisions=db, io=NullIO(),
+                                 rng=random.Random(seed), config=config)
+    diverged_at = None
+
+    try:
+        game.initialize_player()
+        for index, (prompt, line) in enumerate(inputs):
+            if game.game_state != GameState.PLAYING:
+                diverged_at = index
+                break
+            waiting_on = game.pending_prompt.kind if game.pending_prompt else COMMAND_PROMPT.kind
+            if waiting_on != prompt and diverged_at is None:
+                diverged_at = index
+            game.process_input(line)
+        game.close_session()
+    finally:
+        db.close()
+
+    player = game.player
+    return {
+        "final_score": game.game_score,
+        "game_state": game.game_state.value,
+        "location": game.current_location,
+        "level": player.level if player else None,
+        "health": player.health if player else None,
+        "inputs": len(inputs),
+        "diverged_at": diverged_at,
+    }
+
+
+def replay_session(session: Dict, config: type = GameConfig) -> Dict:
+    """Replay one loaded session and compare it with what was recorded"""
+    result = replay_inputs(session["seed"], session["inputs"], config)
+    result["id"] = session["id"]
+    result["recorded_score"] = session["final_score"]
+    result["recorded_state"] = session["game_state"]
+    # Sessions that were never closed have no recorded score
+    result["matches"] = (result["diverged_at"] is None
+                         and result["game_state"] == session["game_state"]
+                         and session["final_score"] in (None, result["final_score"]))
+    return result
+
+
+_worker_conn: Optional[sqlite3.Connection] = None
+
+
+def _replay_batch(task: Tuple) -> List[Dict]:
+    """Worker entry point: replay a batch of session ids"""
+    global _worker_conn
+    db_name, session_ids, overrides = task
+    if _worker_conn is None:
+        _worker_conn = connect_readonly(db_name)
+    config = make_config(overrides)
+
+    # Replays should not flood the game log
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.INFO)
+    try:
+        results = []
+        for session_id in session_ids:
+            session = load_session(_worker_conn, session_id)
+            if session is not None:
+                results.append(replay_session(session, config))
+        return results
+    finally:
+        logging.disable(previous_disable)
+
+
+def replay_sessions(db_name: str, session_ids: Sequence[int], workers: int = 1,
+                    overrides: Optional[Dict[str, object]] = None, batch_size: int = 50) -> List[Dict]:
+    """Replay sessions over a process pool; results come back in session order"""
+    overrides = overrides or {}
+    make_config(overrides)  # Fail early on unknown settings
+    tasks = [(db_name, list(session_ids[i:i + batch_size]), overrides)
+             for i in range(0, len(session_ids), batch_size)]
+
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            batches = pool.map(_replay_batch, tasks)
+    else:
+        batches = [_replay_batch(task) for task in tasks]
+    return [result for batch in batches for result in batch]
+
+
+def main():
+    """Replay sessions from the command line"""
+    parser = argparse.ArgumentParser(description="Replay recorded game sessions")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--session", type=int, action="append", help="session id (repeatable)")
+    target.add_argument("--day", type=date.fromisoformat, help="replay every session started on YYYY-MM-DD")
+    parser.add_argument("--db", default=GameConfig.DATABASE_NAME, help="SQLite database file")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a GameConfig setting")
+    parser.add_argument("--verbose", action="store_true", help="list every session, not just changed ones")
+    args = parser.parse_args()
+
+    if args.day:
+        conn = connect_readonly(args.db)
+        session_ids = sessions_on(conn, args.day)
+        conn.close()
+    else:
+        session_ids = args.session
+
+    overrides = dict(parse_override(item) for item in args.set)
+    results = replay_sessions(args.db, session_ids, args.workers, overrides)
+
+    changed = [result for result in results if not result["matches"]]
+    print(f"🔁 Replayed {len(results):,} sessions: {len(results) - len(changed):,} identical, "
+          f"{len(changed):,} changed")
+    for result in (results if args.verbose else changed):
+        marker = "✅" if result["matches"] else "❌"
+        print(f"  {marker} session {result['id']}: recorded {result['recorded_state']} "
+              f"score {result['recorded_score']}, replay {result['game_state']} "
+              f"score {result['final_score']}"
+              + (f", diverged at input {result['diverged_at']}" if result["diverged_at"] is not None else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+# saves.py
+"""
+Save storage for the adventure game
+Each player has two kinds of save: the manual save written by the 'save'
+command and restored by 'load', and the autosave that resumes a session
+where it left off. An autosave is a snapshot of the game state plus an
+append-only journal of the deltas written since that snapshot. Snapshots are compact JSON
+compressed with zlib; journal records are one compact JSON line each, so an
+autosave costs only the size of what changed. Once the journal reaches
+GameConfig.SAVE_COMPACT_EVERY records it is folded into a fresh snapshot,
+which keeps restore time bounded.
+
+DatabaseSaveStore, the game's default, keeps snapshots and journal records
+as blobs in GameDatabase, written on the decision logger's thread;
+FileSaveStore keeps them as files.
+
+State is a flat dict of sections (player, location, inventory, ...). A
+delta holds the sections that changed, except that the world overlay
+sections hold only the locations that changed. Restoring a save is the
+snapshot with each delta applied in order.
+"""
+
+import json
+import os
+import zlib
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import quote
+
+from config import GameConfig
+
+# Snapshot header; bump the digit when the state layout changes
+SNAPSHOT_MAGIC = b"AQS1"
+
+# Sections keyed by location whose deltas merge instead of replacing
+LOCATION_SECTIONS = ("removed_items", "defeated_enemies", "triggered_events")
+
+
+class SaveError(ValueError):
+    """Raised when a save cannot be decoded"""
+
+
+def encode_snapshot(state: Dict) -> bytes:
+    """Compact, compressed snapshot bytes"""
+    payload = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return SNAPSHOT_MAGIC + zlib.compress(payload)
+
+
+def decode_snapshot(data: bytes) -> Dict:
+    """Inverse of encode_snapshot"""
+    if not data.startswith(SNAPSHOT_MAGIC):
+        raise SaveError("Not an adventure save snapshot")
+    try:
+        return json.loads(zlib.decompress(data[len(SNAPSHOT_MAGIC):]))
+    except (zlib.error, ValueError) as e:
+        raise SaveError(f"Corrupt save snapshot: {e}") from e
+
+
+def encode_delta(delta: Dict) -> bytes:
+    """One journal record"""
+    return json.dumps(delta, separators=(",", ":")).encode("utf-8")
+
+
+def state_delta(old: Optional[Dict], new: Dict) -> Dict:
+    """Sections of new that differ from old"""
+    if old is None:
+        return dict(new)
+    return {section: value for section, value in new.items() if old.get(section) != value}
+
+
+def apply_delta(state: Dict, delta: Dict):
+    """Apply one journal record to state in place"""
+    for section, value in delta.items():
+        if section in LOCATION_SECTIONS:
+            state.setdefault(section, {}).update(value)
+        else:
+            state[section] = value
+
+
+class SaveStore:
+    """Save storage interface used by AdvancedAdventureGame"""
+
+    def save(self, player: str, state: Dict):
+        """Replace the player's manual save with a full snapshot of state"""
+        raise NotImplementedError
+
+    def checkpoint(self, player: str, state: Dict):
+        """Start the player's autosave afresh from a full snapshot of state"""
+        raise NotImplementedError
+
+    def autosave(self, player: str, delta: Dict, snapshot: Callable[[], Dict]):
+        """Record delta on top of the player's autosave; snapshot() gives the full state when compacting"""
+        raise NotImplementedError
+
+    def load(self, player: str) -> Optional[Dict]:
+        """The player's manual save, or None if there is none"""
+        raise NotImplementedError
+
+    def resume(self, player: str) -> Optional[Dict]:
+        """The player's autosaved state, falling back to their manual save"""
+        raise NotImplementedError
+
+
+class NullSaveStore(SaveStore):
+    """Store that keeps nothing; for simulations and benchmarks"""
+
+    def save(self, player: str, state: Dict):
+        pass
+
+    def checkpoint(self, player: str, state: Dict):
+        pass
+
+    def autosave(self, player: str, delta: Dict, snapshot: Callable[[], Dict]):
+        pass
+
+    def load(self, player: str) -> Optional[Dict]:
+        return None
+
+    def resume(self, player: str) -> Optional[Dict]:
+        return None
+
+
+class FileSaveStore(SaveStore):
+    """Save, autosave snapshot and journal files per player in one directory
+
+    ``{player}.save`` is the manual save, ``{player}.auto`` the autosave
+    snapshot and ``{player}.journal`` holds one delta per line on top of
+    it. The snapshot and every journal line carry a generation number, so
+    records left over from before the latest snapshot are skipped even if
+    a crash kept them, and a torn final journal line is ignored.
+    """
+
+    def __init__(self, directory: str = GameConfig.SAVE_DIR,
+                 compact_every: int = GameConfig.SAVE_COMPACT_EVERY):
+        self.directory = Path(directory)
+        self.compact_every = compact_every
+        self._journal_lengths: Dict[str, int] = {}
+        self._generations: Dict[str, int] = {}
+        self._directory_ready = False
+
+    def paths(self, player: str):
+        """(manual save, autosave snapshot, journal) paths for a player"""
+        stem = quote(player, safe="")
+        return (self.directory / f"{stem}.save", self.directory / f"{stem}.auto",
+                self.directory / f"{stem}.journal")
+
+    def save(self, player: str, state: Dict):
+        self._write(self.paths(player)[0], encode_snapshot(state))
+
+    def checkpoint(self, player: str, state: Dict):
+        _, snapshot, journal = self.paths(player)
+        generation = self._generation(player, snapshot) + 1
+        self._write(snapshot, b"%d\n" % generation + encode_snapshot(state))
+        self._generations[player] = generation
+        # The snapshot now includes every journaled delta; a crash before
+        # this leaves only records of the old generation behind
+        if self._journal_lengths.get(player) != 0:
+            journal.unlink(missing_ok=True)
+        self._journal_lengths[player] = 0
+
+    def autosave(self, player: str, delta: Dict, snapshot: Callable[[], Dict]):
+        _, snapshot_path, journal = self.paths(player)
+        length = self._journal_lengths.get(player)
+        if length is None:
+            # First autosave for this player here: without a snapshot, write one
+            generation = self._generation(player, snapshot_path)
+            length = self._count_records(journal, generation) if generation else self.compact_every
+        if length >= self.compact_every:
+            self.checkpoint(player, snapshot())
+            return
+
+        with open(journal, "ab") as f:
+            f.write(b"%d " % self._generations[player] + encode_delta(delta) + b"\n")
+        self._journal_lengths[player] = length + 1
+
+    def load(self, player: str) -> Optional[Dict]:
+        try:
+            return decode_snapshot(self.paths(player)[0].read_bytes())
+        except FileNotFoundError:
+            return None
+
+    def resume(self, player: str) -> Optional[Dict]:
+        _, snapshot, journal = self.paths(player)
+        try:
+            generation, data = self._split_generation(snapshot.read_bytes())
+        except FileNotFoundError:
+            return self.load(player)
+
+        state = decode_snapshot(data)
+        try:
+            with open(journal, "rb") as f:
+                for line in f:
+                    written, _, record = line.partition(b" ")
+                    try:
+                        if int(written) != generation:
+                            continue
+                        apply_delta(state, json.loads(record))
+                    except ValueError:
+                        break
+        except FileNotFoundError:
+            pass
+        return state
+
+    def _write(self, path: Path, data: bytes):
+        """Atomically replace path with data"""
+        if not self._directory_ready:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._directory_ready = True
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _generation(self, player: str, snapshot: Path) -> int:
+        """Generation of the player's autosave snapshot, 0 if there is none"""
+        generation = self._generations.get(player)
+        if generation is None:
+            try:
+                generation = self._split_generation(snapshot.read_bytes())[0]
+            except FileNotFoundError:
+                generation = 0
+            self._generations[player] = generation
+        return generation
+
+    @staticmethod
+    def _split_generation(data: bytes) -> Tuple[int, bytes]:
+        header, _, snapshot = data.partition(b"\n")
+        try:
+            return int(header), snapshot
+        except ValueError:
+            raise SaveError("Autosave snapshot has no generation header") from None
+
+    @staticmethod
+    def _count_records(journal: Path, generation: int) -> int:
+        prefix = b"%d " % generation
+        try:
+            with open(journal, "rb") as f:
+                return sum(1 for line in f if line.startswith(prefix))
+        except FileNotFoundError:
+            return 0
+
+
+class DatabaseSaveStore(SaveStore):
+    """Snapshots and journal records stored as blobs through GameDatabase
+
+    Each new snapshot is a new row of its kind ("manual" or "auto"), and
+    the database keeps only the player's newest ``keep`` manual saves and
+    ``keep_autosaves`` autosave snapshots. Autosaves journal onto the
+    snapshot this store last wrote for the player; the first autosave of a
+    process writes a fresh snapshot.
+
+    Writes are encoded and committed by ``writer.submit`` (the game's
+    DecisionLogger), so saving never waits on SQLite; without a writer
+    they run immediately. Loading waits for queued writes first.
+    """
+
+    def __init__(self, db, compact_every: int = GameConfig.SAVE_COMPACT_EVERY,
+                 keep: int = GameConfig.SAVE_RETENTION, keep_autosaves: int = GameConfig.AUTOSAVE_RETENTION,
+                 writer=None):
+        self.db = db
+        self.compact_every = compact_every
+        self.keep = keep
+        self.keep_autosaves = keep_autosaves
+        self.writer = writer or db
+        self._journal_lengths: Dict[str, int] = {}  # records since the player's last autosave snapshot
+        self._save_ids: Dict[str, int] = {}  # written on the writer thread
+
+    def save(self, player: str, state: Dict):
+        self.writer.submit(partial(self._write_save, player, state))
+
+    def checkpoint(self, player: str, state: Dict):
+        self.writer.submit(partial(self._write_snapshot, player, state))
+        self._journal_lengths[player] = 0
+
+    def autosave(self, player: str, delta: Dict, snapshot: Callable[[], Dict]):
+        length = self._journal_lengths.get(player)
+        if length is None or length >= self.compact_every:
+            self.checkpoint(player, snapshot())
+            return
+
+        self.writer.submit(partial(self._write_delta, player, delta))
+        self._journal_lengths[player] = length + 1
+
+    def load(self, player: str) -> Optional[Dict]:
+        self.writer.flush()
+        return self._read(player, "manual")
+
+    def resume(self, player: str) -> Optional[Dict]:
+        self.writer.flush()
+        state = self._read(player, "auto")
+        return state if state is not None else self._read(player, "manual")
+
+    def _read(self, player: str, kind: str) -> Optional[Dict]:
+        latest = self.db.latest_save(player, kind)
+        if latest is None:
+            return None
+
+        _, snapshot, deltas = latest
+        state = decode_snapshot(snapshot)
+        for delta in deltas:
+            apply_delta(state, json.loads(delta))
+        return state
+
+    def _write_save(self, player: str, state: Dict):
+        self.db.write_save(player, encode_snapshot(state), self.keep, "manual")
+
+    def _write_snapshot(self, player: str, state: Dict):
+        # Deltas never land on an older snapshot, even if this write fails
+        self._save_ids.pop(player, None)
+        self._save_ids[player] = self.db.write_save(player, encode_snapshot(state), self.keep_autosaves, "auto")
+
+    def _write_delta(self, player: str, delta: Dict):
+        save_id = self._save_ids.get(player)
+        if save_id is not None:
+            self.db.append_save_delta(save_id, encode_delta(delta))
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo balance simulator
+Plays large numbers of headless fights and full runs with scripted or random
+policies and reports win, death, score and turn-count distributions per enemy
+and per route. Runs are spread over a process pool, and every run gets its own
+random.Random seeded from the base seed and the run index, so results are
+reproducible whatever the worker count.
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import random
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+from adventure_quest import AdvancedAdventureGame, GameDatabase, GameState
+from config import GameConfig
+from game_io import NullIO, Prompt
+from saves import NullSaveStore
+from world import load_world
+import worldgen
+
+# Locations of a route that key its summary; longer routes share their prefix's
+ROUTE_DEPTH = 4
+
+# Prompt policies: (game, prompt, rng) -> answer line
+POLICIES: Dict[str, Callable[[AdvancedAdventureGame, Prompt, random.Random], str]] = {}
+
+
+def policy(name: str):
+    """Register a prompt-answering policy under name"""
+    def register(func):
+        POLICIES[name] = func
+        return func
+    return register
+
+
+@policy("attack")
+def attack_policy(game: AdvancedAdventureGame, prompt: Prompt, rng: random.Random) -> str:
+    """Always attack, never trade, always solve the riddle"""
+    if prompt.kind == "combat_action":
+        return "1"
+    if prompt.kind == "riddle":
+        return "keyboard"
+    if prompt.kind == "merchant":
+        return "3"
+    return "0"
+
+
+@policy("random")
+def random_policy(game: AdvancedAdventureGame, prompt: Prompt, rng: random.Random) -> str:
+    """Pick uniformly among the prompt's options"""
+    if prompt.kind == "riddle":
+        return rng.choice(["keyboard", "a map"])
+    return rng.choice(prompt.options) if prompt.options else ""
+
+
+@policy("cautious")
+def cautious_policy(game: AdvancedAdventureGame, prompt: Prompt, rng: random.Random) -> str:
+    """Heal when low, flee when low without potions, buy potions when possible"""
+    player = game.player
+    potions = [i for i, key in enumerate(game.inventory.usable(), 1) if key == "health_potion"]
+
+    if prompt.kind == "combat_action":
+        if player.health < player.max_health * 0.35 and potions:
+            return "2"
+        if player.health < player.max_health * 0.25:
+            return "3"
+        return "1"
+    if prompt.kind == "combat_item":
+        return str(potions[0]) if potions else "0"
+    if prompt.kind == "merchant":
+        return "1"
+    if prompt.kind == "riddle":
+        return "keyboard"
+    return "0"
+
+
+class Summary:
+    """Mergeable outcome counts plus score and turn distributions"""
+
+    def __init__(self):
+        self.runs = 0
+        self.outcomes = Counter()
+        self.scores = Counter()
+        self.turns = Counter()
+
+    def add(self, outcome: str, score: int, turns: int):
+        self.runs += 1
+        self.outcomes[outcome] += 1
+        self.scores[score] += 1
+        self.turns[turns] += 1
+
+    def merge(self, other: "Summary"):
+        self.runs += other.runs
+        self.outcomes.update(other.outcomes)
+        self.scores.update(other.scores)
+        self.turns.update(other.turns)
+
+    @staticmethod
+    def _distribution(counts: Counter) -> Dict[str, float]:
+        total = sum(counts.values())
+        result = {"mean": sum(v * n for v, n in counts.items()) / total if total else 0.0}
+        cumulative = 0
+        marks = [("p10", 0.10), ("p50", 0.50), ("p90", 0.90)]
+        for value in sorted(counts):
+            cumulative += counts[value]
+            while marks and cumulative >= marks[0][1] * total:
+                result[marks.pop(0)[0]] = value
+        result["min"] = min(counts) if counts else 0
+        result["max"] = max(counts) if counts else 0
+        return result
+
+    def as_dict(self) -> Dict:
+        return {
+            "runs": self.runs,
+            "rates": {outcome: n / self.runs for outcome, n in sorted(self.outcomes.items())},
+            "score": self._distribution(self.scores),
+            "turns": self._distribution(self.turns),
+        }
+
+
+class _DiscardDecisions:
+    """Decision logger stand-in for simulations, which record nothing"""
+
+    def log_decision(self, session_id, decision_point, choice, from_location=None, to_location=None):
+        pass
+
+    def submit(self, job):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+_worker_db: Optional[GameDatabase] = None
+
+
+def make_config(overrides: Dict[str, object]) -> type:
+    """GameConfig subclass with the given settings replaced"""
+    unknown = [name for name in overrides if not hasattr(GameConfig, name)]
+    if unknown:
+        raise ValueError(f"Unknown GameConfig settings: {', '.join(unknown)}")
+    return type("SimulationConfig", (GameConfig,), dict(overrides))
+
+
+def make_game(rng: random.Random, config: type) -> AdvancedAdventureGame:
+    """Headless game with a fresh character and no persistence"""
+    global _worker_db
+    if _worker_db is None:
+        _worker_db = GameDatabase(":memory:")
+
+    game = AdvancedAdventureGame(db=_worker_db, decisions=_DiscardDecisions(),
+                                 io=NullIO(), rng=rng, config=config, saves=NullSaveStore())
+    game.player = game.new_character("Simulated Hero")
+    return game
+
+
+def level_character(game: AdvancedAdventureGame, level: int):
+    """Apply the per-level stat gains until the player reaches level"""
+    player = game.player
+    for _ in range(level - 1):
+        player.level += 1
+        player.max_health += game.config.HEALTH_PER_LEVEL
+        player.attack_power += game.config.ATTACK_PER_LEVEL
+        player.defense += game.config.DEFENSE_PER_LEVEL
+    player.health = player.max_health
+
+
+def answer_prompts(game: AdvancedAdventureGame, choose, rng: random.Random, max_turns: int) -> int:
+    """Answer pending prompts with the policy; return how many were answered"""
+    turns = 0
+    while game.pending_prompt and turns < max_turns:
+        game.process_input(choose(game, game.pending_prompt, rng))
+        turns += 1
+    return turns
+
+
+def simulate_fight(enemy: str, level: int, policy_name: str, rng: random.Random,
+                   config: type = GameConfig, max_turns: int = 1000) -> Tuple[str, int, int]:
+    """One fight against enemy; returns (outcome, score, rounds)"""
+    game = make_game(rng, config)
+    level_character(game, level)
+
+    result = []
+    game.start_combat(enemy, result.append)
+    rounds = answer_prompts(game, POLICIES[policy_name], rng, max_turns)
+
+    if not result:
+        outcome = "timeout"
+    elif result[0]:
+        outcome = "won"
+    elif game.player.health <= 0:
+        outcome = "died"
+    else:
+        outcome = "fled"
+    return outcome, game.game_score, rounds
+
+
+def simulate_run(policy_name: str, route: Optional[List[str]], rng: random.Random,
+                 config: type = GameConfig, max_turns: int = 200) -> Tuple[str, int, int, str]:
+    """One full game; returns (outcome, score, turns, route taken)
+
+    Without a scripted route the player picks up whatever lies around and then
+    walks to a random neighbouring location.
+    """
+    game = make_game(rng, config)
+    choose = POLICIES[policy_name]
+    visited = [game.current_location]
+    steps = list(route or [])
+    turns = 0
+
+    while game.game_state == GameState.PLAYING and turns < max_turns:
+        if game.pending_prompt:
+            turns += answer_prompts(game, choose, rng, max_turns - turns)
+            continue
+
+        location = game.locations[game.current_location]
+        items = game.items_at(game.current_location)
+        if items:
+            command = f"take {items[0]}"
+        elif route is not None:
+            if not steps:
+                break
+            command = f"go {steps.pop(0)}"
+        else:
+            command = f"go {rng.choice(location.exits)}"
+
+        before = game.current_location
+        game.process_input(command)
+        turns += 1
+        if game.current_location != before:
+            visited.append(game.current_location)
+
+    if game.game_state == GameState.VICTORY:
+        outcome = "victory"
+    elif game.game_state == GameState.GAME_OVER:
+        outcome = "death"
+    else:
+        outcome = "unfinished"
+    return outcome, game.game_score, turns, ">".join(visited)
+
+
+def route_key(route: str, depth: int = ROUTE_DEPTH) -> str:
+    """The first depth locations of a route, so there are boundedly many summaries however many runs"""
+    steps = route.split(">", depth)
+    return ">".join(steps[:depth]) + (">…" if len(steps) > depth else "")
+
+
+def _run_batch(task: Tuple) -> Dict[str, Summary]:
+    """Worker entry point: play runs [start, start + count) and summarise them"""
+    mode, params, seed, start, count, overrides = task
+    config = make_config(overrides)
+    summaries: Dict[str, Summary] = {}
+
+    # Simulated games should not flood the game log
+    previous_disable = logging.root.manager.disable
+    logging.disable(logging.INFO)
+    try:
+        for run_index in range(start, start + count):
+            rng = random.Random(f"{seed}:{run_index}")
+            if mode == "combat":
+                enemy = params["enemies"][run_index % len(params["enemies"])]
+                outcome, score, turns = simulate_fight(enemy, params["level"], params["policy"], rng, config)
+                key = enemy
+            else:
+                outcome, score, turns, route = simulate_run(params["policy"], params["route"], rng, config)
+                key = route_key(route, params.get("depth", ROUTE_DEPTH))
+            summaries.setdefault(key, Summary()).add(outcome, score, turns)
+    finally:
+        logging.disable(previous_disable)
+
+    return summaries
+
+
+def run_simulation(mode: str, params: Dict, runs: int, seed: int = 0, workers: int = 1,
+                   overrides: Optional[Dict[str, object]] = None,
+                   batch_size: int = 2000) -> Dict[str, Summary]:
+    """Play runs simulations over a process pool and merge the summaries"""
+    overrides = overrides or {}
+    make_config(overrides)  # Fail early on unknown settings
+    tasks = [(mode, params, seed, start, min(batch_size, runs - start), overrides)
+             for start in range(0, runs, batch_size)]
+
+    merged: Dict[str, Summary] = {}
+    if workers > 1:
+        with multiprocessing.Pool(workers) as pool:
+            results = list(pool.imap_unordered(_run_batch, tasks))
+    else:
+        results = [_run_batch(task) for task in tasks]
+
+    for summaries in results:
+        for key, summary in summaries.items():
+            merged.setdefault(key, Summary()).merge(summary)
+    return merged
+
+
+def parse_override(text: str) -> Tuple[str, object]:
+    """Parse NAME=VALUE, reading VALUE as JSON when possible"""
+    name, _, value = text.partition("=")
+    try:
+        return name, json.loads(value)
+    except json.JSONDecodeError:
+        return name, value
+
+
+def main():
+    """Run simulations from the command line"""
+    parser = argparse.ArgumentParser(description="Monte Carlo balance simulator")
+    parser.add_argument("mode", choices=["combat", "routes"])
+    parser.add_argument("--runs", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="attack")
+    enemies = sorted(load_world().enemies)
+    parser.add_argument("--enemy", action="append", choices=enemies,
+                        help="enemy to fight (repeatable, default: all)")
+    parser.add_argument("--level", type=int, default=1, help="player level for combat runs")
+    parser.add_argument("--route", help="comma-separated exits to follow instead of a random walk")
+    parser.add_argument("--top", type=int, default=10, help="routes to show")
+    parser.add_argument("--depth", type=int, default=ROUTE_DEPTH,
+                        help="locations of each route to group runs by")
+    parser.add_argument("--world", help="world file to play (default: GameConfig.WORLD_FILE)")
+    parser.add_argument("--world-size", type=int, metavar="N",
+                        help="play the standard generated world with N locations (see worldgen.py)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a GameConfig setting")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    if args.mode == "combat":
+        params = {"enemies": args.enemy or enemies, "level": args.level, "policy": args.policy}
+    else:
+        params = {"route": args.route.split(",") if args.route else None, "policy": args.policy,
+                  "depth": args.depth}
+
+    overrides = dict(parse_override(item) for item in args.set)
+    if args.world_size:
+        overrides["WORLD_FILE"] = worldgen.fixture(args.world_size)
+    elif args.world:
+        overrides["WORLD_FILE"] = args.world
+    results = run_simulation(args.mode, params, args.runs, args.seed, args.workers, overrides)
+    ranked = sorted(results.items(), key=lambda kv: -kv[1].runs)[:args.top if args.mode == "routes" else None]
+
+    if args.json:
+        print(json.dumps({key: summary.as_dict() for key, summary in ranked}, indent=2))
+        return
+
+    print(f"🎲 {args.runs:,} {args.mode} runs, policy={args.policy}, seed={args.seed}")
+    for key, summary in ranked:
+        stats = summary.as_dict()
+        rates = ", ".join(f"{outcome} {rate:.1%}" for outcome, rate in stats["rates"].items())
+        print(f"\n{key} ({stats['runs']:,} runs)")
+        print(f"  {rates}")
+        for name in ("score", "turns"):
+            dist = stats[name]
+            print(f"  {name:<6} mean {dist['mean']:.1f}  p10 {dist['p10']}  p50 {dist['p50']}  "
+                  f"p90 {dist['p90']}  min {dist['min']}  max {dist['max']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Multi-process game supervisor
+Starts worker processes that each host many sessions (a GameServer without
+a listening socket of its own) while the supervisor owns the public port.
+Workers come from a fork server rather than forking the supervisor itself,
+whose event loop and threads a child must not inherit.
+A new connection is asked for the player's name, which is the session key:
+saves are kept per player, so rendezvous hashing over the live workers
+sends a player to the same worker every time. The client's socket is then
+passed to that worker over a Unix socket pair, so game traffic never flows
+through the supervisor.
+
+When a worker dies its slot is restarted; meanwhile its players are routed
+to the remaining workers, and when they reconnect they continue from their
+last autosave. Workers report metrics when polled and the supervisor merges
+them into one registry, served for Prometheus like the single server's.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import signal
+import socket
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set
+
+from adventure_quest import GameDatabase
+from config import GameConfig
+from game_logging import configure_logging, file_handler, shutdown_logging
+from game_server import GameServer
+from metrics import METRICS, Histogram, Metrics, enable_metrics, serve_metrics
+from simulator import make_config, parse_override
+from world import load_world
+
+log = logging.getLogger(__name__)
+
+NAME_PROMPT = "What is your name, brave adventurer? "
+MAX_NAME_BYTES = 1024
+MESSAGE_BYTES = 1 << 20  # largest control message (a worker's metrics)
+
+
+def route(key: str, slots: Sequence[int]) -> Optional[int]:
+    """The slot hosting key: the highest rendezvous hash, so losing a slot only moves its own keys"""
+    if not slots:
+        return None
+    return max(slots, key=lambda slot: hashlib.blake2b(f"{slot}:{key}".encode("utf-8"), digest_size=8).digest())
+
+
+async def send_message(sock: socket.socket, data: bytes, fds: Sequence[int] = (),
+                       timeout: Optional[float] = None):
+    """Send one message on a non-blocking control socket, waiting for room without blocking the loop"""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            if fds:
+                socket.send_fds(sock, [data], fds)
+            else:
+                sock.send(data)
+            return
+        except BlockingIOError:
+            pass
+        writable = loop.create_future()
+        loop.add_writer(sock, lambda: writable.done() or writable.set_result(None))
+        try:
+            await asyncio.wait_for(writable, timeout)
+        finally:
+            if sock.fileno() != -1:
+                loop.remove_writer(sock)
+
+
+def worker_log_file(slot: int) -> str:
+    """Log file of one worker; rotating a shared file from several processes is unsafe"""
+    return f"{GameConfig.LOG_FILE_NAME}.worker{slot}"
+
+
+class _PrefixedReader:
+    """Stream reader that first returns bytes the supervisor read before handing the socket over"""
+
+    def __init__(self, prefix: bytes, reader: asyncio.StreamReader):
+        self.prefix = prefix
+        self.reader = reader
+
+    async def readline(self) -> bytes:
+        if b"\n" in self.prefix:
+            line, _, self.prefix = self.prefix.partition(b"\n")
+            return line + b"\n"
+        line, self.prefix = self.prefix + await self.reader.readline(), b""
+        return line
+
+
+class SessionWorker(GameServer):
+    """The sessions of one worker process, fed client sockets over its control socket"""
+
+    def __init__(self, slot: int, control: socket.socket, db_name: str = GameConfig.DATABASE_NAME,
+                 config: type = GameConfig):
+        super().__init__(db_name, config=config)
+        self.slot = slot
+        self.control = control
+        self.latency = Histogram()
+        self.tasks: Set[asyncio.Task] = set()
+        self.stopping: Optional[asyncio.Event] = None
+        self.sending: Optional[asyncio.Lock] = None
+
+    async def run(self):
+        """Host sessions until the supervisor says stop or goes away, then end them"""
+        loop = asyncio.get_running_loop()
+        self.stopping = asyncio.Event()
+        self.sending = asyncio.Lock()
+        self.control.setblocking(False)
+        loop.add_reader(self.control, self.on_control)
+        loop.add_signal_handler(signal.SIGTERM, self.stopping.set)
+        try:
+            await self.stopping.wait()
+        finally:
+            loop.remove_reader(self.control)
+            for task in list(self.tasks):
+                task.cancel()
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            await self.stop()
+
+    def on_control(self):
+        """Handle one message from the supervisor"""
+        try:
+            data, fds, _, _ = socket.recv_fds(self.control, MESSAGE_BYTES, 1)
+        except BlockingIOError:
+            return
+        except OSError:
+            data, fds = b"", []
+        if not data:
+            self.stopping.set()
+            return
+
+        message = json.loads(data)
+        if message["type"] == "session" and fds:
+            self.background(self.serve_client(socket.socket(fileno=fds[0]), message))
+        elif message["type"] == "metrics":
+            self.background(self.notify({"type": "metrics", "stats": self.stats(), "metrics": METRICS.export(),
+                                         "latency": [self.latency.counts, self.latency.sum]}))
+        elif message["type"] == "stop":
+            self.stopping.set()
+
+    def background(self, coro):
+        """Run coro as a task that shutdown cancels"""
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def serve_client(self, client: socket.socket, message: Dict):
+        """Host the session of a client socket handed over by the supervisor"""
+        try:
+            client.setblocking(False)
+            reader, writer = await asyncio.open_connection(sock=client)
+            await self.host_session(_PrefixedReader(message["pending"].encode("latin-1"), reader), writer,
+                                    message["name"], message["resume"])
+        finally:
+            await self.notify({"type": "ended", "key": message["key"]})
+
+    async def notify(self, message: Dict):
+        """Send a message to the supervisor; if it is gone, EOF on the control socket stops us"""
+        try:
+            async with self.sending:
+                await send_message(self.control, json.dumps(message).encode("utf-8"),
+                                   timeout=GameConfig.SUPERVISOR_CONTROL_TIMEOUT)
+        except (OSError, asyncio.TimeoutError) as e:
+            log.warning("Worker %d could not reach the supervisor: %r", self.slot, e)
+
+    def record_latency(self, seconds: float):
+        super().record_latency(seconds)
+        self.latency.observe(seconds)
+
+
+def _worker_main(slot: int, control: socket.socket, db_name: str, log_file: str,
+                 overrides: Dict[str, object], metrics: bool):
+    """Entry point of a worker process"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the supervisor decides when workers stop
+    configure_logging(handler=file_handler(log_file))
+    if metrics:
+        enable_metrics(dump_file=None)
+    config = make_config(overrides)
+    load_world(config.WORLD_FILE, config.WORLD_CACHE_DIR)  # before the first player, from the supervisor's cache
+    try:
+        asyncio.run(SessionWorker(slot, control, db_name, config).run())
+    finally:
+        shutdown_logging()
+
+
+@dataclass
+class Worker:
+    """A worker slot: its current process, control socket and the players it hosts"""
+    slot: int
+    process: Optional[multiprocessing.Process] = None
+    control: Optional[socket.socket] = None
+    sessions: Dict[str, int] = field(default_factory=dict)  # player -> open connections
+    report: Dict = field(default_factory=dict)  # latest metrics reply
+    restart: Optional[asyncio.TimerHandle] = None
+    sending: Optional[asyncio.Lock] = None  # one control message in flight at a time
+
+
+class Supervisor:
+    """Owns the public port and routes each player's connections to a worker process"""
+
+    def __init__(self, workers: int = GameConfig.SUPERVISOR_WORKERS, db_name: str = GameConfig.DATABASE_NAME,
+                 host: str = GameConfig.SERVER_HOST, port: int = GameConfig.SERVER_PORT,
+                 metrics_port: Optional[int] = None, overrides: Optional[Dict[str, object]] = None):
+        self.workers = [Worker(slot) for slot in range(max(1, workers))]
+        self.db_name = db_name
+        self.overrides = overrides or {}
+        self.config = make_config(self.overrides)  # fail early on unknown settings
+        self.host = host
+        self.port = port
+        self.metrics_port = metrics_port
+        self.metrics_http = None
+        self.metrics = Metrics(enabled=True)  # the supervisor's own counters
+        self.registry = Metrics()  # merged view of every worker as of the last poll
+        self.orphaned: Dict[str, float] = {}  # players whose worker died mid-session -> resume deadline
+        self.restarts = 0
+        self.listener: Optional[socket.socket] = None
+        self.closing = False
+        self._context = multiprocessing.get_context("forkserver")
+        self._context.set_forkserver_preload(["supervisor"])
+        self._polls: Dict[int, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def alive(self) -> List[Worker]:
+        """Workers currently able to take players"""
+        return [worker for worker in self.workers if worker.control is not None]
+
+    async def start(self) -> int:
+        """Start the workers, start listening and return the bound port"""
+        GameDatabase(self.db_name).close()  # create the schema once rather than in every worker
+        load_world(self.config.WORLD_FILE, self.config.WORLD_CACHE_DIR)  # writes the cache workers load from
+        self.listener = socket.create_server((self.host, self.port), backlog=GameConfig.SERVER_BACKLOG)
+        self.listener.setblocking(False)
+        self.port = self.listener.getsockname()[1]
+        await asyncio.gather(*(self.spawn(worker) for worker in self.workers))
+        log.info("Supervisor listening on %s:%d with %d workers", self.host, self.port, len(self.workers))
+
+        if self.metrics_port is not None:
+            self.metrics_http = serve_metrics(self.host, self.metrics_port, self.registry)
+            self.metrics_port = self.metrics_http.server_address[1]
+            log.info("Metrics served on http://%s:%d/metrics", self.host, self.metrics_port)
+        self.background(self.accept_forever())
+        self.background(self.poll_forever())
+        return self.port
+
+    def background(self, coro) -> asyncio.Task:
+        """Run coro as a task that stop() cancels"""
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def spawn(self, worker: Worker):
+        """Start a process for worker's slot"""
+        loop = asyncio.get_running_loop()
+        worker.restart = None
+        control, child_control = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        worker.process = self._context.Process(target=_worker_main, name=f"adventure-worker-{worker.slot}",
+                                               args=(worker.slot, child_control, self.db_name,
+                                                     worker_log_file(worker.slot), self.overrides,
+                                                     METRICS.enabled),
+                                               daemon=True)
+        try:
+            # Starting talks to the fork server, which may first have to start itself
+            await loop.run_in_executor(None, worker.process.start)
+        finally:
+            child_control.close()
+        control.setblocking(False)
+        worker.control = control
+        worker.sending = asyncio.Lock()
+        loop.add_reader(control, self.on_message, worker)
+        loop.add_reader(worker.process.sentinel, self.on_exit, worker)
+        log.info("Worker %d started (pid %d)", worker.slot, worker.process.pid)
+
+    def on_message(self, worker: Worker):
+        """Handle one message from a worker"""
+        try:
+            data = worker.control.recv(MESSAGE_BYTES)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            # The worker is exiting; on_exit cleans up once its process is gone
+            asyncio.get_running_loop().remove_reader(worker.control)
+            return
+
+        message = json.loads(data)
+        if message["type"] == "ended":
+            self.release(worker, message["key"])
+        elif message["type"] == "metrics":
+            worker.report = message
+            future = self._polls.pop(worker.slot, None)
+            if future and not future.done():
+                future.set_result(None)
+
+    def on_exit(self, worker: Worker):
+        """A worker process exited: orphan its players and restart the slot"""
+        loop = asyncio.get_running_loop()
+        loop.remove_reader(worker.process.sentinel)
+        worker.process.join()
+        if worker.control is not None:
+            loop.remove_reader(worker.control)
+            loop.remove_writer(worker.control)
+            worker.control.close()
+            worker.control = None
+        future = self._polls.pop(worker.slot, None)
+        if future and not future.done():
+            future.set_result(None)
+        worker.report = {}
+        if self.closing:
+            return
+
+        log.warning("Worker %d (pid %d) exited with code %s; %d players will resume from their saves",
+                    worker.slot, worker.process.pid, worker.process.exitcode, len(worker.sessions))
+        deadline = loop.time() + GameConfig.SUPERVISOR_ORPHAN_TTL
+        self.orphaned.update((key, deadline) for key in worker.sessions)
+        worker.sessions.clear()
+        self.restarts += 1
+        self.metrics.count("supervisor_worker_restarts_total", worker=str(worker.slot))
+        worker.restart = loop.call_later(GameConfig.SUPERVISOR_RESTART_DELAY,
+                                         lambda: self.background(self.spawn(worker)))
+
+    async def send(self, worker: Worker, message: Dict, fds: Sequence[int] = ()) -> bool:
+        """Send worker a control message; a worker that will not take it in time is killed"""
+        control = worker.control
+        if control is None:
+            return False
+        try:
+            async with worker.sending:
+                await send_message(control, json.dumps(message).encode("utf-8"), fds,
+                                   GameConfig.SUPERVISOR_CONTROL_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            if worker.control is control:
+                log.warning("Worker %d is not reading its control socket; restarting it", worker.slot)
+                worker.process.kill()
+        except OSError as e:
+            log.warning("Could not reach worker %d: %s", worker.slot, e)
+        return False
+
+    def prune_orphans(self):
+        """Forget orphaned players who did not come back in time"""
+        now = asyncio.get_running_loop().time()
+        for key in [key for key, deadline in self.orphaned.items() if deadline <= now]:
+            del self.orphaned[key]
+
+    async def accept_forever(self):
+        """Accept players on the public port"""
+        loop = asyncio.get_running_loop()
+        while True:
+            client, _ = await loop.sock_accept(self.listener)
+            self.background(self.route_client(client))
+
+    async def route_client(self, client: socket.socket):
+        """Ask a new connection for the player's name, then hand it to that player's worker"""
+        loop = asyncio.get_running_loop()
+        received = b""
+        try:
+            await loop.sock_sendall(client, NAME_PROMPT.encode("utf-8"))
+            while b"\n" not in received:
+                chunk = await asyncio.wait_for(loop.sock_recv(client, MAX_NAME_BYTES),
+                                               GameConfig.SUPERVISOR_NAME_TIMEOUT)
+                received += chunk
+                if not chunk or len(received) > MAX_NAME_BYTES:
+                    client.close()
+                    return
+        except (OSError, asyncio.TimeoutError):
+            client.close()
+            return
+
+        line, _, pending = received.partition(b"\n")
+        name = line.decode("utf-8", errors="replace")
+        await self.hand_off(client, name.strip() or "Unknown Hero", name, pending)  # the key create_player uses
+
+    async def hand_off(self, client: socket.socket, key: str, name: str, pending: bytes = b""):
+        """Pass client's socket to the worker hosting key; the supervisor keeps no copy"""
+        loop = asyncio.get_running_loop()
+        slot = route(key, [candidate.slot for candidate in self.alive()])
+        try:
+            if slot is None:
+                await loop.sock_sendall(client, b"\nThe realm is busy; please try again shortly.\n")
+                return
+            worker = self.workers[slot]
+            message = {"type": "session", "key": key, "name": name, "resume": key in self.orphaned,
+                       "pending": pending.decode("latin-1")}
+            if not await self.send(worker, message, [client.fileno()]):
+                return
+        except OSError as e:
+            log.warning("Could not hand %r to worker %s: %s", key, slot, e)
+            return
+        finally:
+            client.close()
+
+        self.orphaned.pop(key, None)
+        worker.sessions[key] = worker.sessions.get(key, 0) + 1
+        self.metrics.count("supervisor_connections_total", worker=str(slot))
+
+    def release(self, worker: Worker, key: str):
+        """Forget one of key's connections on worker"""
+        remaining = worker.sessions.pop(key, 0) - 1
+        if remaining > 0:
+            worker.sessions[key] = remaining
+
+    async def poll(self) -> Metrics:
+        """Collect every worker's metrics and merge them (with the supervisor's own) into registry"""
+        loop = asyncio.get_running_loop()
+        workers = self.alive()
+        futures = [loop.create_future() for _ in workers]
+        self._polls.update((worker.slot, future) for worker, future in zip(workers, futures))
+        sent = await asyncio.gather(*(self.send(worker, {"type": "metrics"}) for worker in workers))
+        waiting = [future for future, ok in zip(futures, sent) if ok]
+        if waiting:
+            await asyncio.wait(waiting, timeout=GameConfig.SUPERVISOR_CONTROL_TIMEOUT)
+
+        merged = Metrics()
+        merged.merge(self.metrics.export())
+        for worker in self.workers:
+            if worker.report:
+                merged.merge(worker.report["metrics"])
+        self.registry = merged
+        if self.metrics_http:
+            self.metrics_http.registry = merged
+        return merged
+
+    async def poll_forever(self):
+        """Keep the merged registry fresh"""
+        while True:
+            await asyncio.sleep(GameConfig.SUPERVISOR_POLL_INTERVAL)
+            await self.poll()
+            self.prune_orphans()
+
+    def stats(self) -> Dict[str, float]:
+        """Workers, restarts, sessions and command latency across all workers, as of the last poll"""
+        reports = [worker.report for worker in self.workers if worker.report]
+        latency = Histogram()
+        for report in reports:
+            latency.merge(*report["latency"])
+        return {
+            "workers": len(self.alive()),
+            "restarts": self.restarts,
+            "sessions": sum(report["stats"]["sessions"] for report in reports),
+            "commands": sum(report["stats"]["commands"] for report in reports),
+            "p50_ms": 1000 * latency.percentile(50),
+            "p99_ms": 1000 * latency.percentile(99),
+        }
+
+    def report(self):
+        """Print a one-line report"""
+        stats = self.stats()
+        print(f"📊 workers={stats['workers']} restarts={stats['restarts']} sessions={stats['sessions']} "
+              f"commands={stats['commands']} p50≤{stats['p50_ms']:.3f}ms p99≤{stats['p99_ms']:.3f}ms")
+
+    async def stop(self):
+        """Stop accepting players, then let every worker end its sessions and exit"""
+        self.closing = True
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.listener:
+            self.listener.close()
+
+        loop = asyncio.get_running_loop()
+        for worker in self.workers:
+            if worker.restart:
+                worker.restart.cancel()
+        await asyncio.gather(*(self.send(worker, {"type": "stop"}) for worker in self.alive()))
+        for worker in self.workers:
+            if worker.process is None:
+                continue
+            await loop.run_in_executor(None, worker.process.join, GameConfig.SUPERVISOR_CONTROL_TIMEOUT)
+            if worker.process.exitcode is None:
+                worker.process.kill()
+                await loop.run_in_executor(None, worker.process.join)
+            loop.remove_reader(worker.process.sentinel)
+            if worker.control is not None:
+                loop.remove_reader(worker.control)
+                worker.control.close()
+                worker.control = None
+
+        if self.metrics_http:
+            self.metrics_http.shutdown()
+            self.metrics_http.server_close()
+
+    async def serve_forever(self, report_interval: float = 0):
+        """Serve players until cancelled, printing a report every report_interval seconds"""
+        # Service managers stop us with SIGTERM; end sessions as cleanly as for Ctrl-C
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        await self.start()
+        print(f"🌐 Adventure supervisor listening on {self.host}:{self.port} with {len(self.workers)} workers")
+        try:
+            while True:
+                await asyncio.sleep(report_interval or 3600)
+                if report_interval:
+                    await self.poll()
+                    self.report()
+        finally:
+            await self.poll()
+            self.report()
+            await self.stop()
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Run the supervisor from the command line"""
+    parser = argparse.ArgumentParser(description="Multi-process adventure server")
+    parser.add_argument("--workers", type=int, default=GameConfig.SUPERVISOR_WORKERS,
+                        help="worker processes, each hosting many sessions")
+    parser.add_argument("--host", default=GameConfig.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=GameConfig.SERVER_PORT)
+    parser.add_argument("--db", default=GameConfig.DATABASE_NAME, help="SQLite database file")
+    parser.add_argument("--report-interval", type=float, default=60,
+                        help="seconds between reports (0 to disable)")
+    parser.add_argument("--metrics-port", type=int,
+                        default=GameConfig.METRICS_PORT if GameConfig.METRICS_ENABLED else None,
+                        help="record metrics in every worker and serve the total for Prometheus on this port")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="override a GameConfig setting in every worker (repeatable)")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    if args.metrics_port is not None:
+        enable_metrics(dump_file=None)  # workers are told to record; the merged registry is dumped below
+    overrides = dict(parse_override(item) for item in args.set)
+    supervisor = Supervisor(args.workers, args.db, args.host, args.port, args.metrics_port, overrides)
+    try:
+        asyncio.run(supervisor.serve_forever(args.report_interval))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("\n👋 Supervisor stopped.")
+    if args.metrics_port is not None:
+        supervisor.registry.dump(GameConfig.METRICS_FILE)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,10 @@ from pathlib import Path
 
 # Import the game classes (assuming they're in adventure_quest.py)
 try:
-    from adventure_quest import AdvancedAdventureGame, GameDatabase, Item, Character
+    from adventure_quest import AdvancedAdventureGame, GameDatabase, GameState, Item, Character
+    from config import GameConfig
+    from game_io import BufferIO, NullIO
+    from saves import DatabaseSaveStore, FileSaveStore
     GAME_AVAILABLE = True
 except ImportError:
     GAME_AVAILABLE = False
@@ -28,11 +31,13 @@ class TestAdventureGame(unittest.TestCase):
         self.temp_db = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
         self.temp_db.close()
         
-        self.game = AdvancedAdventureGame()
-        self.game.db = GameDatabase(self.temp_db.name)
+        self.game = AdvancedAdventureGame(db=GameDatabase(self.temp_db.name), io=BufferIO())
     
     def tearDown(self):
         """Clean up test environment"""
+        if hasattr(self, 'game'):
+            self.game.decisions.close()
+            self.game.db.close()
         if hasattr(self, 'temp_db'):
             os.unlink(self.temp_db.name)
     
@@ -50,6 +55,31 @@ class TestAdventureGame(unittest.TestCase):
         self.assertEqual(character.health, 100)
         self.assertEqual(character.attack_power, 20)
     
+    def test_inventory_multiset_and_gold(self):
+        """Test counted inventory, gold balance and slotted item templates"""
+        self.game.create_player("Tester")
+        inventory = self.game.inventory
+        inventory.add("health_potion", 2)
+        inventory.add("gold_coin", 4)
+        self.assertEqual(inventory.count("health_potion"), 2)
+        self.assertEqual(inventory.gold, 4)
+        self.assertEqual(len(inventory), 6)
+        
+        self.game.merchant_choice("2")
+        self.assertEqual(inventory.gold, 1)
+        self.assertEqual(inventory.count("leather_armor"), 1)
+        self.game.merchant_choice("1")
+        self.assertEqual(inventory.count("health_potion"), 2)
+        
+        self.game.use_item("potion")
+        self.assertEqual(inventory.count("health_potion"), 1)
+        with self.assertRaises(ValueError):
+            inventory.remove("health_potion", 2)
+        
+        with self.assertRaises(AttributeError):
+            self.game.items_db["health_potion"].value = 0
+        self.assertFalse(hasattr(self.game.player, "__dict__"))
+    
     def test_database_operations(self):
         """Test database functionality"""
         db = GameDatabase(self.temp_db.name)
@@ -57,6 +87,818 @@ class TestAdventureGame(unittest.TestCase):
         self.assertIsInstance(session_id, int)
         self.assertGreater(session_id, 0)
     
+    def test_decisions_are_batched(self):
+        """Test buffered decision logging and flush on session end"""
+        db = GameDatabase(self.temp_db.name, batch_size=3, flush_interval=60)
+        session_id = db.start_new_session("TestPlayer")
+        
+        db.log_decision(session_id, "move", "north_trail")
+        db.log_decision(session_id, "move", "goblin_camp")
+        count = db.conn.execute("SELECT COUNT(*) FROM player_decisions").fetchone()[0]
+        self.assertEqual(count, 0)
+        
+        db.log_decision(session_id, "move", "treasure_chamber")
+        db.log_decision(session_id, "move", "goblin_camp")
+        count = db.conn.execute("SELECT COUNT(*) FROM player_decisions").fetchone()[0]
+        self.assertEqual(count, 3)
+        
+        db.end_session(session_id, 10, GameState.VICTORY, 1)
+        total = db.conn.execute("SELECT total_decisions FROM game_sessions WHERE id = ?",
+                                (session_id,)).fetchone()[0]
+        self.assertEqual(total, 4)
+        db.close()
+        
+        # A quiet session's decisions are written by the timer, not the next log_decision call
+        import time
+        db = GameDatabase(self.temp_db.name, batch_size=100, flush_interval=0.05)
+        self.addCleanup(db.close)
+        db.log_decision(session_id, "move", "north_trail")
+        for _ in range(200):
+            if db.conn.execute("SELECT COUNT(*) FROM player_decisions").fetchone()[0] == 5:
+                break
+            time.sleep(0.01)
+        self.assertEqual(db.conn.execute("SELECT COUNT(*) FROM player_decisions").fetchone()[0], 5)
+    
+    def test_write_behind_logger(self):
+        """Test queued decisions reach the database after a flush"""
+        session_id = self.game.db.start_new_session("TestPlayer")
+        for _ in range(5):
+            self.game.decisions.log_decision(session_id, "move", "north_trail")
+        self.game.decisions.flush()
+        
+        total = self.game.db.conn.execute("SELECT total_decisions FROM game_sessions WHERE id = ?",
+                                          (session_id,)).fetchone()[0]
+        self.assertEqual(total, 5)
+        stats = self.game.decisions.stats()
+        self.assertEqual(stats["written"], 5)
+        self.assertEqual(stats["queue_depth"], 0)
+    
+    def test_headless_prompts(self):
+        """Test driving prompts and combat one input line at a time"""
+        self.game.initialize_player()
+        self.assertIsNotNone(self.game.pending_prompt)
+        self.game.process_input("Tester")
+        self.assertEqual(self.game.player.name, "Tester")
+        self.assertEqual(self.game.next_prompt().kind, "command")
+        
+        won = []
+        self.game.start_combat("forest_wolf", won.append)
+        prompt = self.game.next_prompt()
+        self.assertEqual(prompt.kind, "combat_action")
+        self.assertEqual(prompt.options, ("1", "2", "3"))
+        while not won:
+            self.game.process_input("1")
+        self.assertEqual(won, [True])
+        self.assertIsNone(self.game.pending_prompt)
+        self.assertIn("You defeated the forest wolf!", self.game.io.drain())
+    
+    def test_null_frontend(self):
+        """Test the null frontend skips rendering but still answers prompts"""
+        game = AdvancedAdventureGame(db=self.game.db, decisions=self.game.decisions,
+                                     io=NullIO(["Tester", "look", "status"]))
+        game.initialize_player()
+        game.resolve_prompts()
+        game.process_input(game.io.read(game.next_prompt()))
+        self.assertEqual(game.player.name, "Tester")
+        self.assertEqual(game.io.output, [])
+    
+    def test_simulator_is_reproducible(self):
+        """Test seeded simulations give identical summaries"""
+        from simulator import run_simulation
+        params = {"enemies": ["goblin_warrior"], "level": 1, "policy": "random"}
+        first = run_simulation("combat", params, runs=200, seed=7, batch_size=50)
+        second = run_simulation("combat", params, runs=200, seed=7, batch_size=80)
+        self.assertEqual(first["goblin_warrior"].as_dict(), second["goblin_warrior"].as_dict())
+        self.assertEqual(first["goblin_warrior"].runs, 200)
+        
+        # Random walks are summarised by their first locations, not one entry per distinct path
+        routes = run_simulation("routes", {"route": None, "policy": "random", "depth": 2}, runs=300, seed=7)
+        self.assertEqual(sum(summary.runs for summary in routes.values()), 300)
+        self.assertTrue(all(key.startswith("forest_start") and key.count(">") <= 2 for key in routes))
+        self.assertLessEqual(len(routes), 2 * len(self.game.locations["forest_start"].exits))
+    
+    def test_vectorized_combat_matches_scalar(self):
+        """Test the NumPy combat resolver against the game's own combat rules"""
+        import vector_combat
+        if vector_combat.np is None:
+            self.skipTest("NumPy not installed")
+        
+        matchups = vector_combat.random_matchups(500, seed=3)
+        vectorized = vector_combat.resolve_matchups(matchups)
+        scalar = vector_combat.resolve_fights_scalar(matchups["players"], matchups["enemies"],
+                                                     matchups["flee_below"], matchups["draws"])
+        for key, values in scalar.items():
+            self.assertEqual(vectorized[key].tolist(), values, key)
+    
+    def test_world_graph(self):
+        """Test exit validation, alias lookup and route queries"""
+        from world import Location, WorldError, WorldGraph
+        graph = self.game.world_graph
+        self.assertEqual(graph.resolve_exit("forest_start", "clearing"), "east_clearing")
+        self.assertEqual(graph.resolve_exit("forest_start", "North"), "north_trail")
+        self.assertIsNone(graph.resolve_exit("forest_start", "goblin"))
+        self.assertEqual(graph.resolve_item(["magic_crystal", "gold_coin"], "coin"), "gold_coin")
+        self.assertEqual(graph.shortest_path("east_clearing", "treasure_chamber"),
+                         ["east_clearing", "forest_start", "north_trail", "goblin_camp", "treasure_chamber"])
+        self.assertEqual(graph.reachable("forest_start"), set(self.game.locations))
+        
+        # Next-hop tables are kept for the most recently used targets only
+        small = WorldGraph(self.game.locations, self.game.items_db, route_cache=2)
+        for target in ["treasure_chamber", "east_clearing", "treasure_chamber", "goblin_camp"]:
+            small.next_step("forest_start", target)
+        self.assertEqual(list(small._next_hops), [small.ids["treasure_chamber"], small.ids["goblin_camp"]])
+        
+        broken = {"forest_start": Location("Start", "", ("nowhere",), (), (), ())}
+        with self.assertRaises(WorldError):
+            WorldGraph(broken, self.game.items_db)
+    
+    def test_world_is_shared_and_cached(self):
+        """Test sessions share one compiled world and taking items copies on write"""
+        import world
+        other = AdvancedAdventureGame(db=self.game.db, decisions=self.game.decisions, io=BufferIO())
+        self.assertIs(other.world, self.game.world)
+        
+        other.create_player("Tester")
+        other.take_item("sword")
+        self.assertEqual(other.items_at("forest_start"), ())
+        self.assertEqual(self.game.items_at("forest_start"), ("rusty_sword",))
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            source = Path(world.__file__).parent / "worlds" / "default.json"
+            world._loaded_worlds.clear()
+            compiled = world.load_world(source, cache_dir)
+            self.assertEqual(len(list(Path(cache_dir).glob("*.pickle"))), 1)
+            world._loaded_worlds.clear()
+            cached = world.load_world(source, cache_dir)
+            self.assertEqual(cached.locations, compiled.locations)
+            world._loaded_worlds.clear()
+    
+    def test_session_world_overlay(self):
+        """Test sessions record only their own changes on top of the shared world"""
+        config = type("AlwaysFight", (GameConfig,), {"ENEMY_ENCOUNTER_RATE": 1.0})
+        game = AdvancedAdventureGame(db=self.game.db, decisions=self.game.decisions,
+                                     io=BufferIO(), config=config, saves=self.game.saves)
+        game.create_player("Tester")
+        game.player.attack_power = 1000
+        self.assertEqual(game.world_state.changes(), 0)
+        
+        game.process_input("go west")
+        game.process_input("1")
+        self.assertEqual(game.pending_prompt.kind, "riddle")
+        game.process_input("keyboard")
+        game.process_input("take key")
+        self.assertEqual(game.world_state.enemies_at("west_river"), ())
+        self.assertEqual(game.items_at("west_river"), ())
+        self.assertEqual(game.world_state.changes(), 3)
+        
+        # Defeated enemies and one-time events stay done on a second visit
+        game.process_input("go forest")
+        game.process_input("go west")
+        self.assertIsNone(game.pending_prompt)
+        self.assertEqual(game.current_location, "west_river")
+        self.assertEqual(self.game.world_state.enemies_at("west_river"), ("river_serpent",))
+        self.assertEqual(self.game.items_at("west_river"), ("ancient_key",))
+        
+        # Autosaves journal only the locations changed since the last one
+        game.world_state.remove_item("forest_start", "rusty_sword")
+        self.assertEqual(game.world_state.take_changes(), {"removed_items": {"forest_start": ["rusty_sword"]}})
+        self.assertEqual(game.world_state.take_changes(), {})
+    
+    def test_save_journal_and_load(self):
+        """Test autosave journals deltas, compacts them, and load restores the manual save"""
+        import json
+        save_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(save_dir.cleanup)
+        saves = FileSaveStore(save_dir.name, compact_every=3)
+        config = type("NoFights", (GameConfig,), {"ENEMY_ENCOUNTER_RATE": 0.0})
+        game = AdvancedAdventureGame(db=self.game.db, decisions=self.game.decisions,
+                                     io=BufferIO(), config=config, saves=saves)
+        game.create_player("Tester")
+        game.process_input("take sword")
+        game.process_input("go east")
+        save, snapshot, journal = saves.paths("Tester")
+        self.assertFalse(save.exists())
+        self.assertTrue(snapshot.exists())
+        self.assertFalse(journal.exists())
+        
+        game.process_input("take coin")
+        game.process_input("go forest")
+        self.assertEqual(len(journal.read_bytes().splitlines()), 1)
+        self.assertEqual(saves.resume("Tester"), game.snapshot())
+        generation, record = journal.read_bytes().split(b" ", 1)
+        self.assertEqual(generation, snapshot.read_bytes().split(b"\n", 1)[0])
+        record = json.loads(record)
+        self.assertEqual(record["triggered_events"], {"forest_start": ["tutorial_guide"]})
+        self.assertNotIn("player", record)
+        
+        for _ in range(3):
+            game.process_input("go east")
+            game.process_input("go forest")
+            records = len(journal.read_bytes().splitlines()) if journal.exists() else 0
+            self.assertLessEqual(records, 3)
+        self.assertEqual(saves.resume("Tester"), game.snapshot())
+        
+        # Autosaves after a move do not replace the manual save
+        game.process_input("save")
+        expected = game.snapshot()
+        game.process_input("use sword")
+        game.process_input("go forest")
+        self.assertEqual(saves.resume("Tester")["location"], "forest_start")
+        game.process_input("load")
+        self.assertEqual(game.snapshot(), expected)
+        self.assertEqual(saves.resume("Tester"), expected)
+        
+        # A crash after a new snapshot but before the journal is dropped replays nothing stale
+        game.process_input("go forest")
+        stale = journal.read_bytes()
+        saves.checkpoint("Tester", expected)
+        journal.write_bytes(stale)
+        self.assertEqual(saves.resume("Tester"), expected)
+        self.assertEqual(FileSaveStore(save_dir.name).resume("Tester"), expected)
+        self.assertEqual(game.inventory.count("rusty_sword"), 1)
+        self.assertEqual(game.items_at("forest_start"), ())
+    
+    def test_database_saves_and_retention(self):
+        """Test saves live in the database, newest first, pruned per kind"""
+        db = self.game.db
+        saves = DatabaseSaveStore(db, compact_every=2, keep=3, writer=self.game.decisions)
+        self.game.saves = saves
+        self.game.config = type("NoFights", (GameConfig,), {"ENEMY_ENCOUNTER_RATE": 0.0})
+        self.game.create_player("Tester")
+        
+        for score in range(5):
+            self.game.game_score = score
+            self.game.save_game()
+        self.game.process_input("take sword")
+        for _ in range(4):
+            self.game.process_input("go north")
+            self.game.process_input("go forest")
+        self.assertEqual(saves.resume("Tester"), self.game.snapshot())
+        self.assertEqual(saves.resume("Tester")["inventory"], {"rusty_sword": 1})
+        self.assertEqual(saves.load("Tester")["inventory"], {})
+        
+        counts = dict(db.conn.execute("SELECT kind, COUNT(*) FROM saves WHERE player_name = 'Tester' GROUP BY kind"))
+        self.assertEqual(counts, {"manual": 3, "auto": GameConfig.AUTOSAVE_RETENTION})
+        self.assertIsNone(saves.load("Nobody"))
+        self.assertIsNone(saves.resume("Nobody"))
+        
+        # Save, move, load: back where the save was made
+        self.game.save_game()
+        self.game.process_input("go north")
+        self.game.load_game()
+        self.assertEqual(self.game.current_location, "forest_start")
+        self.game.load_game(autosaved=True)
+        self.assertEqual(self.game.current_location, "forest_start")
+        
+        plan = " ".join(row[-1] for row in db.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM saves WHERE player_name = 'Tester' AND kind = 'auto' "
+            "ORDER BY saved_at DESC, id DESC LIMIT 1"))
+        self.assertIn("idx_saves_player_kind_time", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+    
+    def test_record_and_replay(self):
+        """Test a recorded session replays identically from its seed and inputs"""
+        import replay
+        game = self.game
+        game.initialize_player()
+        game.process_input("Tester")
+        for command in ["go north", "go goblin", "take armor", "go north", "go forest", "go east", "status"]:
+            game.process_input(command)
+            while game.pending_prompt and game.game_state == GameState.PLAYING:
+                game.process_input({"merchant": "1", "riddle": "keyboard"}.get(game.pending_prompt.kind, "1"))
+        # Inputs are written along with each move, not only at the end of the session
+        game.decisions.flush()
+        self.assertIn(("command", "go east"), game.db.session_inputs(game.session_id))
+        game.process_input("quit")
+        
+        conn = replay.connect_readonly(self.temp_db.name)
+        self.addCleanup(conn.close)
+        session = replay.load_session(conn, game.session_id)
+        self.assertEqual(session["seed"], game.seed)
+        self.assertEqual(session["inputs"][0], ("player_name", "Tester"))
+        self.assertEqual(len(session["inputs"]), game.input_count)
+        
+        result = replay.replay_session(session)
+        self.assertTrue(result["matches"], result)
+        self.assertEqual(result["location"], game.current_location)
+        self.assertEqual(result["health"], game.player.health)
+        
+        # Weak players in forced fights need different answers, so the replay diverges
+        harder = type("Harder", (GameConfig,), {"ENEMY_ENCOUNTER_RATE": 1.0, "STARTING_ATTACK": 1})
+        self.assertFalse(replay.replay_session(session, harder)["matches"])
+        
+        # A session resumed from an autosave did not start from a fresh game, so it is not replayable
+        resumed = AdvancedAdventureGame(db=game.db, decisions=game.decisions, io=BufferIO())
+        resumed.create_player("Tester")
+        resumed.load_game(autosaved=True)
+        self.assertIn("Game loaded successfully!", resumed.io.drain())
+        resumed.close_session()
+        self.assertIsNone(replay.load_session(conn, resumed.session_id))
+        self.assertIsNotNone(replay.load_session(conn, game.session_id))
+    
+    def test_summary_statistics(self):
+        """Test summary tables track sessions incrementally and match a full rebuild"""
+        db = self.game.db
+        for name, score, state in [("Ann", 120, GameState.VICTORY), ("Bob", 80, GameState.GAME_OVER),
+                                   ("Ann", 300, GameState.GAME_OVER), ("Cy", 50, GameState.VICTORY)]:
+            session_id = db.start_new_session(name)
+            db.end_session(session_id, score, state, 0)
+        db.end_session(session_id, 999, GameState.VICTORY, 0)
+        db.start_new_session("Dee")
+        
+        stats = db.statistics(top=2)
+        self.assertEqual(stats["sessions"], 5)
+        self.assertEqual(stats["victories"], 2)
+        self.assertAlmostEqual(stats["average_score"], 550 / 4)
+        self.assertEqual(stats["top_players"], [("Ann", 300), ("Bob", 80)])
+        self.assertEqual(db.player_statistics("Ann"),
+                         {"sessions": 2, "finished": 2, "victories": 1, "best_score": 300})
+        
+        db.conn.execute("UPDATE game_sessions SET final_score = 50 WHERE id = ?", (session_id,))
+        db.rebuild_statistics()
+        self.assertEqual(db.statistics(top=2), stats)
+    
+    def test_export_partitions_and_resume(self):
+        """Test the export writes dated CSV.gz partitions and resumes after the last id"""
+        import csv
+        import gzip
+        import export
+        db = self.game.db
+        for i in range(5):
+            session_id = db.start_new_session(f"P{i}")
+            for move in range(3):
+                db.log_decision(session_id, "move_from_forest_start", "north_trail")
+            db.end_session(session_id, 10 * i, GameState.GAME_OVER, 0)
+        running = db.start_new_session("Still Playing")
+        db.log_decision(running, "move", "north_trail", "forest_start", "north_trail")
+        db.flush()
+        
+        out = tempfile.TemporaryDirectory()
+        self.addCleanup(out.cleanup)
+        first = export.export_all(self.temp_db.name, out.name, chunk_rows=4, checkpoint_rows=8)
+        self.assertEqual(first["game_sessions"]["rows"], 5)
+        self.assertEqual(first["player_decisions"]["rows"], 16)
+        self.assertEqual(first["locations"]["rows"], 2)
+        self.assertEqual(len(list(Path(out.name, "locations").glob("part-*.csv.gz"))), 1)
+        
+        parts = sorted(Path(out.name, "player_decisions").glob("date=*/part-*.csv.gz"))
+        self.assertEqual(len(parts), 2)
+        rows = []
+        for part in parts:
+            with gzip.open(part, "rt", newline="") as f:
+                rows += list(csv.DictReader(f))
+        self.assertEqual([int(row["id"]) for row in rows], list(range(1, 17)))
+        
+        db.log_decision(running, "move", "east_clearing", "north_trail", "east_clearing")
+        db.end_session(running, 5, GameState.GAME_OVER, 0)
+        second = export.export_all(self.temp_db.name, out.name)
+        self.assertEqual(second["game_sessions"]["rows"], 1)
+        self.assertEqual(second["player_decisions"]["rows"], 1)
+        self.assertEqual(second["locations"]["rows"], 1)
+        
+        # A recreated database is exported from the start, not after the old resume points
+        db.close()
+        os.unlink(self.temp_db.name)
+        fresh = GameDatabase(self.temp_db.name)
+        fresh.end_session(fresh.start_new_session("New"), 1, GameState.GAME_OVER, 0)
+        fresh.close()
+        third = export.export_all(self.temp_db.name, out.name)
+        self.assertEqual(third["game_sessions"]["rows"], 1)
+        self.assertEqual(third["game_sessions"]["last_id"], 1)
+    
+    def test_route_analysis(self):
+        """Test moves are logged with interned ids and analysed in one pass"""
+        import analysis
+        db = self.game.db
+        routes = [["forest_start", "north_trail", "treasure_chamber"],
+                  ["forest_start", "north_trail", "treasure_chamber"],
+                  ["forest_start", "east_clearing"]]
+        for route in routes:
+            session_id = db.start_new_session("Walker")
+            for source, target in zip(route, route[1:]):
+                db.log_decision(session_id, "move", target, source, target)
+            db.end_session(session_id, 0, GameState.GAME_OVER, 0)
+        self.assertEqual(sorted(db.location_keys().values()),
+                         ["east_clearing", "forest_start", "north_trail", "treasure_chamber"])
+        
+        for chunk_rows in (1, 1000):
+            result = analysis.analyze(db.conn, chunk_rows=chunk_rows)
+            self.assertEqual((result.sessions, result.moves), (3, 5))
+            self.assertEqual(result.transition_counts()[("forest_start", "north_trail")], 2)
+            self.assertEqual(result.top_paths(1), [(routes[0], 2)])
+            self.assertEqual(result.top_drop_offs(), [("east_clearing", 1)])
+            self.assertEqual(len(result.gaps), 2)
+        
+        # Ids from a huge world: counts stay sparse instead of an id-squared matrix
+        keys = {7: "forest_start", 2_000_000: "deep_woods", 4_000_000_000: "treasure_chamber"}
+        result = analysis.RouteAnalysis(keys)
+        moments = [f"2024-06-01T10:00:0{second}" for second in range(4)]
+        result.add_chunk([(1, 7, 2_000_000, moments[0]), (1, 2_000_000, 4_000_000_000, moments[1])])
+        result.add_chunk([(2, 7, 2_000_000, moments[2]), (2, 2_000_000, 7, moments[3])])
+        result.finish()
+        self.assertEqual(result.transition_counts(), {("forest_start", "deep_woods"): 2,
+                                                      ("deep_woods", "treasure_chamber"): 1,
+                                                      ("deep_woods", "forest_start"): 1})
+        self.assertEqual(result.top_paths(), [(["forest_start", "deep_woods", "treasure_chamber"], 1)])
+        self.assertEqual(result.top_drop_offs(), [("forest_start", 1)])
+    
+    def test_queued_json_logging(self):
+        """Test logging is queued to JSON lines, sampled per event, and not configured on import"""
+        import json
+        import logging
+        import game_logging
+        self.assertFalse(any(getattr(h, "baseFilename", "").endswith(GameConfig.LOG_FILE_NAME)
+                             for h in logging.getLogger().handlers))
+        
+        log_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(log_dir.cleanup)
+        log_file = os.path.join(log_dir.name, "game.log")
+        previous_level = logging.getLogger().level
+        self.addCleanup(logging.getLogger().setLevel, previous_level)
+        game_logging.configure_logging("INFO", {"move": 3}, game_logging.file_handler(log_file, max_bytes=10**6))
+        log = logging.getLogger("adventure_quest")
+        for step in range(7):
+            log.info("Player moved to: %s", f"room_{step}", extra={"event": "move", "location": f"room_{step}"})
+        log.info("Player took item: %s", "Rusty Sword", extra={"event": "take"})
+        game_logging.shutdown_logging()
+        
+        with open(log_file, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual([e.get("location") for e in entries], ["room_0", "room_3", "room_6", None])
+        self.assertEqual(entries[0]["sample_rate"], 3)
+        self.assertEqual(entries[-1]["msg"], "Player took item: Rusty Sword")
+    
+    def test_metrics(self):
+        """Test timed calls feed histograms shown by stats, Prometheus and the JSON dump"""
+        import json
+        import urllib.request
+        from metrics import METRICS, serve_metrics
+        game = self.game
+        game.create_player("Timer")
+        game.process_input("stats")
+        self.assertIn("Metrics are disabled", game.io.drain())
+        self.assertEqual(METRICS.snapshot()["histograms"], {})
+        
+        METRICS.enabled = True
+        self.addCleanup(METRICS.reset)
+        self.addCleanup(setattr, METRICS, "enabled", False)
+        game.config = type("Peaceful", (GameConfig,), {"ENEMY_ENCOUNTER_RATE": 0})
+        for command in ["go north", "go south", "look"]:
+            game.process_input(command)
+        game.process_input("stats")
+        self.assertIn('game_call_seconds{call="move_to_location"}', game.io.drain())
+        
+        # Saves are written behind; let the writer finish timing them
+        game.decisions.flush()
+        histograms = METRICS.snapshot()["histograms"]
+        self.assertEqual(histograms['game_call_seconds{call="process_command"}']["count"], 4)
+        self.assertEqual(histograms['game_call_seconds{call="move_to_location"}']["count"], 2)
+        
+        http = serve_metrics("127.0.0.1", 0)
+        self.addCleanup(http.server_close)
+        self.addCleanup(http.shutdown)
+        with urllib.request.urlopen(f"http://127.0.0.1:{http.server_address[1]}/metrics") as response:
+            text = response.read().decode("utf-8")
+        self.assertIn("# TYPE game_call_seconds histogram", text)
+        self.assertIn('game_call_seconds_count{call="move_to_location"} 2', text)
+        self.assertIn('game_call_seconds_bucket{call="move_to_location",le="+Inf"} 2', text)
+        
+        out = tempfile.TemporaryDirectory()
+        self.addCleanup(out.cleanup)
+        dump = os.path.join(out.name, "metrics.json")
+        METRICS.dump(dump)
+        with open(dump) as f:
+            self.assertEqual(json.load(f)["histograms"].keys(), histograms.keys())
+    
+    def test_session_profiler(self):
+        """Test the profiler writes hotspots, subsystem timing and collapsed stacks"""
+        import time
+        import profiling
+        out = tempfile.TemporaryDirectory()
+        self.addCleanup(out.cleanup)
+        files = profiling.profile_session(profiling.scripted_workload(), range(2), "cprofile", out.name, top=30)
+        report = files["report"].read_text(encoding="utf-8")
+        for subsystem in profiling.SUBSYSTEMS:
+            self.assertIn(subsystem, report)
+        self.assertIn("move_to_location", report)
+        self.assertTrue(files["pstats"].exists())
+        
+        def busy():
+            deadline = time.perf_counter() + 0.05
+            while time.perf_counter() < deadline:
+                pass
+        with profiling.SamplingProfiler(0.001) as sampler:
+            busy()
+        collapsed = Path(out.name, "stacks.collapsed")
+        sampler.write_collapsed(collapsed)
+        stack, count = collapsed.read_text().splitlines()[0].rsplit(" ", 1)
+        self.assertTrue(stack.split(";")[-1].startswith("busy ("))
+        self.assertGreater(int(count), 0)
+    
+    def test_benchmark_gate(self):
+        """Test the benchmark suite covers every metric and flags regressions past tolerance"""
+        import benchmarks
+        results = benchmarks.run_suite(scale=0.01, repeat=1)
+        self.assertEqual(results.keys(), benchmarks.SUITE_METRICS.keys())
+        self.assertTrue(all(value > 0 for value in results.values()))
+        
+        baseline = {"metrics": {"dispatch_commands_per_sec": 1000, "save_ms": 1.0, "load_ms": 1.0},
+                    "tolerances": {"load_ms": 0.5}}
+        current = {"dispatch_commands_per_sec": 700, "save_ms": 1.1, "load_ms": 1.4, "move_latency_us": 50}
+        rows = {row["metric"]: row for row in benchmarks.compare(current, baseline, tolerance=0.2)}
+        self.assertTrue(rows["dispatch_commands_per_sec"]["regressed"])
+        self.assertFalse(rows["save_ms"]["regressed"])
+        self.assertFalse(rows["load_ms"]["regressed"])
+        self.assertIsNone(rows["move_latency_us"]["baseline"])
+    
+    def test_command_registry(self):
+        """Test commands resolve by alias and unique prefix, report ambiguity, and accept plugins"""
+        from commands import COMMANDS, AmbiguousCommand, CommandError
+        self.assertEqual(COMMANDS.parse("INV")[0].name, "inventory")
+        self.assertEqual(COMMANDS.parse("tr  treasure chamber "), (COMMANDS.commands["travel"], "treasure chamber"))
+        self.assertEqual(COMMANDS.resolve("walk").name, "go")
+        self.assertIsNone(COMMANDS.resolve("dance"))
+        with self.assertRaises(AmbiguousCommand) as caught:
+            COMMANDS.resolve("s")
+        self.assertEqual(caught.exception.candidates, ["save", "stats", "status"])
+        
+        registry = COMMANDS.copy()
+        registry.register("dance", lambda game, style: game.io.write(f"You dance a {style}!"), "Dance", "style")
+        with self.assertRaises(CommandError):
+            registry.register("jig", print, aliases=("go",))
+        self.assertIsNone(COMMANDS.resolve("dance"))
+        
+        game = AdvancedAdventureGame(db=self.game.db, decisions=self.game.db, io=BufferIO(), commands=registry)
+        game.create_player("Dancer")
+        game.io.drain()
+        game.process_input("da jig")
+        self.assertEqual(game.io.drain(), "You dance a jig!")
+        game.process_input("go")
+        self.assertIn("Usage: go [place]", game.io.drain())
+        game.inventory.add("health_potion")
+        game.player.health = 50
+        game.process_input("use potion")
+        self.assertEqual(game.player.health, 80)
+        
+        from game_server import GameServer
+        trimmed = COMMANDS.without("stats")
+        self.assertIsNone(trimmed.resolve("stats"))
+        self.assertEqual(trimmed.resolve("st").name, "status")
+        self.assertIn("stats", COMMANDS.commands)
+        server = GameServer(self.temp_db.name)
+        self.addCleanup(server.db.close)
+        self.addCleanup(server.decisions.close)
+        game = server.new_game()
+        game.create_player("Remote")
+        game.io.drain()
+        game.process_input("stats")
+        self.assertIn("Unknown command", game.io.drain())
+
+    def test_world_generator(self):
+        """Test generated worlds are seeded, connected, in the world schema and playable"""
+        import json
+        import worldgen
+        from world import load_world
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = [os.path.join(tmp, name) for name in ("a.json", "b.json", "c.json")]
+            for path, seed in zip(paths, (7, 7, 8)):
+                stats = worldgen.generate_world(worldgen.WorldSpec(500, seed, item_rate=1.0), path)
+            self.assertEqual(Path(paths[0]).read_bytes(), Path(paths[1]).read_bytes())
+            self.assertNotEqual(Path(paths[0]).read_bytes(), Path(paths[2]).read_bytes())
+            self.assertGreater(stats["items"], 250)
+            
+            data = json.loads(Path(paths[0]).read_text(encoding="utf-8"))
+            default = json.loads((Path(__file__).parent / GameConfig.WORLD_FILE).read_text(encoding="utf-8"))
+            self.assertEqual(set(data), set(default))
+            self.assertEqual(set(data["locations"]["forest_2"]), set(default["locations"]["forest_start"]))
+            
+            world = load_world(paths[0], cache_dir=tmp)
+            self.assertEqual(len(world.locations), 500)
+            self.assertEqual(len(world.graph.reachable("forest_start")), 500)
+            self.assertEqual(world.locations["treasure_chamber"].enemies, ("treasure_guardian",))
+            
+            config = type("GeneratedConfig", (GameConfig,), {"WORLD_FILE": paths[0], "WORLD_CACHE_DIR": tmp})
+            game = AdvancedAdventureGame(db=self.game.db, decisions=self.game.db, io=NullIO(), config=config)
+            game.create_player("Explorer")
+            self.assertIs(game.world, world)
+            game.process_input("go forest_1")
+            self.assertEqual(game.current_location, "forest_1")
+    
+    def test_world_region_store(self):
+        """Test a compiled region store matches the world file and keeps only hot regions resident"""
+        import io
+        import json
+        import world_store
+        from world import load_world
+        source = Path(__file__).parent / GameConfig.WORLD_FILE
+        text = source.read_text(encoding="utf-8")
+        reader = world_store._JsonReader(io.StringIO(text), chunk_size=5)
+        sections = {key: reader.value() for key in reader.members()}
+        self.assertEqual(sections, json.loads(text))
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "default.sqlite")
+            stats = world_store.build_store(str(source), path, region_size=2)
+            self.assertEqual(stats["unreachable"], 0)
+            expected = load_world(str(source), cache_dir=tmp)
+            store = world_store.RegionStore(path, cache_regions=2)
+            self.addCleanup(store.close)
+            stored = world_store.StoreWorld(store)
+            self.assertEqual(store.loads, 0)
+            
+            for key in ("forest_start", "treasure_chamber", "north_trail"):
+                self.assertEqual(stored.locations[key], expected.locations[key])
+                self.assertEqual(stored.graph.shortest_path(key, "treasure_chamber"),
+                                 expected.graph.shortest_path(key, "treasure_chamber"))
+            self.assertLessEqual(len(store.regions), 2)
+            self.assertEqual(set(stored.locations), set(expected.locations))
+            self.assertNotIn("nowhere", stored.locations)
+            for text in ("treasure", "north", "clearing", "zzz"):
+                self.assertEqual(stored.graph.resolve_location(text), expected.graph.resolve_location(text))
+            self.assertEqual(stored.graph.shortest_path("forest_start", "hidden_cave"),
+                             expected.graph.shortest_path("forest_start", "hidden_cave"))
+            
+            config = type("StoreConfig", (GameConfig,), {"WORLD_FILE": path})
+            game = AdvancedAdventureGame(db=self.game.db, decisions=self.game.db, io=NullIO(), config=config)
+            self.assertIsInstance(game.world, world_store.StoreWorld)
+            game.create_player("Explorer")
+            game.process_input("go east")
+            self.assertEqual(game.current_location, "east_clearing")
+            game.world.store.close()
+    
+    def test_world_pack(self):
+        """Test a mapped world pack reads back the same world as the file it was built from"""
+        import worldgen
+        import world_pack
+        from world import load_world
+        with tempfile.TemporaryDirectory() as tmp:
+            source, path = os.path.join(tmp, "world.json"), os.path.join(tmp, "world.pack")
+            worldgen.generate_world(worldgen.WorldSpec(300, seed=3, item_rate=1.0, event_rate=0.5), source)
+            world_pack.build_pack(source, path)
+            expected = load_world(source, cache_dir=tmp)
+            packed = world_pack.open_pack(path)
+            self.addCleanup(packed.pack.close)
+            
+            self.assertEqual(list(packed.locations), list(expected.locations))
+            for key, location in expected.locations.items():
+                self.assertEqual(packed.locations[key], location)
+            self.assertEqual(dict(packed.items), dict(expected.items))
+            self.assertEqual(dict(packed.enemies), dict(expected.enemies))
+            self.assertNotIn("nowhere", packed.locations)
+            for text in ("treasure", "forest", "river_1", "9", "zzz"):
+                self.assertEqual(packed.graph.resolve_location(text), expected.graph.resolve_location(text))
+            for key in ("forest_start", "forest_150", "treasure_chamber"):
+                self.assertEqual(len(packed.graph.shortest_path(key, "treasure_chamber")),
+                                 len(expected.graph.shortest_path(key, "treasure_chamber")))
+            self.assertEqual(len(packed.graph.shortest_path("forest_start", "forest_150")),
+                             len(expected.graph.shortest_path("forest_start", "forest_150")))
+            self.assertEqual(packed.graph.resolve_exit("forest_start", "forest_1"), "forest_1")
+            
+            game = AdvancedAdventureGame(db=self.game.db, decisions=self.game.db, io=NullIO(), world=packed)
+            game.create_player("Explorer")
+            game.process_input("go forest_1")
+            self.assertEqual(game.current_location, "forest_1")
+    
+    def test_game_server(self):
+        """Test concurrent TCP players each get a session, and database waits stay off the event loop"""
+        import asyncio
+        import threading
+        from unittest import mock
+        from game_server import GameServer
+        patcher = mock.patch.object(GameConfig, "ENEMY_ENCOUNTER_RATE", 0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        async def play(port, *lines):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            await reader.readuntil(b"adventurer? ")
+            output = []
+            for line in lines:
+                writer.write(line.encode("utf-8") + b"\n")
+                output.append((await reader.readuntil(b">>> ")).decode("utf-8"))
+            return reader, writer, output
+        
+        async def scenario():
+            server = GameServer(self.temp_db.name, "127.0.0.1", 0)
+            loop_thread = threading.current_thread()
+            threads = {"start_new_session": [], "end_session": []}
+            
+            def record_thread(name):
+                call = getattr(server.db, name)
+                
+                def recorded(*args):
+                    threads[name].append(threading.current_thread())
+                    return call(*args)
+                setattr(server.db, name, recorded)
+            
+            record_thread("start_new_session")
+            record_thread("end_session")
+            self.assertFalse(server.decisions.saturated(8))
+            self.assertTrue(server.decisions.saturated(GameConfig.DECISION_QUEUE_SIZE + 1))
+            port = await server.start()
+            try:
+                names = [f"Player{i}" for i in range(6)]
+                results = await asyncio.gather(*(play(port, name, "go north", "save", "load", "stats")
+                                                 for name in names))
+                self.assertEqual(server.stats()["sessions"], len(names))
+                for i, (name, (reader, writer, output)) in enumerate(zip(names, results)):
+                    self.assertIn(f"Welcome, {name}!", output[0])
+                    self.assertIn("Winding Forest Trail", output[1])
+                    self.assertIn("Game saved successfully!", output[2])
+                    self.assertIn("Game loaded successfully!", output[3])
+                    self.assertIn("Unknown command", output[4])
+                    if i % 2 == 0:
+                        # Quitting drains the writer and ends the session, which must not stall the loop
+                        writer.write(b"quit\n")
+                        self.assertIn("Thank you for playing!", (await reader.read()).decode("utf-8"))
+                    writer.close()
+                while server.sessions:
+                    await asyncio.sleep(0.01)
+                self.assertEqual(server.stats()["commands"], 5 * len(names) + len(names) // 2)
+                self.assertEqual(len(threads["start_new_session"]), len(names))
+                self.assertEqual(len(threads["end_session"]), len(names))
+                self.assertNotIn(loop_thread, threads["start_new_session"] + threads["end_session"])
+            finally:
+                await server.stop()
+            return names
+        
+        names = asyncio.run(asyncio.wait_for(scenario(), 30))
+        rows = self.game.db.conn.execute("SELECT player_name, total_decisions FROM game_sessions").fetchall()
+        self.assertEqual(sorted(rows), [(name, 1) for name in names])
+    
+    def test_supervisor(self):
+        """Test the supervisor routes players by name, resumes them after a worker dies and merges metrics"""
+        import asyncio
+        import signal
+        from unittest import mock
+        from metrics import METRICS
+        from supervisor import Supervisor, route
+        players = [f"player{i}" for i in range(200)]
+        before = {player: route(player, [0, 1, 2]) for player in players}
+        after = {player: route(player, [0, 2]) for player in players}
+        self.assertEqual({p for p in players if before[p] != after[p]}, {p for p in players if before[p] == 1})
+        
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        for name, value in [("SUPERVISOR_RESTART_DELAY", 0.05),
+                            ("LOG_FILE_NAME", os.path.join(tmp.name, "game_logs.txt"))]:
+            patcher = mock.patch.object(GameConfig, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        METRICS.enabled = True
+        self.addCleanup(METRICS.reset)
+        self.addCleanup(setattr, METRICS, "enabled", False)
+        
+        async def play(port, *lines):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            await reader.readuntil(b"adventurer? ")
+            output = []
+            for line in lines:
+                writer.write(line.encode("utf-8") + b"\n")
+                output.append((await reader.readuntil(b">>> ")).decode("utf-8"))
+            return reader, writer, output
+        
+        async def scenario():
+            supervisor = Supervisor(2, self.temp_db.name, "127.0.0.1", 0, overrides={"ENEMY_ENCOUNTER_RATE": 0})
+            await supervisor.start()
+            try:
+                slot = route("Ada", [0, 1])
+                reader, writer, output = await play(supervisor.port, "Ada", "go north")
+                self.assertIn("Winding Forest Trail", output[1])
+                await supervisor.poll()
+                self.assertEqual(supervisor.workers[slot].sessions, {"Ada": 1})
+                self.assertEqual(supervisor.stats()["sessions"], 1)
+                
+                # Autosaves are written behind the game, so let the move land before the crash
+                saves = DatabaseSaveStore(self.game.db)
+                while (saves.resume("Ada") or {}).get("location") != "north_trail":
+                    await asyncio.sleep(0.01)
+                os.kill(supervisor.workers[slot].process.pid, signal.SIGKILL)
+                self.assertEqual(await reader.read(), b"")
+                writer.close()
+                while not supervisor.restarts:
+                    await asyncio.sleep(0.01)
+                reader, writer, output = await play(supervisor.port, "Ada", "look")
+                self.assertIn("Game loaded successfully!", output[0])
+                self.assertIn("Winding Forest Trail", output[1])
+                writer.close()
+                self.assertEqual(supervisor.orphaned, {})
+                supervisor.orphaned["Ghost"] = 0.0
+                supervisor.prune_orphans()
+                self.assertEqual(supervisor.orphaned, {})
+                
+                while len(supervisor.alive()) < 2:
+                    await asyncio.sleep(0.01)
+                snapshot = (await supervisor.poll()).snapshot()
+                self.assertEqual(snapshot["counters"][f'supervisor_worker_restarts_total{{worker="{slot}"}}'], 1)
+                self.assertEqual(snapshot["counters"][f'supervisor_connections_total{{worker="{1 - slot}"}}'], 1)
+                self.assertEqual(snapshot["histograms"]["server_command_seconds"]["count"], 1)
+                self.assertEqual(supervisor.stats()["commands"], 1)
+            finally:
+                await supervisor.stop()
+        
+        asyncio.run(asyncio.wait_for(scenario(), 60))
+    
     def test_game_initialization(self):
         """Test game initialization"""
         self.assertIsNotNone(self.game.items_db)
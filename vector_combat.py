@@ -0,0 +1,218 @@
+# vector_combat.py
+"""
+Vectorized combat resolution for balance sweeps
+Resolves N independent fights at once with NumPy, one array operation per
+round, following the same attack/flee rules as AdvancedAdventureGame's combat.
+The player policy is "attack, but try to flee once health drops below a
+fraction of max health"; items are not used.
+
+NumPy is optional for the game itself; only this module needs it.
+"""
+
+import random
+from typing import Dict, Optional, Sequence
+
+from config import GameConfig
+from world import load_world
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised only without NumPy
+    np = None
+
+# Outcome codes returned in the "outcome" array
+ONGOING, WON, DIED, FLED = 0, 1, 2, 3
+OUTCOME_NAMES = {ONGOING: "timeout", WON: "won", DIED: "died", FLED: "fled"}
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("vector_combat requires NumPy (pip install numpy)")
+
+
+def resolve_fights(player_attack, player_defense, player_health,
+                   enemy_health, enemy_attack, enemy_defense,
+                   player_max_health=None, player_level=None, player_experience=None,
+                   flee_below=0.0, draws=None, rng=None,
+                   config: type = GameConfig, max_rounds: int = 1000) -> Dict[str, "np.ndarray"]:
+    """Resolve one fight per array element and return per-fight result arrays
+
+    ``draws[i, k]`` is the uniform draw used for fight i's k-th flee attempt,
+    which mirrors the one rng.random() call per flee in the scalar game. When
+    ``draws`` is omitted, fresh draws come from ``rng`` (a NumPy Generator).
+    """
+    _require_numpy()
+    php = np.array(player_health, dtype=np.int64)
+    n = php.shape[0]
+    pmax = np.array(player_max_health if player_max_health is not None else php, dtype=np.int64)
+    patk = np.array(player_attack, dtype=np.int64)
+    pdef = np.array(player_defense, dtype=np.int64)
+    level = np.array(player_level if player_level is not None else np.ones(n), dtype=np.int64)
+    xp = np.array(player_experience if player_experience is not None else np.zeros(n), dtype=np.int64)
+    ehp = np.array(enemy_health, dtype=np.int64)
+    flee_below = np.broadcast_to(np.asarray(flee_below, dtype=np.float64), (n,))
+
+    # Damage never changes during a fight
+    player_damage = np.maximum(1, patk - np.asarray(enemy_defense, dtype=np.int64))
+    enemy_damage = np.maximum(1, np.asarray(enemy_attack, dtype=np.int64) - pdef)
+
+    if draws is not None:
+        draws = np.asarray(draws, dtype=np.float64)
+    elif rng is None:
+        rng = np.random.default_rng()
+
+    outcome = np.zeros(n, dtype=np.int8)
+    rounds = np.zeros(n, dtype=np.int64)
+    flees = np.zeros(n, dtype=np.int64)
+    active = np.ones(n, dtype=bool)
+    rows = np.arange(n)
+
+    for _ in range(max_rounds):
+        if not active.any():
+            break
+
+        flee = active & (php < flee_below * pmax)
+        attack = active & ~flee
+
+        # Player attacks; survivors strike back
+        ehp = np.where(attack, ehp - player_damage, ehp)
+        killed = attack & (ehp <= 0)
+        hit = attack & ~killed
+
+        # Flee attempts; failures give the enemy a free attack
+        escaped = np.zeros(n, dtype=bool)
+        if flee.any():
+            if draws is not None:
+                if (flees[flee] >= draws.shape[1]).any():
+                    raise ValueError("Not enough flee draws for the fights being resolved")
+                draw = draws[rows, np.minimum(flees, draws.shape[1] - 1)]
+            else:
+                draw = rng.random(n)
+            escaped = flee & (draw < config.FLEE_SUCCESS_RATE)
+            hit |= flee & ~escaped
+            flees += flee
+
+        php = np.where(hit, php - enemy_damage, php)
+        died = hit & (php <= 0)
+
+        outcome[killed] = WON
+        outcome[escaped] = FLED
+        outcome[died] = DIED
+        rounds += active
+        active &= ~(killed | escaped | died)
+
+    # Victory rewards and the single level-up check that follows them
+    xp = np.where(outcome == WON, xp + config.COMBAT_XP_REWARD, xp)
+    level_up = (outcome == WON) & (xp >= level * config.BASE_XP_REQUIREMENT)
+    level = level + level_up
+    pmax = pmax + level_up * config.HEALTH_PER_LEVEL
+    php = np.where(level_up, pmax, php)
+
+    return {
+        "outcome": outcome,
+        "rounds": rounds,
+        "player_health": php,
+        "player_max_health": pmax,
+        "player_attack": patk + level_up * config.ATTACK_PER_LEVEL,
+        "player_defense": pdef + level_up * config.DEFENSE_PER_LEVEL,
+        "player_level": level,
+        "player_experience": xp,
+        "enemy_health": ehp,
+        "score": (outcome == WON) * config.COMBAT_VICTORY_BONUS,
+    }
+
+
+class DrawStream:
+    """random.Random stand-in that replays a fixed sequence of draws"""
+
+    def __init__(self, draws: Sequence[float]):
+        self.draws = iter(draws)
+
+    def random(self) -> float:
+        return next(self.draws)
+
+    def choice(self, seq):
+        return seq[0]
+
+
+def resolve_fights_scalar(players: Sequence[Dict[str, int]], enemies: Sequence[str],
+                          flee_below: Sequence[float], draws: Sequence[Sequence[float]],
+                          config: type = GameConfig, max_rounds: int = 1000) -> Dict[str, list]:
+    """Resolve the same fights one at a time through the real game engine
+
+    ``players`` holds dicts of Character fields, ``enemies`` world enemy keys.
+    This is the reference the vectorized resolver is checked against.
+    """
+    from simulator import answer_prompts, make_game
+
+    results = {"outcome": [], "rounds": [], "player_health": [], "player_level": [], "score": []}
+
+    for player, enemy, threshold, fight_draws in zip(players, enemies, flee_below, draws):
+        game = make_game(DrawStream(fight_draws), config)
+        for field, value in player.items():
+            setattr(game.player, field, value)
+
+        def policy(game, prompt, rng, threshold=threshold):
+            return "3" if game.player.health < threshold * game.player.max_health else "1"
+
+        result = []
+        game.start_combat(enemy, result.append)
+        rounds = answer_prompts(game, policy, None, max_rounds)
+
+        if not result:
+            outcome = ONGOING
+        elif result[0]:
+            outcome = WON
+        else:
+            outcome = DIED if game.player.health <= 0 else FLED
+        results["outcome"].append(outcome)
+        results["rounds"].append(rounds)
+        results["player_health"].append(game.player.health)
+        results["player_level"].append(game.player.level)
+        results["score"].append(game.game_score)
+
+    return results
+
+
+def random_matchups(n: int, seed: int = 0, config: type = GameConfig) -> Dict[str, list]:
+    """Random players (levels 1-3) against random enemies, for tests and benchmarks"""
+    rng = random.Random(seed)
+    names = sorted(load_world().enemies)
+    players, enemies, thresholds, draws = [], [], [], []
+
+    for _ in range(n):
+        level = rng.randint(1, 3)
+        max_health = config.STARTING_HEALTH + (level - 1) * config.HEALTH_PER_LEVEL
+        players.append({
+            "level": level,
+            "max_health": max_health,
+            "health": rng.randint(max_health // 2, max_health),
+            "attack_power": config.STARTING_ATTACK + (level - 1) * config.ATTACK_PER_LEVEL,
+            "defense": config.STARTING_DEFENSE + (level - 1) * config.DEFENSE_PER_LEVEL,
+            "experience": rng.choice([0, 50, 75]) * level,
+        })
+        enemies.append(rng.choice(names))
+        thresholds.append(rng.choice([0.0, 0.25, 0.5]))
+        draws.append([rng.random() for _ in range(64)])
+
+    return {"players": players, "enemies": enemies, "flee_below": thresholds, "draws": draws}
+
+
+def resolve_matchups(matchups: Dict[str, list], config: type = GameConfig) -> Dict[str, "np.ndarray"]:
+    """Run random_matchups() output through the vectorized resolver"""
+    players = matchups["players"]
+    enemies = [load_world().enemies[name] for name in matchups["enemies"]]
+    return resolve_fights(
+        player_attack=[p["attack_power"] for p in players],
+        player_defense=[p["defense"] for p in players],
+        player_health=[p["health"] for p in players],
+        player_max_health=[p["max_health"] for p in players],
+        player_level=[p["level"] for p in players],
+        player_experience=[p["experience"] for p in players],
+        enemy_health=[e.health for e in enemies],
+        enemy_attack=[e.attack for e in enemies],
+        enemy_defense=[e.defense for e in enemies],
+        flee_below=matchups["flee_below"],
+        draws=matchups["draws"],
+        config=config,
+    )
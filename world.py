@@ -0,0 +1,535 @@
+# world.py
+"""
+World content and the compiled world graph
+Items, enemies and locations are loaded from a JSON (or TOML) file and
+compiled once into an immutable World that every game session in the
+process shares; a session keeps only a WorldState delta of what it changed.
+Compiled worlds are cached as pickle snapshots keyed by the source file's
+hash, so later starts skip parsing and validation.
+
+The WorldGraph part validates every exit, interns location keys to integer
+ids, and indexes exit and item names so commands resolve by prefix in
+O(log n). Shortest paths are computed per destination on first use and
+cached, which keeps hints and travel cheap even on large generated worlds.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pickle
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from dataclasses import dataclass, fields
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Set, Tuple
+
+from config import GameConfig
+from metrics import instrumented, timed
+
+log = logging.getLogger(__name__)
+
+# Bump when the compiled representation changes so stale caches are ignored
+CACHE_FORMAT = 4
+
+# Where hints point, as in the game
+HINT_TARGET = "treasure_chamber"
+
+def _slotted_getstate(self):
+    return [getattr(self, field.name) for field in fields(self)]
+
+
+def _slotted_setstate(self, state):
+    for field, value in zip(fields(self), state):
+        object.__setattr__(self, field.name, value)
+
+
+def slotted(cls: type) -> type:
+    """Rebuild a dataclass with __slots__, dropping the per-instance __dict__
+
+    This is dataclass(slots=True) for every supported Python, 3.9 included.
+    """
+    names = tuple(field.name for field in fields(cls))
+    namespace = {key: value for key, value in vars(cls).items()
+                 if key not in names and key not in ("__dict__", "__weakref__")}
+    namespace["__slots__"] = names
+    if cls.__dataclass_params__.frozen:
+        # Frozen instances cannot be unpickled through setattr
+        namespace["__getstate__"] = _slotted_getstate
+        namespace["__setstate__"] = _slotted_setstate
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@slotted
+@dataclass(frozen=True)
+class Item:
+    name: str
+    description: str
+    value: int
+    usable: bool = False
+    consumable: bool = False
+
+
+class Enemy(NamedTuple):
+    health: int
+    attack: int
+    defense: int
+
+
+class Location(NamedTuple):
+    name: str
+    description: str
+    exits: Tuple[str, ...]
+    items: Tuple[str, ...]
+    enemies: Tuple[str, ...]
+    special_events: Tuple[str, ...]
+
+
+class WorldError(ValueError):
+    """Raised when a world definition is inconsistent"""
+
+
+def normalize_name(text: str) -> str:
+    """Lower-case a player-typed name and join words with underscores"""
+    return "_".join(text.lower().split())
+
+
+def name_aliases(key: str) -> List[str]:
+    """Every word-boundary suffix of a key: east_clearing -> east_clearing, clearing"""
+    words = key.split("_")
+    return ["_".join(words[i:]) for i in range(len(words))]
+
+
+class PrefixIndex:
+    """Sorted alias table answering 'which keys have an alias starting with text'"""
+
+    def __init__(self, keys: Iterable[str]):
+        entries = []
+        for rank, key in enumerate(keys):
+            for alias in name_aliases(key):
+                entries.append((alias, rank, key))
+        entries.sort()
+        self.aliases = [alias for alias, _, _ in entries]
+        self.entries = [(rank, key) for _, rank, key in entries]
+
+    def matches(self, text: str) -> List[Tuple[int, str]]:
+        """(rank, key) pairs whose aliases start with text"""
+        found = []
+        i = bisect_left(self.aliases, text)
+        while i < len(self.aliases) and self.aliases[i].startswith(text):
+            found.append(self.entries[i])
+            i += 1
+        return found
+
+    def first(self, text: str) -> Optional[str]:
+        """The key named exactly by text, else the earliest-ranked match, or None"""
+        text = normalize_name(text)
+        found = self.matches(text)
+        for _, key in found:
+            if key == text:
+                return key
+        return min(found)[1] if found else None
+
+
+@instrumented
+class GraphQueries:
+    """Graph queries shared by every world representation
+
+    Subclasses intern location keys to ids and supply the lookups below;
+    routes toward HINT_TARGET follow precomputed hints and other routes are
+    searched breadth-first over at most search_limit locations. WorldGraph
+    overrides the routing with its cached next-hop tables.
+    """
+
+    item_index: PrefixIndex
+    search_limit: int = GameConfig.WORLD_SEARCH_LIMIT
+
+    def _location_id(self, key: str) -> Optional[int]:
+        raise NotImplementedError
+
+    def _keys_of(self, location_ids: Sequence[int]) -> List[str]:
+        raise NotImplementedError
+
+    def _exit_reader(self):
+        """Per-location lookup of exit ids"""
+        raise NotImplementedError
+
+    def _hint_reader(self):
+        """Per-location lookup of the next hop toward HINT_TARGET (None or -1 if there is none)"""
+        raise NotImplementedError
+
+    @timed("world_call_seconds", call="resolve_item")
+    def resolve_item(self, present: Sequence[str], text: str) -> Optional[str]:
+        """First item key in present whose name matches text, or None"""
+        matching = {key for _, key in self.item_index.matches(normalize_name(text))}
+        for key in present:
+            if key in matching:
+                return key
+        return None
+
+    def next_step(self, source: str, target: str) -> Optional[str]:
+        """First exit to take on a shortest path from source to target"""
+        path = self.shortest_path(source, target)
+        return path[1] if path and len(path) > 1 else None
+
+    @timed("world_call_seconds", call="shortest_path")
+    def shortest_path(self, source: str, target: str) -> Optional[List[str]]:
+        """Location keys from source to target inclusive, or None if unreachable"""
+        source_id, target_id = self._location_id(source), self._location_id(target)
+        if source_id is None or target_id is None:
+            return None
+        if target == HINT_TARGET:
+            hints = self._hint_reader()
+            path = [source_id]
+            while path[-1] != target_id:
+                hop = hints(path[-1])
+                if hop is None or hop < 0:
+                    return None
+                path.append(hop)
+        else:
+            path = self._search(source_id, target_id)
+            if path is None:
+                return None
+        return self._keys_of(path)
+
+    def _search(self, source_id: int, target_id: int) -> Optional[List[int]]:
+        exits = self._exit_reader()
+        parents = {source_id: source_id}
+        frontier = deque([source_id])
+        while frontier and len(parents) <= self.search_limit:
+            node = frontier.popleft()
+            if node == target_id:
+                path = [node]
+                while path[-1] != source_id:
+                    path.append(parents[path[-1]])
+                return path[::-1]
+            for neighbour in exits(node):
+                if neighbour not in parents:
+                    parents[neighbour] = node
+                    frontier.append(neighbour)
+        return None
+
+
+@instrumented
+class WorldGraph(GraphQueries):
+    """Validated, integer-indexed view of a world's locations"""
+
+    def __init__(self, locations: Mapping[str, Location], items: Mapping[str, object],
+                 start: str = "forest_start", route_cache: int = GameConfig.WORLD_ROUTE_CACHE):
+        problems = []
+        if start not in locations:
+            problems.append(f"start location '{start}' is not defined")
+        for key, location in locations.items():
+            for exit_key in location.exits:
+                if exit_key not in locations:
+                    problems.append(f"{key}: exit to undefined location '{exit_key}'")
+            for item_key in location.items:
+                if item_key not in items:
+                    problems.append(f"{key}: undefined item '{item_key}'")
+        if problems:
+            raise WorldError("Invalid world: " + "; ".join(problems))
+
+        # Intern location keys
+        self.keys: List[str] = list(locations)
+        self.ids: Dict[str, int] = {key: i for i, key in enumerate(self.keys)}
+        self.start = self.ids[start]
+        self.adjacency: List[Tuple[int, ...]] = [
+            tuple(self.ids[exit_key] for exit_key in locations[key].exits) for key in self.keys
+        ]
+        self._reverse: Optional[List[List[int]]] = None
+        self.route_cache = max(1, route_cache)
+        self._next_hops: "OrderedDict[int, array]" = OrderedDict()  # least recently used first
+
+        # Exit indexes are built per location on first use
+        self._exit_indexes: Dict[int, PrefixIndex] = {}
+        self._location_index: Optional[PrefixIndex] = None
+        self.item_index = PrefixIndex(items)
+
+        unreachable = len(self.keys) - len(self.reachable(start))
+        if unreachable:
+            log.warning("World has %d locations unreachable from %s", unreachable, start)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @timed("world_call_seconds", call="resolve_exit")
+    def resolve_exit(self, location: str, text: str) -> Optional[str]:
+        """Exit of location named by text (prefix of any word suffix), or None"""
+        location_id = self.ids[location]
+        index = self._exit_indexes.get(location_id)
+        if index is None:
+            index = PrefixIndex(self.keys[i] for i in self.adjacency[location_id])
+            self._exit_indexes[location_id] = index
+        return index.first(text)
+
+    @timed("world_call_seconds", call="resolve_location")
+    def resolve_location(self, text: str) -> Optional[str]:
+        """Any location named by text, or None"""
+        if self._location_index is None:
+            self._location_index = PrefixIndex(self.keys)
+        return self._location_index.first(text)
+
+    def reachable(self, source: str) -> Set[str]:
+        """Keys of every location reachable from source"""
+        seen = {self.ids[source]}
+        frontier = deque(seen)
+        while frontier:
+            for neighbour in self.adjacency[frontier.popleft()]:
+                if neighbour not in seen:
+                    seen.add(neighbour)
+                    frontier.append(neighbour)
+        return {self.keys[i] for i in seen}
+
+    def _hops_to(self, target: int) -> array:
+        """Next-hop table toward target (-1 where unreachable), cached for the most recent targets"""
+        hops = self._next_hops.get(target)
+        if hops is not None:
+            self._next_hops.move_to_end(target)
+        else:
+            if self._reverse is None:
+                self._reverse = [[] for _ in self.keys]
+                for source, exits in enumerate(self.adjacency):
+                    for exit_id in exits:
+                        self._reverse[exit_id].append(source)
+
+            hops = array("i", [-1]) * len(self.keys)
+            hops[target] = target
+            frontier = deque([target])
+            while frontier:
+                node = frontier.popleft()
+                for source in self._reverse[node]:
+                    if hops[source] == -1:
+                        hops[source] = node
+                        frontier.append(source)
+            self._next_hops[target] = hops
+            while len(self._next_hops) > self.route_cache:
+                self._next_hops.popitem(last=False)
+        return hops
+
+    def next_step(self, source: str, target: str) -> Optional[str]:
+        """First exit to take on a shortest path from source to target"""
+        hop = self._hops_to(self.ids[target])[self.ids[source]]
+        if hop == -1 or source == target:
+            return None
+        return self.keys[hop]
+
+    @timed("world_call_seconds", call="shortest_path")
+    def shortest_path(self, source: str, target: str) -> Optional[List[str]]:
+        """Location keys from source to target inclusive, or None if unreachable"""
+        hops = self._hops_to(self.ids[target])
+        node = self.ids[source]
+        if hops[node] == -1:
+            return None
+        path = [node]
+        while node != hops[node]:
+            node = hops[node]
+            path.append(node)
+        return [self.keys[i] for i in path]
+
+
+class WorldView:
+    """Read-only access to a world's items, enemies and locations"""
+
+    _items: Mapping[str, Item]
+    _enemies: Mapping[str, Enemy]
+    _locations: Mapping[str, Location]
+
+    @property
+    def items(self) -> Mapping[str, Item]:
+        return MappingProxyType(self._items)
+
+    @property
+    def enemies(self) -> Mapping[str, Enemy]:
+        return MappingProxyType(self._enemies)
+
+    @property
+    def locations(self) -> Mapping[str, Location]:
+        return MappingProxyType(self._locations)
+
+
+class World(WorldView):
+    """Immutable, compiled world content shared by every session"""
+
+    def __init__(self, items: Dict[str, Item], enemies: Dict[str, Enemy],
+                 locations: Dict[str, Location], start: str):
+        self._items = items
+        self._enemies = enemies
+        self._locations = locations
+        self.start = start
+        self.graph = WorldGraph(locations, items, start)
+
+
+class WorldState:
+    """One session's changes layered over a shared World
+
+    Only the delta is stored: items taken from each location, enemies
+    defeated and events already triggered. Lookups fall through to the
+    World for everything the session has not touched, so a fresh session
+    costs a few empty containers whatever the world's size. ``dirty``
+    tracks the locations changed since the last take_changes, per section.
+    """
+
+    __slots__ = ("world", "removed_items", "defeated_enemies", "triggered_events", "dirty")
+
+    def __init__(self, world: World):
+        self.world = world
+        self.removed_items: Dict[str, List[str]] = {}
+        self.defeated_enemies: Dict[str, Set[str]] = {}
+        self.triggered_events: Dict[str, Set[str]] = {}
+        self.dirty: Dict[str, Set[str]] = {}
+
+    def items_at(self, location: str) -> Tuple[str, ...]:
+        """Item keys still lying at a location"""
+        items = self.world._locations[location].items
+        removed = self.removed_items.get(location)
+        if not removed:
+            return items
+        remaining = list(items)
+        for item in removed:
+            remaining.remove(item)
+        return tuple(remaining)
+
+    def remove_item(self, location: str, item: str):
+        """Record that one copy of item was taken from location"""
+        if item not in self.items_at(location):
+            raise ValueError(f"No '{item}' left at {location}")
+        self.removed_items.setdefault(location, []).append(item)
+        self.dirty.setdefault("removed_items", set()).add(location)
+
+    def enemies_at(self, location: str) -> Tuple[str, ...]:
+        """Enemies at a location that this session has not defeated"""
+        enemies = self.world._locations[location].enemies
+        defeated = self.defeated_enemies.get(location)
+        if not defeated:
+            return enemies
+        return tuple(enemy for enemy in enemies if enemy not in defeated)
+
+    def defeat_enemy(self, location: str, enemy: str):
+        """Record that enemy was defeated at location"""
+        self.defeated_enemies.setdefault(location, set()).add(enemy)
+        self.dirty.setdefault("defeated_enemies", set()).add(location)
+
+    def has_triggered(self, location: str, event: str) -> bool:
+        """Whether event has already happened at location in this session"""
+        return event in self.triggered_events.get(location, ())
+
+    def trigger_event(self, location: str, event: str):
+        """Record that event happened at location"""
+        self.triggered_events.setdefault(location, set()).add(event)
+        self.dirty.setdefault("triggered_events", set()).add(location)
+
+    def snapshot(self) -> Dict[str, Dict[str, List[str]]]:
+        """The overlay as JSON-friendly save sections"""
+        return {
+            "removed_items": {key: list(items) for key, items in self.removed_items.items()},
+            "defeated_enemies": {key: sorted(enemies) for key, enemies in self.defeated_enemies.items()},
+            "triggered_events": {key: sorted(events) for key, events in self.triggered_events.items()},
+        }
+
+    def take_changes(self) -> Dict[str, Dict[str, List[str]]]:
+        """Snapshot entries of the locations changed since the last call, then mark them clean"""
+        changes = {}
+        for section, locations in self.dirty.items():
+            overlay = getattr(self, section)
+            as_list = list if section == "removed_items" else sorted
+            changes[section] = {key: as_list(overlay[key]) for key in locations}
+        self.dirty = {}
+        return changes
+
+    def restore(self, sections: Mapping[str, Mapping[str, List[str]]]):
+        """Replace the overlay with saved sections"""
+        self.removed_items = {key: list(items) for key, items in sections["removed_items"].items()}
+        self.defeated_enemies = {key: set(enemies) for key, enemies in sections["defeated_enemies"].items()}
+        self.triggered_events = {key: set(events) for key, events in sections["triggered_events"].items()}
+        self.dirty = {}
+
+    def changes(self) -> int:
+        """Number of recorded changes, a proxy for the overlay's size"""
+        return (sum(map(len, self.removed_items.values()))
+                + sum(map(len, self.defeated_enemies.values()))
+                + sum(map(len, self.triggered_events.values())))
+
+
+def compile_world(data: Mapping) -> World:
+    """Build a World from parsed world-file data"""
+    items = {key: Item(**fields) for key, fields in data["items"].items()}
+    enemies = {key: Enemy(**fields) for key, fields in data["enemies"].items()}
+    locations = {
+        key: Location(
+            name=fields["name"],
+            description=fields["description"],
+            exits=tuple(fields["exits"]),
+            items=tuple(fields.get("items") or ()),
+            enemies=tuple(fields.get("enemies") or ()),
+            special_events=tuple(fields.get("special_events") or ()),
+        )
+        for key, fields in data["locations"].items()
+    }
+
+    unknown = {enemy for location in locations.values() for enemy in location.enemies} - set(enemies)
+    if unknown:
+        raise WorldError(f"Invalid world: undefined enemies {', '.join(sorted(unknown))}")
+    return World(items, enemies, locations, data.get("start", "forest_start"))
+
+
+def parse_world_file(path: Path, source: bytes) -> Mapping:
+    """Parse a .json or .toml world file"""
+    if path.suffix == ".toml":
+        import tomllib  # Python 3.11+
+        return tomllib.loads(source.decode("utf-8"))
+    return json.loads(source)
+
+
+# Worlds already loaded by this process, keyed by load_world() arguments
+_loaded_worlds: Dict[Tuple[str, str], World] = {}
+
+
+def load_world(path: Optional[str] = None, cache_dir: Optional[str] = None) -> World:
+    """Load a compiled world, sharing one copy per file within the process
+
+    Defaults come from GameConfig; relative paths are taken from the game directory.
+    A .sqlite path opens a compiled region store instead (see world_store.py), and
+    a .pack path maps a packed world file (see world_pack.py).
+    """
+    key = (str(path or GameConfig.WORLD_FILE), str(cache_dir or GameConfig.WORLD_CACHE_DIR))
+    world = _loaded_worlds.get(key)
+    if world is None:
+        world = _loaded_worlds[key] = _load_world_file(path, cache_dir)
+    return world
+
+
+def _load_world_file(path: Optional[str], cache_dir: Optional[str]) -> World:
+    """Load a world from its cached snapshot, compiling and caching it if needed"""
+    here = Path(__file__).resolve().parent
+    path = here / (path or GameConfig.WORLD_FILE)
+    cache_dir = here / (cache_dir or GameConfig.WORLD_CACHE_DIR)
+
+    if path.suffix == ".sqlite":
+        from world_store import open_store  # region store for huge worlds
+        return open_store(str(path))
+    if path.suffix == ".pack":
+        from world_pack import open_pack  # mapped read-only, shared by every worker
+        return open_pack(str(path))
+
+    source = path.read_bytes()
+    digest = hashlib.sha256(source).hexdigest()
+    cache_file = cache_dir / f"{path.stem}-{digest[:20]}-v{CACHE_FORMAT}.pickle"
+
+    try:
+        with open(cache_file, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        pass
+
+    world = compile_world(parse_world_file(path, source))
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "wb") as f:
+            pickle.dump(world, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        log.warning("Could not write world cache %s: %s", cache_file, e)
+    return world
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Packed world files shared across processes
+A world file is compiled once into a flat binary pack: a string table,
+fixed-width id arrays per location, exit and content lists in offset/value
+form, a hash table from location key to id, a sorted alias table and the
+next hop toward the treasure chamber. Processes mmap the pack read-only and
+read it in place through memoryviews, so opening one costs a few
+milliseconds whatever the world's size. Every worker on the machine shares
+one copy in the page cache instead of holding its own dicts.
+
+load_world() opens a pack for any path ending in PACK_SUFFIX:
+
+    python world_pack.py worlds/huge.json       # writes worlds/huge.pack
+    WORLD_FILE = "worlds/huge.pack"
+
+Packs use the byte order of the machine that built them.
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+from config import GameConfig
+from metrics import instrumented, timed
+from world import (HINT_TARGET, Enemy, GraphQueries, Item, Location, PrefixIndex, WorldError, WorldView,
+                   name_aliases, normalize_name)
+from world_store import hops_toward, iter_world_file, reachable_count
+
+log = logging.getLogger(__name__)
+
+PACK_SUFFIX = ".pack"
+PACK_MAGIC = b"AQWP"
+
+# Bump when the pack layout changes
+PACK_FORMAT = 1
+
+# Sections in file order; all but meta and string_data are arrays of 32-bit ints
+SECTIONS = (
+    "meta",             # JSON: start, items, enemies, byte order
+    "string_offsets",   # S + 1 offsets into string_data
+    "string_data",      # UTF-8 text of every string
+    "key_sids",         # per location: string id of its key
+    "name_sids",
+    "description_sids",
+    "exit_offsets", "exit_ids",             # per location: slice of exit location ids
+    "item_offsets", "item_sids",            # per location: slice of item key string ids
+    "enemy_offsets", "enemy_sids",
+    "event_offsets", "event_sids",
+    "key_table",        # open-addressing hash of crc32(key) -> location id + 1 (0 = empty)
+    "alias_sids", "alias_ids",              # (alias, location id) sorted by alias
+    "hints",            # per location: next hop toward HINT_TARGET, -1 if none
+)
+
+# Header: magic, format, section count, then (offset, length) per section
+_HEADER = struct.Struct("<4sII")
+_SECTION = struct.Struct("<QQ")
+
+
+class _Strings:
+    """String table being built"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.offsets = array("I", [0])
+        self.data = bytearray()
+
+    def add(self, text: str) -> int:
+        """Id of a string that may repeat (descriptions, item keys), stored once"""
+        sid = self.ids.get(text)
+        if sid is None:
+            sid = self.ids[text] = self.append(text)
+        return sid
+
+    def append(self, text: str) -> int:
+        """Id of a new copy of text, for strings that rarely repeat (keys, names)"""
+        self.data += text.encode("utf-8")
+        self.offsets.append(len(self.data))
+        return len(self.offsets) - 2
+
+
+def _key_table(keys: Sequence[bytes]) -> array:
+    size = 1
+    while size < 2 * len(keys):
+        size *= 2
+    table = array("I", [0]) * size
+    for location_id, key in enumerate(keys):
+        slot = zlib.crc32(key) & (size - 1)
+        while table[slot]:
+            slot = (slot + 1) & (size - 1)
+        table[slot] = location_id + 1
+    return table
+
+
+def build_pack(source: str, out: str) -> Dict:
+    """Compile a world file into a pack at out; returns build statistics
+
+    The file is streamed twice: once to number the locations, once to
+    resolve and pack their contents.
+    """
+    started = time.perf_counter()
+    path = Path(source)
+    meta = {"start": "forest_start", "items": {}, "enemies": {}}
+    ids: Dict[str, int] = {}
+    for kind, key, _ in iter_world_file(path):
+        if kind != "location":
+            meta[kind] = key
+        elif key in ids:
+            raise WorldError(f"Invalid world: location '{key}' is defined twice")
+        else:
+            ids[key] = len(ids)
+    if meta["start"] not in ids:
+        raise WorldError(f"Invalid world: start location '{meta['start']}' is not defined")
+
+    strings = _Strings()
+    key_sids = array("I", (strings.append(key) for key in ids))
+    arrays = {name: array("I") for name in ("name_sids", "description_sids", "exit_ids", "item_sids",
+                                             "enemy_sids", "event_sids")}
+    for name in ("exit_offsets", "item_offsets", "enemy_offsets", "event_offsets"):
+        arrays[name] = array("I", [0])
+    problems = []
+    for kind, key, fields in iter_world_file(path):
+        if kind != "location":
+            continue
+        arrays["name_sids"].append(strings.append(fields["name"]))
+        arrays["description_sids"].append(strings.add(fields["description"]))
+        for exit_key in fields["exits"]:
+            if exit_key in ids:
+                arrays["exit_ids"].append(ids[exit_key])
+            else:
+                problems.append(f"{key}: exit to undefined location '{exit_key}'")
+        for field, known, kind_name in (("items", meta["items"], "item"), ("enemies", meta["enemies"], "enemy"),
+                                        ("special_events", None, "event")):
+            for value in fields.get(field) or ():
+                if known is not None and value not in known:
+                    problems.append(f"{key}: undefined {kind_name} '{value}'")
+                arrays[f"{kind_name}_sids"].append(strings.add(value))
+        for name in ("exit", "item", "enemy", "event"):
+            arrays[f"{name}_offsets"].append(len(arrays[f"{name}_ids" if name == "exit" else f"{name}_sids"]))
+        if len(problems) > 20:
+            break
+    if problems:
+        raise WorldError("Invalid world: " + "; ".join(problems[:20]))
+
+    offsets, exits = arrays["exit_offsets"], arrays["exit_ids"]
+    hints = hops_toward(offsets, exits, ids.get(HINT_TARGET))
+    unreachable = len(ids) - reachable_count(offsets, exits, ids[meta["start"]])
+    if unreachable:
+        log.warning("World has %d locations unreachable from %s", unreachable, meta["start"])
+
+    # A key is its own first alias, so only the shorter suffixes need new strings
+    aliases = sorted((alias, location_id, n == 0) for key, location_id in ids.items()
+                     for n, alias in enumerate(name_aliases(key)))
+    alias_sids = array("I", (key_sids[location_id] if is_key else strings.append(alias)
+                             for alias, location_id, is_key in aliases))
+    alias_ids = array("I", (location_id for _, location_id, _ in aliases))
+    del aliases
+    key_table = _key_table([key.encode("utf-8") for key in ids])
+
+    meta["byteorder"] = sys.byteorder
+    meta["size"] = len(ids)
+    sections = {
+        "meta": json.dumps(meta).encode("utf-8"),
+        "string_offsets": strings.offsets, "string_data": strings.data, "key_sids": key_sids,
+        **arrays, "key_table": key_table, "alias_sids": alias_sids, "alias_ids": alias_ids, "hints": hints,
+    }
+
+    out_path = Path(out)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out_path.with_name(out_path.name + f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        position = _HEADER.size + _SECTION.size * len(SECTIONS)
+        table = []
+        for name in SECTIONS:
+            position += -position % 8
+            length = len(memoryview(sections[name]).cast("B"))
+            table.append((position, length))
+            position += length
+        f.write(_HEADER.pack(PACK_MAGIC, PACK_FORMAT, len(SECTIONS)))
+        for entry in table:
+            f.write(_SECTION.pack(*entry))
+        for name, (offset, _) in zip(SECTIONS, table):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(sections[name])
+    os.replace(tmp, out_path)
+    return {"locations": len(ids), "strings": len(strings.offsets) - 1, "unreachable": unreachable,
+            "seconds": time.perf_counter() - started, "bytes": out_path.stat().st_size}
+
+
+class WorldPack:
+    """A pack mapped read-only, read in place through memoryviews"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, count = _HEADER.unpack_from(view)
+        if magic != PACK_MAGIC or version != PACK_FORMAT or count != len(SECTIONS):
+            view.release()
+            self._mmap.close()
+            raise WorldError(f"{path} is not a format {PACK_FORMAT} world pack; rebuild it with world_pack.py")
+
+        self._views = [view]
+        for i, name in enumerate(SECTIONS):
+            offset, length = _SECTION.unpack_from(view, _HEADER.size + i * _SECTION.size)
+            section = view[offset:offset + length]
+            if name not in ("meta", "string_data"):
+                section = section.cast("i" if name == "hints" else "I")
+            setattr(self, name, section)
+            self._views.append(section)
+        self.meta = json.loads(str(self.meta, "utf-8"))
+        if self.meta["byteorder"] != sys.byteorder:
+            self.close()
+            raise WorldError(f"{path} was built on a {self.meta['byteorder']}-endian machine")
+        self.size = self.meta["size"]
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._mmap.close()
+
+    def string(self, sid: int) -> str:
+        return str(self.string_data[self.string_offsets[sid]:self.string_offsets[sid + 1]], "utf-8")
+
+    def key(self, location_id: int) -> str:
+        return self.string(self.key_sids[location_id])
+
+    def location_id(self, key: str) -> Optional[int]:
+        """Id of a location key, or None if the world has no such location"""
+        encoded = key.encode("utf-8")
+        mask = len(self.key_table) - 1
+        slot = zlib.crc32(encoded) & mask
+        while True:
+            entry = self.key_table[slot]
+            if not entry:
+                return None
+            sid = self.key_sids[entry - 1]
+            if self.string_data[self.string_offsets[sid]:self.string_offsets[sid + 1]] == encoded:
+                return entry - 1
+            slot = (slot + 1) & mask
+
+    def _strings(self, sids, offsets, location_id: int) -> Tuple[str, ...]:
+        return tuple(self.string(sids[i]) for i in range(offsets[location_id], offsets[location_id + 1]))
+
+    def exits(self, location_id: int) -> memoryview:
+        """Exit location ids, as a view into the pack"""
+        return self.exit_ids[self.exit_offsets[location_id]:self.exit_offsets[location_id + 1]]
+
+    def location(self, location_id: int) -> Location:
+        return Location(
+            name=self.string(self.name_sids[location_id]),
+            description=self.string(self.description_sids[location_id]),
+            exits=tuple(self.key(i) for i in self.exits(location_id)),
+            items=self._strings(self.item_sids, self.item_offsets, location_id),
+            enemies=self._strings(self.enemy_sids, self.enemy_offsets, location_id),
+            special_events=self._strings(self.event_sids, self.event_offsets, location_id),
+        )
+
+    def alias_matches(self, text: str) -> Iterator[int]:
+        """Location ids with an alias starting with text"""
+        low, high = 0, len(self.alias_sids)
+        while low < high:
+            middle = (low + high) // 2
+            if self.string(self.alias_sids[middle]) < text:
+                low = middle + 1
+            else:
+                high = middle
+        while low < len(self.alias_sids) and self.string(self.alias_sids[low]).startswith(text):
+            yield self.alias_ids[low]
+            low += 1
+
+
+class PackedLocations(Mapping):
+    """Read-only location mapping over a WorldPack; locations are decoded on access"""
+
+    def __init__(self, pack: WorldPack):
+        self.pack = pack
+
+    def __getitem__(self, key: str) -> Location:
+        location_id = self.pack.location_id(key)
+        if location_id is None:
+            raise KeyError(key)
+        return self.pack.location(location_id)
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self.pack.location_id(key) is not None
+
+    def __len__(self) -> int:
+        return self.pack.size
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.pack.key(i) for i in range(self.pack.size))
+
+
+@instrumented
+class PackedGraph(GraphQueries):
+    """The WorldGraph queries the game uses, answered from a WorldPack
+
+    Paths to the treasure chamber follow the packed hints.
+    """
+
+    def __init__(self, pack: WorldPack, items: Mapping[str, Item], start: str,
+                 search_limit: int = GameConfig.WORLD_SEARCH_LIMIT):
+        self.pack = pack
+        self.start = pack.location_id(start)
+        self.item_index = PrefixIndex(items)
+        self.search_limit = search_limit
+
+    def __len__(self) -> int:
+        return self.pack.size
+
+    @timed("world_call_seconds", call="resolve_exit")
+    def resolve_exit(self, location: str, text: str) -> Optional[str]:
+        """Exit of location named by text (prefix of any word suffix), or None"""
+        exits = self.pack.exits(self.pack.location_id(location))
+        return PrefixIndex(self.pack.key(i) for i in exits).first(text)
+
+    @timed("world_call_seconds", call="resolve_location")
+    def resolve_location(self, text: str) -> Optional[str]:
+        """Any location named by text, or None"""
+        text = normalize_name(text)
+        if self.pack.location_id(text) is not None:
+            return text
+        first = min(self.pack.alias_matches(text), default=None)
+        return self.pack.key(first) if first is not None else None
+
+    def _location_id(self, key: str) -> Optional[int]:
+        return self.pack.location_id(key)
+
+    def _keys_of(self, location_ids: Sequence[int]) -> List[str]:
+        return [self.pack.key(i) for i in location_ids]
+
+    def _exit_reader(self):
+        return self.pack.exits
+
+    def _hint_reader(self):
+        return self.pack.hints.__getitem__
+
+
+class PackedWorld(WorldView):
+    """A World read in place from a mapped WorldPack"""
+
+    def __init__(self, pack: WorldPack):
+        self.pack = pack
+        self._items = {key: Item(**fields) for key, fields in pack.meta["items"].items()}
+        self._enemies = {key: Enemy(**fields) for key, fields in pack.meta["enemies"].items()}
+        self._locations = PackedLocations(pack)
+        self.start = pack.meta["start"]
+        self.graph = PackedGraph(pack, self._items, self.start)
+
+
+def open_pack(path: str) -> PackedWorld:
+    """Map a pack read-only as a world"""
+    return PackedWorld(WorldPack(path))
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Compile a world file into a pack from the command line"""
+    parser = argparse.ArgumentParser(description="Compile a world file into a memory-mapped world pack")
+    parser.add_argument("world", help="world file (.json or .toml)")
+    parser.add_argument("--out", help=f"pack file (default: the world file with a {PACK_SUFFIX} suffix)")
+    args = parser.parse_args(argv)
+
+    out = args.out or str(Path(args.world).with_suffix(PACK_SUFFIX))
+    stats = build_pack(args.world, out)
+    print(f"📦 {stats['locations']:,} locations and {stats['strings']:,} strings packed into {out} "
+          f"({stats['bytes'] / 2**20:.1f} MiB in {stats['seconds']:.1f}s)")
+    if stats["unreachable"]:
+        print(f"⚠️  {stats['unreachable']:,} locations are unreachable from the start")
+    print(f'   Set WORLD_FILE = "{out}" in config.py to play it.')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,515 @@
+#!/usr/bin/env python3
+"""
+Region-based world store for huge maps
+A world file is compiled once into an SQLite store, and games open the store
+instead of loading every location. Locations are numbered in file order and
+grouped into regions of GameConfig.WORLD_REGION_SIZE. A region is read in a
+single query the first time a player reaches one of its locations, and an
+LRU keeps the WORLD_REGION_CACHE most recently used regions resident. Open
+time and memory therefore stay flat however many locations the world has.
+
+The compiler streams the world file, so it never holds the parsed world in
+memory. It also stores what the in-memory WorldGraph computes on demand:
+exit ids, a next hop toward the treasure chamber for hints, and a table of
+name aliases for travel.
+
+load_world() opens a store for any path ending in STORE_SUFFIX:
+
+    python world_store.py worlds/huge.json       # writes worlds/huge.sqlite
+    WORLD_FILE = "worlds/huge.sqlite"
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+from config import GameConfig
+from metrics import instrumented, timed
+from world import (HINT_TARGET, Enemy, GraphQueries, Item, Location, PrefixIndex, WorldError, WorldView,
+                   name_aliases, normalize_name, parse_world_file)
+
+log = logging.getLogger(__name__)
+
+STORE_SUFFIX = ".sqlite"
+
+# Bump when the store layout changes
+STORE_FORMAT = 1
+
+# Separator for the key lists in a row
+SEP = "\x1f"
+
+
+class _JsonReader:
+    """Incremental reader for a large JSON document, one value at a time"""
+
+    def __init__(self, f, chunk_size: int = 1 << 20):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        data = self.f.read(self.chunk_size)
+        if not data:
+            return False
+        self.buffer = self.buffer[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, without consuming it"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise WorldError("Invalid world: file ends early")
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise WorldError(f"Invalid world: expected '{char}' but found '{self.buffer[self.pos]}'")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            if end == len(self.buffer) and self._fill():
+                continue  # a number may continue in the next chunk
+            self.pos = end
+            return value
+
+    def members(self) -> Iterator[str]:
+        """Keys of the next object; the caller reads each value before asking for the next key"""
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(":")
+            yield key
+            separator = self.peek()
+            self.pos += 1
+            if separator == "}":
+                return
+            if separator != ",":
+                raise WorldError(f"Invalid world: expected ',' or '}}' after '{key}'")
+
+
+def iter_world_file(path: Path) -> Iterator[Tuple[str, object, object]]:
+    """("start" | "items" | "enemies", value, None) and ("location", key, fields) in file order"""
+    if path.suffix != ".json":
+        data = parse_world_file(path, path.read_bytes())
+        for section in ("start", "items", "enemies"):
+            if section in data:
+                yield section, data[section], None
+        for key, fields in data["locations"].items():
+            yield "location", key, fields
+        return
+
+    with open(path, encoding="utf-8") as f:
+        reader = _JsonReader(f)
+        for section in reader.members():
+            if section == "locations":
+                for key in reader.members():
+                    yield "location", key, reader.value()
+            else:
+                yield section, reader.value(), None
+
+
+def _joined(keys: Optional[Sequence[str]]) -> str:
+    return SEP.join(keys or ())
+
+
+def _split(text: str) -> Tuple[str, ...]:
+    return tuple(text.split(SEP)) if text else ()
+
+
+def build_store(source: str, out: str, region_size: int = GameConfig.WORLD_REGION_SIZE,
+                batch_size: int = 10000) -> Dict:
+    """Compile a world file into a region store at out; returns build statistics"""
+    started = time.perf_counter()
+    out_path = Path(out)
+    tmp = out_path.with_name(out_path.name + f".{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp)
+    conn.executescript("""
+        PRAGMA journal_mode=OFF;
+        PRAGMA synchronous=OFF;
+        CREATE TABLE meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE locations (
+            id INTEGER PRIMARY KEY,
+            key TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            exits TEXT NOT NULL,
+            items TEXT NOT NULL,
+            enemies TEXT NOT NULL,
+            special_events TEXT NOT NULL,
+            exit_ids BLOB,
+            hint INTEGER
+        );
+        CREATE TABLE aliases (alias TEXT NOT NULL, id INTEGER NOT NULL);
+    """)
+
+    # Pass 1: stream locations into the table, interning keys
+    meta = {"start": "forest_start", "items": {}, "enemies": {}}
+    ids: Dict[str, int] = {}
+    rows, aliases = [], []
+
+    def flush():
+        conn.executemany("INSERT INTO locations (id, key, name, description, exits, items, enemies, special_events)"
+                         " VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO aliases VALUES (?, ?)", aliases)
+        rows.clear()
+        aliases.clear()
+
+    try:
+        for kind, key, fields in iter_world_file(Path(source)):
+            if kind != "location":
+                meta[kind] = key
+                continue
+            if key in ids:
+                raise WorldError(f"Invalid world: location '{key}' is defined twice")
+            location_id = ids[key] = len(ids)
+            rows.append((location_id, key, fields["name"], fields["description"], _joined(fields["exits"]),
+                         _joined(fields.get("items")), _joined(fields.get("enemies")),
+                         _joined(fields.get("special_events"))))
+            aliases.extend((alias, location_id) for alias in name_aliases(key))
+            if len(rows) >= batch_size:
+                flush()
+        flush()
+        size = len(ids)
+
+        # Pass 2: validate references and build the adjacency as flat arrays
+        items, enemies = meta["items"], meta["enemies"]
+        if meta["start"] not in ids:
+            raise WorldError(f"Invalid world: start location '{meta['start']}' is not defined")
+        problems = []
+        offsets, targets = array("l", [0]), array("i")
+        for location_id, key, exits, held, enemy_keys in conn.execute(
+                "SELECT id, key, exits, items, enemies FROM locations ORDER BY id"):
+            exit_row = array("i")
+            for exit_key in _split(exits):
+                if exit_key in ids:
+                    exit_row.append(ids[exit_key])
+                else:
+                    problems.append(f"{key}: exit to undefined location '{exit_key}'")
+            problems.extend(f"{key}: undefined item '{item}'" for item in _split(held) if item not in items)
+            problems.extend(f"{key}: undefined enemy '{enemy}'" for enemy in _split(enemy_keys) if enemy not in enemies)
+            if len(problems) > 20:
+                break
+            targets.extend(exit_row)
+            offsets.append(len(targets))
+        if problems:
+            raise WorldError("Invalid world: " + "; ".join(problems[:20]))
+        del ids
+
+        # Pass 3: exit ids and the next hop toward the hint target
+        row = conn.execute("SELECT id FROM locations WHERE key = ?", (HINT_TARGET,)).fetchone()
+        hints = hops_toward(offsets, targets, row[0] if row else None)
+        conn.executemany("UPDATE locations SET exit_ids = ?, hint = ? WHERE id = ?", (
+            (targets[offsets[i]:offsets[i + 1]].tobytes(), hints[i] if hints[i] != -1 else None, i)
+            for i in range(size)))
+        start_id = conn.execute("SELECT id FROM locations WHERE key = ?", (meta["start"],)).fetchone()[0]
+        unreachable = size - reachable_count(offsets, targets, start_id)
+        if unreachable:
+            log.warning("World has %d locations unreachable from %s", unreachable, meta["start"])
+
+        conn.execute("CREATE INDEX aliases_by_alias ON aliases (alias, id)")
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("format", str(STORE_FORMAT)), ("region_size", str(region_size)), ("size", str(size)),
+            ("start", meta["start"]), ("items", json.dumps(items)), ("enemies", json.dumps(enemies)),
+        ])
+        conn.commit()
+    except BaseException:
+        conn.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    conn.close()
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp, out_path)
+    return {"locations": size, "regions": -(-size // region_size), "unreachable": unreachable,
+            "seconds": time.perf_counter() - started, "bytes": out_path.stat().st_size}
+
+
+def hops_toward(offsets: array, targets: array, target: Optional[int]) -> array:
+    """Next-hop table toward target (-1 where unreachable) for exits in flat offsets/targets form"""
+    size = len(offsets) - 1
+    hops = array("i", [-1]) * size
+    if target is None:
+        return hops
+
+    # Reverse adjacency in the same flat layout
+    counts = array("l", [0]) * (size + 1)
+    for exit_id in targets:
+        counts[exit_id + 1] += 1
+    for i in range(size):
+        counts[i + 1] += counts[i]
+    sources = array("i", [0]) * len(targets)
+    fill = array("l", counts)
+    for source in range(size):
+        for j in range(offsets[source], offsets[source + 1]):
+            exit_id = targets[j]
+            sources[fill[exit_id]] = source
+            fill[exit_id] += 1
+
+    hops[target] = target
+    frontier = deque([target])
+    while frontier:
+        node = frontier.popleft()
+        for j in range(counts[node], counts[node + 1]):
+            source = sources[j]
+            if hops[source] == -1:
+                hops[source] = node
+                frontier.append(source)
+    return hops
+
+
+def reachable_count(offsets: array, targets: array, start_id: int) -> int:
+    """Number of locations reachable from start_id"""
+    seen = bytearray(len(offsets) - 1)
+    seen[start_id] = 1
+    frontier = deque([start_id])
+    while frontier:
+        node = frontier.popleft()
+        for j in range(offsets[node], offsets[node + 1]):
+            if not seen[targets[j]]:
+                seen[targets[j]] = 1
+                frontier.append(targets[j])
+    return sum(seen)
+
+
+class _Entry(NamedTuple):
+    key: str
+    location: Location
+    exit_ids: array
+    hint: Optional[int]
+
+
+class RegionStore:
+    """Read side of a store: locations loaded a region at a time, the hottest regions kept"""
+
+    def __init__(self, path: str, cache_regions: int = GameConfig.WORLD_REGION_CACHE):
+        self.path = Path(path).resolve()
+        self.conn = sqlite3.connect(self.path.as_uri() + "?mode=ro", uri=True, check_same_thread=False)
+        meta = dict(self.conn.execute("SELECT name, value FROM meta"))
+        if int(meta["format"]) != STORE_FORMAT:
+            raise WorldError(f"{path} is a format {meta['format']} world store; rebuild it with world_store.py")
+        self.meta = meta
+        self.size = int(meta["size"])
+        self.region_size = int(meta["region_size"])
+        self.cache_regions = cache_regions
+        self.regions: "OrderedDict[int, Dict[int, _Entry]]" = OrderedDict()
+        self.ids: Dict[str, int] = {}     # keys of resident locations
+        self.loads = 0
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.conn.close()
+
+    def location_id(self, key: str) -> Optional[int]:
+        """Id of a location key, or None if the world has no such location"""
+        location_id = self.ids.get(key)
+        if location_id is None:
+            with self._lock:
+                row = self.conn.execute("SELECT id FROM locations WHERE key = ?", (key,)).fetchone()
+            location_id = row[0] if row else None
+        return location_id
+
+    def entry(self, location_id: int) -> _Entry:
+        """A location by id, loading its region if it is cold"""
+        region_id = location_id // self.region_size
+        with self._lock:
+            region = self.regions.get(region_id)
+            if region is None:
+                region = self._load_region(region_id)
+            else:
+                self.regions.move_to_end(region_id)
+            return region[location_id]
+
+    def _load_region(self, region_id: int) -> Dict[int, _Entry]:
+        first = region_id * self.region_size
+        rows = self.conn.execute(
+            "SELECT id, key, name, description, exits, items, enemies, special_events, exit_ids, hint"
+            " FROM locations WHERE id >= ? AND id < ?", (first, first + self.region_size)).fetchall()
+        region = {}
+        for location_id, key, name, description, exits, items, enemies, events, exit_ids, hint in rows:
+            location = Location(name, description, _split(exits), _split(items), _split(enemies), _split(events))
+            region[location_id] = _Entry(key, location, array("i", exit_ids or b""), hint)
+            self.ids[key] = location_id
+        self.regions[region_id] = region
+        self.loads += 1
+        while len(self.regions) > self.cache_regions:
+            _, evicted = self.regions.popitem(last=False)
+            for entry in evicted.values():
+                del self.ids[entry.key]
+        return region
+
+    def region_column(self, region_id: int, column: str) -> list:
+        """One column ("exit_ids" or "hint") for every location in a region, without caching the region"""
+        first = region_id * self.region_size
+        with self._lock:
+            rows = self.conn.execute(f"SELECT {column} FROM locations WHERE id >= ? AND id < ? ORDER BY id",
+                                     (first, first + self.region_size)).fetchall()
+        if column == "exit_ids":
+            return [array("i", blob or b"") for blob, in rows]
+        return [value for value, in rows]
+
+    def keys_of(self, location_ids: Sequence[int]) -> List[str]:
+        """Keys of locations by id, resident or not"""
+        keys = {}
+        with self._lock:
+            for i in range(0, len(location_ids), 500):
+                chunk = location_ids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                keys.update(self.conn.execute(f"SELECT id, key FROM locations WHERE id IN ({marks})", chunk))
+        return [keys[location_id] for location_id in location_ids]
+
+    def keys(self) -> Iterator[str]:
+        """Every location key in id order, streamed without loading regions"""
+        conn = sqlite3.connect(self.path.as_uri() + "?mode=ro", uri=True)
+        try:
+            for (key,) in conn.execute("SELECT key FROM locations ORDER BY id"):
+                yield key
+        finally:
+            conn.close()
+
+
+class StoreLocations(Mapping):
+    """Read-only location mapping over a RegionStore"""
+
+    def __init__(self, store: RegionStore):
+        self.store = store
+
+    def __getitem__(self, key: str) -> Location:
+        location_id = self.store.location_id(key)
+        if location_id is None:
+            raise KeyError(key)
+        return self.store.entry(location_id).location
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self.store.location_id(key) is not None
+
+    def __len__(self) -> int:
+        return self.store.size
+
+    def __iter__(self) -> Iterator[str]:
+        return self.store.keys()
+
+
+@instrumented
+class StoreGraph(GraphQueries):
+    """The WorldGraph queries the game uses, answered from a RegionStore
+
+    Paths to the treasure chamber follow the stored hints.
+    """
+
+    def __init__(self, store: RegionStore, items: Mapping[str, Item], start: str,
+                 search_limit: int = GameConfig.WORLD_SEARCH_LIMIT):
+        self.store = store
+        self.start = store.location_id(start)
+        self.item_index = PrefixIndex(items)
+        self.search_limit = search_limit
+
+    def __len__(self) -> int:
+        return self.store.size
+
+    @timed("world_call_seconds", call="resolve_exit")
+    def resolve_exit(self, location: str, text: str) -> Optional[str]:
+        """Exit of location named by text (prefix of any word suffix), or None"""
+        return PrefixIndex(self.store.entry(self.store.location_id(location)).location.exits).first(text)
+
+    @timed("world_call_seconds", call="resolve_location")
+    def resolve_location(self, text: str) -> Optional[str]:
+        """Any location named by text, or None"""
+        text = normalize_name(text)
+        if self.store.location_id(text) is not None:
+            return text
+        with self.store._lock:
+            row = self.store.conn.execute(
+                "SELECT min(id) FROM aliases WHERE alias >= ? AND alias < ?", (text, text + "\U0010ffff")).fetchone()
+        return self.store.entry(row[0]).key if row[0] is not None else None
+
+    def _location_id(self, key: str) -> Optional[int]:
+        return self.store.location_id(key)
+
+    def _keys_of(self, location_ids: Sequence[int]) -> List[str]:
+        return self.store.keys_of(location_ids)
+
+    def _exit_reader(self):
+        return self._column_reader("exit_ids")
+
+    def _hint_reader(self):
+        return self._column_reader("hint")
+
+    def _column_reader(self, column: str):
+        """Per-location lookup of one column, reading whole regions on the side"""
+        # Routes read bare columns so a long path or wide search does not flush the hot regions
+        regions = {}
+        region_size = self.store.region_size
+
+        def read(location_id: int):
+            region_id, offset = divmod(location_id, region_size)
+            values = regions.get(region_id)
+            if values is None:
+                values = regions[region_id] = self.store.region_column(region_id, column)
+            return values[offset]
+        return read
+
+
+class StoreWorld(WorldView):
+    """A World whose locations live in a RegionStore"""
+
+    def __init__(self, store: RegionStore):
+        self.store = store
+        meta = store.meta
+        self._items = {key: Item(**fields) for key, fields in json.loads(meta["items"]).items()}
+        self._enemies = {key: Enemy(**fields) for key, fields in json.loads(meta["enemies"]).items()}
+        self._locations = StoreLocations(store)
+        self.start = meta["start"]
+        self.graph = StoreGraph(store, self._items, self.start)
+
+
+def open_store(path: str) -> StoreWorld:
+    """Open a compiled store as a world"""
+    return StoreWorld(RegionStore(path))
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Compile a world file into a region store from the command line"""
+    parser = argparse.ArgumentParser(description="Compile a world file into a lazily loaded region store")
+    parser.add_argument("world", help="world file (.json or .toml)")
+    parser.add_argument("--out", help=f"store file (default: the world file with a {STORE_SUFFIX} suffix)")
+    parser.add_argument("--region-size", type=int, default=GameConfig.WORLD_REGION_SIZE,
+                        help="locations per region")
+    args = parser.parse_args(argv)
+
+    out = args.out or str(Path(args.world).with_suffix(STORE_SUFFIX))
+    stats = build_store(args.world, out, args.region_size)
+    print(f"🗄️  {stats['locations']:,} locations in {stats['regions']:,} regions written to {out} "
+          f"({stats['bytes'] / 2**20:.1f} MiB in {stats['seconds']:.1f}s)")
+    if stats["unreachable"]:
+        print(f"⚠️  {stats['unreachable']:,} locations are unreachable from the start")
+    print(f'   Set WORLD_FILE = "{out}" in config.py to play it.')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Procedural world generator
+Writes seeded worlds of any size in the world-file schema (the same JSON
+load_world reads), for load testing and simulation. Locations form a grid:
+every row is a corridor, column 0 links all rows, and other north-south
+links exist with probability ``link_rate``, so the map is always connected
+from forest_start to treasure_chamber in the far corner.
+
+Output is streamed row by row; only the current row's links are kept, so
+memory stays flat however many locations are written. The same spec and
+seed always produce the same bytes.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from config import GameConfig
+
+# Biomes with the descriptions their locations draw from
+BIOMES = {
+    "forest": ["Tall trees crowd the path.", "Moss muffles your footsteps.", "Birdsong echoes through the canopy."],
+    "river": ["Cold water rushes past.", "Smooth stones line the bank.", "Mist rises from the rapids."],
+    "cave": ["Water drips in the dark.", "The walls glitter faintly.", "A cold draft blows from below."],
+    "ruins": ["Broken columns lean together.", "Faded carvings cover the walls.", "Dust hangs in the still air."],
+    "meadow": ["Wildflowers sway in the breeze.", "Long grass hides the trail.", "Bees drone lazily."],
+    "swamp": ["The ground squelches underfoot.", "Reeds hiss in the wind.", "Bubbles rise from the mire."],
+}
+
+# Side of the square biome regions, in locations
+REGION = 16
+
+
+@dataclass
+class WorldSpec:
+    """Size, seed and placement distributions of a generated world
+
+    Rates are expected counts per location; weights pick which item, enemy
+    or event is placed (defaults: items weighted by 1/value, common enemies
+    equally, merchants three times as often as bridge puzzles).
+    """
+    size: int
+    seed: int = 0
+    link_rate: float = 0.5
+    item_rate: float = 0.3
+    enemy_rate: float = 0.2
+    event_rate: float = 0.05
+    item_weights: Optional[Dict[str, float]] = None
+    enemy_weights: Optional[Dict[str, float]] = None
+    event_weights: Dict[str, float] = field(default_factory=lambda: {"merchant_encounter": 3, "bridge_puzzle": 1})
+
+
+def location_key(index: int, size: int, width: int) -> str:
+    """Key of the location at a grid index"""
+    if index == 0:
+        return "forest_start"
+    if index == size - 1:
+        return "treasure_chamber"
+    row, column = divmod(index, width)
+    biome = list(BIOMES)[(row // REGION + column // REGION) % len(BIOMES)]
+    return f"{biome}_{index}"
+
+
+class _Placer:
+    """Weighted draws of a geometric number of keys"""
+
+    def __init__(self, rng: random.Random, rate: float, weights: Dict[str, float]):
+        self.rng = rng
+        self.keep_going = rate / (1 + rate)  # mean rate
+        self.keys = list(weights)
+        self.cum_weights = []
+        total = 0.0
+        for key in self.keys:
+            total += weights[key]
+            self.cum_weights.append(total)
+
+    def draw(self) -> Optional[List[str]]:
+        count = 0
+        while self.rng.random() < self.keep_going:
+            count += 1
+        if not count or not self.keys:
+            return None
+        return self.rng.choices(self.keys, cum_weights=self.cum_weights, k=count)
+
+
+def generate_world(spec: WorldSpec, out_path: str, template_path: Optional[str] = None) -> Dict:
+    """Stream a generated world to out_path; returns generation statistics"""
+    if spec.size < 2:
+        raise ValueError("A world needs at least a start and a treasure chamber")
+
+    template_file = Path(template_path) if template_path else Path(__file__).resolve().parent / GameConfig.WORLD_FILE
+    template = json.loads(template_file.read_bytes())
+    items, enemies = template["items"], template["enemies"]
+    common_enemies = [key for key in enemies if key != "treasure_guardian"]
+
+    rng = random.Random(spec.seed)
+    items_placer = _Placer(rng, spec.item_rate, spec.item_weights or {
+        key: 1 / max(1, fields["value"]) for key, fields in items.items()})
+    enemies_placer = _Placer(rng, spec.enemy_rate, spec.enemy_weights or dict.fromkeys(common_enemies, 1))
+    events_placer = _Placer(rng, spec.event_rate, spec.event_weights)
+
+    size = spec.size
+    width = math.isqrt(size - 1) + 1
+    out = Path(out_path)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + f".{os.getpid()}.tmp")
+    start = time.perf_counter()
+    counts = {"locations": size, "exits": 0, "items": 0, "enemies": 0, "events": 0}
+
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write('{"start": "forest_start", "items": ')
+        json.dump(items, f)
+        f.write(', "enemies": ')
+        json.dump(enemies, f)
+        f.write(', "locations": {\n')
+
+        links_up = [False] * width
+        for row in range(math.ceil(size / width)):
+            first = row * width
+            links_down = [first + width + column < size and (column == 0 or rng.random() < spec.link_rate)
+                          for column in range(width)]
+            for column in range(width):
+                index = first + column
+                if index >= size:
+                    break
+                exits = []
+                if links_up[column]:
+                    exits.append(location_key(index - width, size, width))
+                if column > 0:
+                    exits.append(location_key(index - 1, size, width))
+                if column + 1 < width and index + 1 < size:
+                    exits.append(location_key(index + 1, size, width))
+                if links_down[column]:
+                    exits.append(location_key(index + width, size, width))
+
+                key = location_key(index, size, width)
+                biome = key.rsplit("_", 1)[0]
+                if index == 0:
+                    name, description = "Mysterious Forest Entrance", template["locations"]["forest_start"]["description"]
+                    placed_items, placed_enemies, events = items_placer.draw(), None, ["tutorial_guide"]
+                elif index == size - 1:
+                    name, description = "Treasure Chamber", template["locations"]["treasure_chamber"]["description"]
+                    placed_items = ["enchanted_bow", "magic_crystal", "gold_coin"]
+                    placed_enemies, events = ["treasure_guardian"], ["final_victory"]
+                else:
+                    name = f"{biome.title()} {index}"
+                    description = rng.choice(BIOMES[biome])
+                    placed_items, placed_enemies, events = (items_placer.draw(), enemies_placer.draw(),
+                                                            events_placer.draw())
+                    if events:
+                        events = sorted(set(events))
+
+                location = {"name": name, "description": description, "exits": exits, "items": placed_items,
+                            "enemies": placed_enemies, "special_events": events}
+                f.write(("" if index == 0 else ",\n") + json.dumps(key) + ": " + json.dumps(location))
+
+                counts["exits"] += len(exits)
+                counts["items"] += len(placed_items or ())
+                counts["enemies"] += len(placed_enemies or ())
+                counts["events"] += len(events or ())
+            links_up = links_down
+        f.write("\n}}\n")
+
+    os.replace(tmp, out)
+    counts["seconds"] = time.perf_counter() - start
+    counts["bytes"] = out.stat().st_size
+    return counts
+
+
+def fixture_path(size: int, seed: int = 0, directory: str = GameConfig.WORLD_FIXTURE_DIR) -> Path:
+    """Where the standard generated world of a size and seed lives"""
+    return Path(__file__).resolve().parent / directory / f"world-{size}-s{seed}.json"
+
+
+def fixture(size: int, seed: int = 0, directory: str = GameConfig.WORLD_FIXTURE_DIR) -> str:
+    """Path of the standard generated world for benchmarks and simulations, generating it once"""
+    path = fixture_path(size, seed, directory)
+    if not path.exists():
+        generate_world(WorldSpec(size, seed), str(path))
+    return str(path)
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    """Generate a world from the command line"""
+    parser = argparse.ArgumentParser(description="Generate a large seeded world file")
+    parser.add_argument("size", type=int, help="number of locations")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="output file (default: the fixture path for size and seed)")
+    for name in ("link_rate", "item_rate", "enemy_rate", "event_rate"):
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, default=getattr(WorldSpec, name))
+    parser.add_argument("--weights", type=json.loads, default={}, metavar="JSON",
+                        help='placement weights, e.g. {"item_weights": {"gold_coin": 5}}')
+    args = parser.parse_args(argv)
+
+    spec = WorldSpec(args.size, args.seed, args.link_rate, args.item_rate, args.enemy_rate, args.event_rate)
+    for name, weights in args.weights.items():
+        if name not in ("item_weights", "enemy_weights", "event_weights"):
+            parser.error(f"unknown weights '{name}'")
+        setattr(spec, name, weights)
+
+    out = args.out or str(fixture_path(args.size, args.seed))
+    stats = generate_world(spec, out)
+    print(f"🌍 {stats['locations']:,} locations written to {out} "
+          f"({stats['bytes'] / 2**20:.1f} MiB in {stats['seconds']:.1f}s)")
+    print(f"   exits {stats['exits']:,}  items {stats['items']:,}  enemies {stats['enemies']:,}  "
+          f"events {stats['events']:,}")
+    print(f"   spec {json.dumps(asdict(spec))}")
+
+
+if __name__ == "__main__":
+    main()